@@ -11,49 +11,97 @@ Uploaded design file (project reference):
 Usage:
     python agent_runner.py
 
+Worker pools (environment overrides, defaults in parentheses):
+    CCS_SOURCES             comma-separated source ids, one Sentinel each (refinery-koyali-01)
+    CCS_COMPRESSOR_WORKERS  concurrent captures (1)
+    CCS_HAULER_WORKERS      trucks on the road at once (1)
+    CCS_GEOLOGIST_WORKERS   concurrent injection analyses (1)
+    CCS_STATS_INTERVAL      seconds between stage utilization reports, 0 = off (30)
+    CCS_CLOCK               realtime, a speed-up such as 100x, or virtual (realtime)
+    CCS_NETWORK             JSON road/sea network for hauling (every source 2s from OFFSHORE_RIG_ALPHA)
+    CCS_WELLS               injection wells INJ-W-01, ... sharing the reservoir (4)
+
+Headless runs:
+    python agent_runner.py --clock virtual --duration 86400   # a simulated day in seconds
+
 Notes:
 - This is a demo local runner suitable for development and testing.
 - For production, replace sync_event_bus with a distributed event bus (Kafka/PubSub).
 """
 
+import argparse
 import threading
 import time
 import queue
+import itertools
 import requests
 import json
 import sys
 import os
-from datetime import datetime
 
 # Ensure project path is on import path
 sys.path.append(os.path.dirname(__file__))
 
-import server  # imports the demo FastAPI scaffold; uses server.sync_event_bus (queue.Queue)
+from pipeline_stats import StageStats, stage_workers_from_env, format_snapshot
+from sim_clock import make_clock
+from runner_world import build_network, build_reservoir, check_sources
+import server  # imports the demo FastAPI scaffold; uses server.sync_event_bus (TopicEventBus)
 
-SYNC_BUS = server.sync_event_bus  # queue.Queue
+SYNC_BUS = server.sync_event_bus  # event_bus.TopicEventBus
 
 API_BASE = os.environ.get("CCS_API_BASE", "http://localhost:8000")
 
 STOP_FLAG = threading.Event()
 
-def sentinel_thread(interval=6):
+# Every simulated delay and bus wait goes through this clock (see sim_clock.py)
+CLOCK = make_clock()
+
+DEFAULT_SOURCES = ["refinery-koyali-01"]
+
+# Per-stage pool sizes (also the per-stage concurrency limits)
+STAGE_WORKERS = stage_workers_from_env()
+
+STATS_INTERVAL = float(os.environ.get("CCS_STATS_INTERVAL", 30))
+
+# Shared id sequences so pooled workers never hand out the same tank/vehicle id
+_TANK_SEQ = itertools.count(1)
+_VEHICLE_SEQ = itertools.count(1001)
+
+# stage name -> StageStats, populated by start_agents()
+STAGE_STATS = {}
+
+def stage_stats():
+    """Return a snapshot of every running stage's pool statistics."""
+    return [stats.snapshot() for stats in STAGE_STATS.values()]
+
+def print_stage_stats():
+    for snap in stage_stats():
+        print(f"[Stats] {format_snapshot(snap)}")
+
+def publish(topic, payload):
+    SYNC_BUS.publish(topic, payload)
+    CLOCK.notify()
+
+def stats_thread(interval):
+    """Periodically print stage utilization and queue wait"""
+    while not CLOCK.wait(STOP_FLAG, interval):
+        print_stage_stats()
+
+def sentinel_thread(interval=6, source_id=DEFAULT_SOURCES[0]):
     """Periodically publish pollution_event into sync bus (and optionally HTTP)"""
     i = 0
     while not STOP_FLAG.is_set():
         evt = {
-            "event_id": f"evt-sentinel-{int(time.time())}-{i}",
-            "source_id": "refinery-koyali-01",
+            "event_id": f"evt-sentinel-{source_id}-{int(CLOCK.time())}-{i}",
+            "source_id": source_id,
             "source_type": "point_source",
             "species": {"CO2": 5000 + i*10},
             "units": {"CO2": "ppm"},
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": CLOCK.utcnow().isoformat() + "Z",
             "confidence": 0.99,
             "feasibility_flag": True,
         }
-        try:
-            SYNC_BUS.put_nowait({"type": "pollution_event", "payload": evt})
-        except Exception:
-            pass
+        publish("pollution_event", evt)
         # Also demonstrate HTTP ingest path (non-blocking)
         try:
             requests.post(f"{API_BASE}/events/pollution", json=evt, timeout=2)
@@ -62,126 +110,117 @@ def sentinel_thread(interval=6):
             pass
         print(f"[Sentinel] emitted {evt['event_id']} CO2={evt['species']['CO2']} ppm")
         i += 1
-        time.sleep(interval)
+        CLOCK.sleep(interval)
 
-def compressor_thread():
+def compressor_thread(sub, stats):
     """Consume pollution_event, simulate capture for a fixed time, emit tank_ready"""
     capture_time = 5
-    tank_counter = 0
     while not STOP_FLAG.is_set():
         try:
-            item = SYNC_BUS.get(timeout=1)
+            item = CLOCK.get(sub, timeout=1)
         except queue.Empty:
             continue
-        if item["type"] != "pollution_event":
-            # requeue for others
+        event = item["payload"]
+        with stats.busy():
+            print(f"[Compressor] starting capture for {event['event_id']}")
+            # Simulate capture duration with step checks for stop flag
+            remaining = capture_time
+            while remaining > 0 and not STOP_FLAG.is_set():
+                CLOCK.sleep(1)
+                remaining -= 1
+            if STOP_FLAG.is_set():
+                break
+            tank = {
+                "tank_id": f"TANK-R-{next(_TANK_SEQ):04d}",
+                "mass_co2_kg": 5000.0,
+                "pressure_psi": 2950.0,
+                "sealed": True,
+                "origin": event["source_id"],
+                "timestamp": CLOCK.utcnow().isoformat() + "Z",
+            }
+            publish("tank_ready", tank)
+            # Also call HTTP endpoint
             try:
-                SYNC_BUS.put_nowait(item)
+                requests.post(f"{API_BASE}/capture/tank_ready", json=tank, timeout=2)
             except Exception:
                 pass
-            continue
-        event = item["payload"]
-        print(f"[Compressor] starting capture for {event['event_id']}")
-        # Simulate capture duration with step checks for stop flag
-        remaining = capture_time
-        while remaining > 0 and not STOP_FLAG.is_set():
-            time.sleep(1)
-            remaining -= 1
-        if STOP_FLAG.is_set():
-            break
-        tank_counter += 1
-        tank = {
-            "tank_id": f"TANK-R-{tank_counter:04d}",
-            "mass_co2_kg": 5000.0,
-            "pressure_psi": 2950.0,
-            "sealed": True,
-            "origin": event["source_id"],
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-        }
-        try:
-            SYNC_BUS.put_nowait({"type": "tank_ready", "payload": tank})
-        except Exception:
-            pass
-        # Also call HTTP endpoint
-        try:
-            requests.post(f"{API_BASE}/capture/tank_ready", json=tank, timeout=2)
-        except Exception:
-            pass
         print(f"[Compressor] sealed {tank['tank_id']} from {tank['origin']}")
 
-def hauler_thread():
-    """Consume tank_ready, simulate transport, emit delivered_to_port"""
-    vehicle_seq = 1000
+def hauler_thread(sub, stats, network):
+    """Consume tank_ready, drive to the nearest rig on `network`, emit delivered_to_port"""
     while not STOP_FLAG.is_set():
         try:
-            item = SYNC_BUS.get(timeout=1)
+            item = CLOCK.get(sub, timeout=1)
         except queue.Empty:
             continue
-        if item["type"] != "tank_ready":
-            # requeue
-            try:
-                SYNC_BUS.put_nowait(item)
-            except Exception:
-                pass
-            continue
         tank = item["payload"]
-        vehicle_seq += 1
-        vehicle = f"HV-TRUCK-{vehicle_seq}"
-        print(f"[Hauler] assigned {vehicle} for {tank['tank_id']} from {tank['origin']}")
-        # simulate travel time
-        for _ in range(2):
-            if STOP_FLAG.is_set():
-                break
-            time.sleep(1)
-        arrival_evt = {
-            "manifest_id": f"MAN-{tank['tank_id']}",
-            "tank_id": tank["tank_id"],
-            "assigned_vehicle": vehicle,
-            "from": tank["origin"],
-            "to": "OFFSHORE_RIG_ALPHA",
-            "eta": None,
-        }
-        try:
-            SYNC_BUS.put_nowait({"type": "delivered_to_port", "payload": arrival_evt})
-        except Exception:
-            pass
+        with stats.busy():
+            vehicle = f"HV-TRUCK-{next(_VEHICLE_SEQ)}"
+            try:
+                rig, remaining = network.nearest(tank["origin"], "rig")
+            except KeyError:
+                print(f"[Hauler] {tank['origin']} is not on the road network; dropping {tank['tank_id']}")
+                continue
+            if rig is None:
+                print(f"[Hauler] no open route from {tank['origin']} to a rig; dropping {tank['tank_id']}")
+                continue
+            print(f"[Hauler] assigned {vehicle} for {tank['tank_id']} from {tank['origin']} to {rig}")
+            # simulate travel time (shortest path), in steps so a stop isn't held up
+            while remaining > 0 and not STOP_FLAG.is_set():
+                step = min(1, remaining)
+                CLOCK.sleep(step)
+                remaining -= step
+            arrival_evt = {
+                "manifest_id": f"MAN-{tank['tank_id']}",
+                "tank_id": tank["tank_id"],
+                "assigned_vehicle": vehicle,
+                "from": tank["origin"],
+                "to": rig,
+                "eta": None,
+            }
+            publish("delivered_to_port", arrival_evt)
         print(f"[Hauler] delivered {arrival_evt['tank_id']} to port via {vehicle}")
 
-def geologist_thread():
-    """Consume delivered_to_port, perform a simple safety check, emit injection_report or guardian_alert"""
+def geologist_thread(sub, stats, reservoir, reservoir_lock):
+    """Consume delivered_to_port, pick the well with most headroom, emit injection_report or guardian_alert"""
     while not STOP_FLAG.is_set():
         try:
-            item = SYNC_BUS.get(timeout=1)
+            item = CLOCK.get(sub, timeout=1)
         except queue.Empty:
             continue
-        if item["type"] != "delivered_to_port":
-            try:
-                SYNC_BUS.put_nowait(item)
-            except Exception:
-                pass
-            continue
         manifest = item["payload"]
-        print(f"[Geologist] analyzing {manifest['tank_id']} for injection")
-        # simplified safety check (always pass in demo)
-        time.sleep(1)
-        injection = {
-            "well_id": "INJ-W-04",
-            "tank_id": manifest["tank_id"],
-            "status": "injected",
-            "mass_tonnes": 5.0,
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-        }
-        try:
-            SYNC_BUS.put_nowait({"type": "injection_report", "payload": injection})
-        except Exception:
-            pass
-        print(f"[Geologist] injection complete for {manifest['tank_id']}")
+        with stats.busy():
+            print(f"[Geologist] analyzing {manifest['tank_id']} for injection")
+            CLOCK.sleep(1)
+            mass_kg = 5000.0
+            with reservoir_lock:  # pooled geologists share the reservoir
+                now = CLOCK.now()
+                well = reservoir.select(mass_kg, now)
+                if well is not None:
+                    reservoir.inject(well, mass_kg, now)
+            if well is None:
+                alert = {
+                    "tank_id": manifest["tank_id"],
+                    "reason": "no well below its safe pressure limit",
+                    "timestamp": CLOCK.utcnow().isoformat() + "Z",
+                }
+                publish("guardian_alert", alert)
+                continue
+            injection = {
+                "well_id": reservoir.well_ids[well],
+                "tank_id": manifest["tank_id"],
+                "status": "injected",
+                "mass_tonnes": mass_kg / 1000.0,
+                "timestamp": CLOCK.utcnow().isoformat() + "Z",
+            }
+            publish("injection_report", injection)
+        print(f"[Geologist] injection complete for {manifest['tank_id']} into {injection['well_id']}")
 
-def guardian_thread():
+def guardian_thread(sub):
     """Monitor for injection reports and guardian alerts; escalate if needed"""
     while not STOP_FLAG.is_set():
         try:
-            item = SYNC_BUS.get(timeout=1)
+            item = CLOCK.get(sub, timeout=1)
         except queue.Empty:
             continue
         if item["type"] == "injection_report":
@@ -190,35 +229,84 @@ def guardian_thread():
         elif item["type"] == "guardian_alert":
             print(f"[Guardian] ALERT -> {item['payload']}")
             # escalate immediately (HIL)
-        else:
-            # requeue for other agents
-            try:
-                SYNC_BUS.put_nowait(item)
-            except Exception:
-                pass
-        time.sleep(0.1)
 
-def start_agents():
+def _start_pool(threads, stage, target, sub, workers, *args):
+    stats = StageStats(stage, workers, sub, clock=CLOCK.now)
+    STAGE_STATS[stage] = stats
+    for n in range(workers):
+        t = CLOCK.thread(target, args=(sub, stats, *args), name=f"{stage.capitalize()}-{n + 1}")
+        threads.append(t)
+
+def start_agents(sources=None, workers=None, stats_interval=STATS_INTERVAL, network=None, reservoir=None):
+    """Start one Sentinel per source and a worker pool per pipeline stage.
+
+    `workers` maps stage name ("compressor", "hauler", "geologist") to pool
+    size and overrides STAGE_WORKERS; `sources` defaults to CCS_SOURCES,
+    `network` to build_network(sources) and `reservoir` to build_reservoir().
+    """
+    if sources is None:
+        sources = [s.strip() for s in os.environ.get("CCS_SOURCES", "").split(",") if s.strip()] or DEFAULT_SOURCES
+    if network is None:
+        network = build_network(sources)
+    else:
+        check_sources(network, sources)
+    if reservoir is None:
+        reservoir = build_reservoir()
+    pool_sizes = dict(STAGE_WORKERS, **(workers or {}))
+    for stage, size in pool_sizes.items():
+        if size < 1:
+            raise ValueError(f"{stage} pool needs at least one worker, got {size}")
+
     threads = []
-    t_sent = threading.Thread(target=sentinel_thread, args=(6,), daemon=True, name="Sentinel")
-    t_comp = threading.Thread(target=compressor_thread, daemon=True, name="Compressor")
-    t_haul = threading.Thread(target=hauler_thread, daemon=True, name="Hauler")
-    t_geo = threading.Thread(target=geologist_thread, daemon=True, name="Geologist")
-    t_guard = threading.Thread(target=guardian_thread, daemon=True, name="Guardian")
+    # Queue waits are measured on the same (possibly simulated) clock as the work
+    SYNC_BUS.clock = CLOCK.now
+    # Subscribe before any producer starts so no early event is published unrouted.
+    # Workers of one stage share a subscription, so each item goes to one worker.
+    comp_sub = SYNC_BUS.subscribe("pollution_event")
+    haul_sub = SYNC_BUS.subscribe("tank_ready")
+    geo_sub = SYNC_BUS.subscribe("delivered_to_port")
+    guard_sub = SYNC_BUS.subscribe("injection_report", "guardian_alert")
+
+    for source_id in sources:
+        threads.append(CLOCK.thread(sentinel_thread, args=(6, source_id), name=f"Sentinel-{source_id}"))
+    _start_pool(threads, "compressor", compressor_thread, comp_sub, pool_sizes["compressor"])
+    _start_pool(threads, "hauler", hauler_thread, haul_sub, pool_sizes["hauler"], network)
+    _start_pool(threads, "geologist", geologist_thread, geo_sub, pool_sizes["geologist"],
+                reservoir, threading.Lock())
+    threads.append(CLOCK.thread(guardian_thread, args=(guard_sub,), name="Guardian"))
+    if stats_interval:
+        threads.append(CLOCK.thread(stats_thread, args=(stats_interval,), name="Stats"))
 
-    threads.extend([t_sent, t_comp, t_haul, t_geo, t_guard])
     for t in threads:
         t.start()
     return threads
 
+def stop_agents(threads, timeout=2):
+    STOP_FLAG.set()
+    CLOCK.stop()
+    deadline = time.monotonic() + timeout
+    for t in threads:
+        t.join(max(0, deadline - time.monotonic()))
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Threaded CCS agent runner")
+    parser.add_argument("--clock", default=None, help="realtime, a speed-up such as 100x, or virtual (default: CCS_CLOCK)")
+    parser.add_argument("--duration", type=float, default=None, help="stop after N simulated seconds")
+    args = parser.parse_args()
+    CLOCK = make_clock(args.clock)
+
     print("Starting agent runner. Press Ctrl+C to stop.")
+    started = time.monotonic()
     threads = start_agents()
     try:
-        while True:
-            time.sleep(1)
+        if args.duration is not None:
+            CLOCK.wait_until(args.duration)
+        else:
+            while True:
+                time.sleep(1)
     except KeyboardInterrupt:
         print("Shutdown requested. Stopping agents...")
-        STOP_FLAG.set()
-        time.sleep(2)
-        print("Agents stopped.")
+    simulated, elapsed = CLOCK.now(), time.monotonic() - started
+    stop_agents(threads)
+    print_stage_stats()
+    print(f"Agents stopped after {simulated:,.0f} simulated seconds in {elapsed:.1f}s.")
@@ -0,0 +1,302 @@
+"""
+Asyncio Agent Runner for CCS Multi-Agent Prototype
+
+Runs the same Sentinel / Compressor / Hauler / Geologist / Guardian pipeline as
+agent_runner.py, but as coroutines on a single event loop instead of one OS
+thread per agent:
+
+- waits are `await asyncio.sleep(...)`, so a parked agent costs no thread
+- every HTTP call goes through one shared httpx.AsyncClient, i.e. one
+  keep-alive connection pool to CCS_API_BASE instead of a new TCP connection
+  per event
+- shutdown is task cancellation (Ctrl+C or --duration), no STOP_FLAG polling
+- thousands of simulated sources fit in one process
+
+Usage:
+    python agent_runner_async.py                      # one refinery, like agent_runner.py
+    python agent_runner_async.py --sources 5000 --compressors 200 --haulers 100 --quiet
+
+Pool sizes default to the same CCS_*_WORKERS variables as agent_runner.py.
+Like agent_runner.py, hauls follow the shortest route on the road network
+(CCS_NETWORK), injections go to the well with the most headroom (CCS_WELLS)
+and every delay and timestamp comes from CCS_CLOCK (realtime or a speed-up
+such as 100x; the virtual clock drives threads and is not supported here).
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+from event_bus import AsyncTopicEventBus
+from pipeline_stats import StageStats, stage_workers_from_env, format_snapshot
+from runner_world import build_network, build_reservoir, check_sources
+from sim_clock import make_clock
+
+API_BASE = os.environ.get("CCS_API_BASE", "http://localhost:8000")
+
+DEFAULT_SOURCES = ["refinery-koyali-01"]
+
+# Keep-alive pool shared by every agent coroutine
+HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.environ.get("CCS_HTTP_MAX_CONNECTIONS", 20)),
+    max_keepalive_connections=int(os.environ.get("CCS_HTTP_MAX_KEEPALIVE", 20)),
+)
+HTTP_TIMEOUT = httpx.Timeout(2.0)
+
+
+class AsyncAgentRuntime:
+    """Owns the bus, the shared HTTP client and every agent task."""
+
+    def __init__(self, sources=None, workers=None, sentinel_interval=6, quiet=False,
+                 capture_time=5, analysis_time=1, clock=None, network=None, reservoir=None):
+        self.sources = sources or DEFAULT_SOURCES
+        self.workers = dict(stage_workers_from_env(), **(workers or {}))
+        for stage, size in self.workers.items():
+            if size < 1:
+                raise ValueError(f"{stage} pool needs at least one worker, got {size}")
+        self.sentinel_interval = sentinel_interval
+        self.capture_time = capture_time
+        self.analysis_time = analysis_time
+        self.clock = clock or make_clock()
+        if self.clock.virtual:
+            raise ValueError("the virtual clock schedules threads; use agent_runner.py, "
+                             "or a realtime / scaled clock here")
+        if network is None:
+            network = build_network(self.sources)
+        else:
+            check_sources(network, self.sources)
+        self.network = network
+        self.reservoir = reservoir or build_reservoir()
+        self.quiet = quiet
+        self.bus = AsyncTopicEventBus()
+        self.client = None
+        # gate in-flight requests at the pool size so thousands of agents queue
+        # on a cheap FIFO semaphore instead of inside the connection pool
+        self._http_slots = None
+        self.stats = {}
+        self.http_errors = 0
+        self._tank_seq = itertools.count(1)
+        self._vehicle_seq = itertools.count(1001)
+
+    async def sleep(self, seconds):
+        """Sleep for `seconds` of simulated time."""
+        await asyncio.sleep(seconds / self.clock.scale)
+
+    def timestamp(self):
+        return self.clock.utcnow().isoformat() + "Z"
+
+    def log(self, msg):
+        if not self.quiet:
+            print(msg)
+
+    async def post(self, path, payload):
+        """Fire a JSON POST over the shared pool; API may be offline, so errors are counted, not raised."""
+        async with self._http_slots:
+            try:
+                await self.client.post(path, json=payload)
+            except httpx.HTTPError:
+                self.http_errors += 1
+
+    # ------------------------------------------------------------------
+    # Agents
+    # ------------------------------------------------------------------
+    async def sentinel(self, source_id):
+        """Periodically publish pollution_event into the bus (and HTTP)"""
+        # spread thousands of sources over the interval instead of a thundering herd
+        await self.sleep(random.uniform(0, self.sentinel_interval))
+        for i in itertools.count():
+            evt = {
+                "event_id": f"evt-sentinel-{source_id}-{int(self.clock.time())}-{i}",
+                "source_id": source_id,
+                "source_type": "point_source",
+                "species": {"CO2": 5000 + i*10},
+                "units": {"CO2": "ppm"},
+                "timestamp": self.timestamp(),
+                "confidence": 0.99,
+                "feasibility_flag": True,
+            }
+            self.bus.publish("pollution_event", evt)
+            await self.post("/events/pollution", evt)
+            self.log(f"[Sentinel] emitted {evt['event_id']} CO2={evt['species']['CO2']} ppm")
+            await self.sleep(self.sentinel_interval)
+
+    async def compressor(self, sub, stats):
+        """Consume pollution_event, simulate capture for a fixed time, emit tank_ready"""
+        while True:
+            event = (await sub.get())["payload"]
+            with stats.busy():
+                self.log(f"[Compressor] starting capture for {event['event_id']}")
+                await self.sleep(self.capture_time)
+                tank = {
+                    "tank_id": f"TANK-R-{next(self._tank_seq):04d}",
+                    "mass_co2_kg": 5000.0,
+                    "pressure_psi": 2950.0,
+                    "sealed": True,
+                    "origin": event["source_id"],
+                    "timestamp": self.timestamp(),
+                }
+                self.bus.publish("tank_ready", tank)
+                await self.post("/capture/tank_ready", tank)
+            self.log(f"[Compressor] sealed {tank['tank_id']} from {tank['origin']}")
+
+    async def hauler(self, sub, stats):
+        """Consume tank_ready, drive to the nearest rig on the network, emit delivered_to_port"""
+        while True:
+            tank = (await sub.get())["payload"]
+            with stats.busy():
+                vehicle = f"HV-TRUCK-{next(self._vehicle_seq)}"
+                try:
+                    rig, travel_time = self.network.nearest(tank["origin"], "rig")
+                except KeyError:
+                    self.log(f"[Hauler] {tank['origin']} is not on the road network; dropping {tank['tank_id']}")
+                    continue
+                if rig is None:
+                    self.log(f"[Hauler] no open route from {tank['origin']} to a rig; dropping {tank['tank_id']}")
+                    continue
+                self.log(f"[Hauler] assigned {vehicle} for {tank['tank_id']} from {tank['origin']} to {rig}")
+                await self.sleep(travel_time)
+                arrival_evt = {
+                    "manifest_id": f"MAN-{tank['tank_id']}",
+                    "tank_id": tank["tank_id"],
+                    "assigned_vehicle": vehicle,
+                    "from": tank["origin"],
+                    "to": rig,
+                    "eta": None,
+                }
+                self.bus.publish("delivered_to_port", arrival_evt)
+            self.log(f"[Hauler] delivered {arrival_evt['tank_id']} to port via {vehicle}")
+
+    async def geologist(self, sub, stats):
+        """Consume delivered_to_port, pick the well with most headroom, emit injection_report or guardian_alert"""
+        while True:
+            manifest = (await sub.get())["payload"]
+            with stats.busy():
+                self.log(f"[Geologist] analyzing {manifest['tank_id']} for injection")
+                await self.sleep(self.analysis_time)
+                mass_kg = 5000.0
+                # no await between select and inject, so pooled geologists can't race
+                now = self.clock.now()
+                well = self.reservoir.select(mass_kg, now)
+                if well is None:
+                    alert = {
+                        "tank_id": manifest["tank_id"],
+                        "reason": "no well below its safe pressure limit",
+                        "timestamp": self.timestamp(),
+                    }
+                    self.bus.publish("guardian_alert", alert)
+                    continue
+                self.reservoir.inject(well, mass_kg, now)
+                injection = {
+                    "well_id": self.reservoir.well_ids[well],
+                    "tank_id": manifest["tank_id"],
+                    "status": "injected",
+                    "mass_tonnes": mass_kg / 1000.0,
+                    "timestamp": self.timestamp(),
+                }
+                self.bus.publish("injection_report", injection)
+            self.log(f"[Geologist] injection complete for {manifest['tank_id']} into {injection['well_id']}")
+
+    async def guardian(self, sub):
+        """Monitor for injection reports and guardian alerts; escalate if needed"""
+        while True:
+            item = await sub.get()
+            if item["type"] == "injection_report":
+                self.log(f"[Guardian] injection_report OK for {item['payload']['tank_id']}")
+            elif item["type"] == "guardian_alert":
+                # alerts are always shown, even in quiet mode
+                print(f"[Guardian] ALERT -> {item['payload']}")
+
+    async def report_stats(self, interval):
+        while True:
+            await self.sleep(interval)
+            self.print_stats()
+
+    def print_stats(self):
+        for stats in self.stats.values():
+            print(f"[Stats] {format_snapshot(stats.snapshot())}")
+        print(f"[Stats] bus published={self.bus.published} http_errors={self.http_errors}")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def run(self, duration=None, stats_interval=0):
+        """Run every agent until cancelled, or for `duration` simulated seconds."""
+        # Subscribe before any producer starts so no early event is published unrouted
+        subs = {
+            "compressor": self.bus.subscribe("pollution_event"),
+            "hauler": self.bus.subscribe("tank_ready"),
+            "geologist": self.bus.subscribe("delivered_to_port"),
+        }
+        guard_sub = self.bus.subscribe("injection_report", "guardian_alert")
+        workers = {"compressor": self.compressor, "hauler": self.hauler, "geologist": self.geologist}
+
+        async with httpx.AsyncClient(base_url=API_BASE, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT) as client:
+            self.client = client
+            self._http_slots = asyncio.Semaphore(HTTP_LIMITS.max_connections)
+            try:
+                # timeout (or outside cancellation) cancels the group, which cancels every agent
+                timeout = None if duration is None else duration / self.clock.scale
+                async with asyncio.timeout(timeout), asyncio.TaskGroup() as tg:
+                    for source_id in self.sources:
+                        tg.create_task(self.sentinel(source_id), name=f"Sentinel-{source_id}")
+                    for stage, worker in workers.items():
+                        stats = self.stats[stage] = StageStats(stage, self.workers[stage], subs[stage],
+                                                               clock=self.clock.now)
+                        for n in range(self.workers[stage]):
+                            tg.create_task(worker(subs[stage], stats), name=f"{stage.capitalize()}-{n + 1}")
+                    tg.create_task(self.guardian(guard_sub), name="Guardian")
+                    if stats_interval:
+                        tg.create_task(self.report_stats(stats_interval), name="Stats")
+            except TimeoutError:
+                pass
+            finally:
+                self.client = None
+
+
+def parse_sources(value):
+    """`--sources 500` generates synthetic ids; otherwise a comma-separated list."""
+    if value.isdigit():
+        return [f"source-{n:05d}" for n in range(int(value))]
+    return [s.strip() for s in value.split(",") if s.strip()]
+
+
+def main():
+    defaults = stage_workers_from_env()
+    parser = argparse.ArgumentParser(description="Asyncio CCS agent runner")
+    parser.add_argument("--sources", default=os.environ.get("CCS_SOURCES", ",".join(DEFAULT_SOURCES)),
+                        help="comma-separated source ids, or a count of synthetic sources")
+    parser.add_argument("--compressors", type=int, default=defaults["compressor"])
+    parser.add_argument("--haulers", type=int, default=defaults["hauler"])
+    parser.add_argument("--geologists", type=int, default=defaults["geologist"])
+    parser.add_argument("--interval", type=float, default=6, help="seconds between readings per source")
+    parser.add_argument("--duration", type=float, default=None, help="stop after N simulated seconds")
+    parser.add_argument("--clock", default=None, help="realtime or a speed-up such as 100x (default: CCS_CLOCK)")
+    parser.add_argument("--stats-interval", type=float, default=float(os.environ.get("CCS_STATS_INTERVAL", 30)))
+    parser.add_argument("--quiet", action="store_true", help="only print stats and alerts")
+    args = parser.parse_args()
+
+    runtime = AsyncAgentRuntime(
+        sources=parse_sources(args.sources),
+        workers={"compressor": args.compressors, "hauler": args.haulers, "geologist": args.geologists},
+        sentinel_interval=args.interval,
+        quiet=args.quiet,
+        clock=make_clock(args.clock),
+    )
+    print(f"Starting async agent runner with {len(runtime.sources)} source(s). Press Ctrl+C to stop.")
+    try:
+        asyncio.run(runtime.run(duration=args.duration, stats_interval=args.stats_interval))
+    except KeyboardInterrupt:
+        print("Shutdown requested. Agents cancelled.")
+    runtime.print_stats()
+    print("Agents stopped.")
+
+
+if __name__ == "__main__":
+    main()
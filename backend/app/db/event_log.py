@@ -0,0 +1,317 @@
+"""
+Segmented append-only event log for the backend event store.
+
+Layout on disk (one directory per log):
+
+    00000000000000000000.log   records with offsets 0 .. n-1
+    00000000000000001234.log   records starting at offset 1234 (name = base offset)
+    ...
+
+Each record is framed as
+
+    [u32 length][u32 crc32][length bytes of JSON]
+
+and gets a monotonically increasing integer offset. Every segment keeps a
+sparse in-memory index (the byte position of every `index_interval`-th
+record), so RAM grows with segments/interval rather than with the number of
+events. Reads go through read-only mmaps of the segment files; appends are
+plain buffered writes to the active segment.
+
+On open the directory is scanned and the index rebuilt; a torn or corrupt
+tail (e.g. a crash mid-write) is truncated back to the last valid record.
+If that leaves a gap before the next segment, every segment after the gap
+is renamed to `*.log.corrupt` and the log continues from the last valid
+record, so new appends never share a file or an offset with stale data.
+When the active segment reaches `segment_bytes` a new one is started, and the
+oldest segments are deleted once the log exceeds `retention_bytes`.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from array import array
+
+HEADER = struct.Struct(">II")  # length, crc32
+SEGMENT_SUFFIX = ".log"
+QUARANTINE_SUFFIX = ".corrupt"
+
+
+class _Segment:
+    def __init__(self, directory, base_offset):
+        self.base_offset = base_offset
+        self.path = os.path.join(directory, f"{base_offset:020d}{SEGMENT_SUFFIX}")
+        self.count = 0
+        self.size = 0
+        self.positions = array("Q")  # byte position of every index_interval-th record
+        self._file = None
+        self._map = None
+        self._map_size = 0
+
+    @property
+    def next_offset(self):
+        return self.base_offset + self.count
+
+    def open_for_append(self):
+        if self._file is None:
+            self._file = open(self.path, "ab")
+
+    def view(self):
+        """Read-only mmap covering everything written so far (remapped as the segment grows)."""
+        if self.size == 0:
+            return None
+        if self._map is None or self._map_size < self.size:
+            if self._file is not None:
+                self._file.flush()
+            self.close_map()
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._map_size = len(self._map)
+        return self._map
+
+    def close_map(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._map_size = 0
+
+    def close(self):
+        self.close_map()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class EventLog:
+    """Append-only, segmented, restart-safe log of JSON-serializable records."""
+
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024, retention_bytes=None,
+                 index_interval=64, fsync=False):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.retention_bytes = retention_bytes
+        self.index_interval = index_interval
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._segments = []
+        self._bases = []  # base offsets, parallel to _segments, for bisect
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+    def _recover(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(SEGMENT_SUFFIX))
+        for i, name in enumerate(names):
+            segment = _Segment(self.directory, int(name[:-len(SEGMENT_SUFFIX)]))
+            if self._segments and segment.base_offset != self._segments[-1].next_offset:
+                # a gap means the previous segment lost its tail; later data can't be
+                # trusted, and must not be reopened when the log rolls past the gap
+                for stale in names[i:]:
+                    self._quarantine(os.path.join(self.directory, stale))
+                break
+            self._scan(segment)
+            self._segments.append(segment)
+            self._bases.append(segment.base_offset)
+        if not self._segments:
+            self._roll(0)
+        self._segments[-1].open_for_append()
+        self._enforce_retention()
+
+    @staticmethod
+    def _quarantine(path):
+        target = path + QUARANTINE_SUFFIX
+        n = 1
+        while os.path.exists(target):
+            target = f"{path}.{n}{QUARANTINE_SUFFIX}"
+            n += 1
+        os.rename(path, target)
+
+    def _scan(self, segment):
+        """Rebuild a segment's index, truncating at the first invalid record."""
+        file_size = os.path.getsize(segment.path)
+        pos = 0
+        if file_size:
+            with open(segment.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                while pos + HEADER.size <= file_size:
+                    length, crc = HEADER.unpack_from(view, pos)
+                    end = pos + HEADER.size + length
+                    if end > file_size or zlib.crc32(view[pos + HEADER.size:end]) != crc:
+                        break
+                    if segment.count % self.index_interval == 0:
+                        segment.positions.append(pos)
+                    segment.count += 1
+                    pos = end
+        if pos != file_size:
+            with open(segment.path, "r+b") as f:
+                f.truncate(pos)
+        segment.size = pos
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def _roll(self, base_offset):
+        if self._segments:
+            active = self._segments[-1]
+            if active._file is not None:
+                active._file.flush()
+                if self.fsync:
+                    os.fsync(active._file.fileno())
+                active._file.close()
+                active._file = None
+        segment = _Segment(self.directory, base_offset)
+        if os.path.exists(segment.path) and os.path.getsize(segment.path):
+            raise RuntimeError(f"Refusing to append to existing non-empty segment {segment.path}")
+        open(segment.path, "ab").close()
+        segment.open_for_append()
+        self._segments.append(segment)
+        self._bases.append(base_offset)
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        if self.retention_bytes is None:
+            return
+        total = sum(s.size for s in self._segments)
+        while len(self._segments) > 1 and total > self.retention_bytes:
+            oldest = self._segments.pop(0)
+            self._bases.pop(0)
+            total -= oldest.size
+            oldest.close()
+            os.remove(oldest.path)
+
+    def append(self, record):
+        """Append one record and return its offset."""
+        return self.append_many([record])[0]
+
+    def append_many(self, records):
+        """Append records as one contiguous write; return (first_offset, last_offset)."""
+        frames = []
+        for record in records:
+            body = json.dumps(record, separators=(",", ":")).encode("utf-8")
+            frames.append(HEADER.pack(len(body), zlib.crc32(body)))
+            frames.append(body)
+        if not frames:
+            raise ValueError("append_many() needs at least one record")
+        blob = b"".join(frames)
+        with self._lock:
+            active = self._segments[-1]
+            if active.count and active.size + len(blob) > self.segment_bytes:
+                self._roll(active.next_offset)
+                active = self._segments[-1]
+            first = active.next_offset
+            # index entries for the new records; applied only once the write succeeded
+            positions = []
+            count = active.count
+            pos = active.size
+            for body in frames[1::2]:
+                if count % self.index_interval == 0:
+                    positions.append(pos)
+                count += 1
+                pos += HEADER.size + len(body)
+            try:
+                active._file.write(blob)
+                active._file.flush()
+            except BaseException:
+                self._discard_tail(active)
+                raise
+            active.positions.extend(positions)
+            active.count = count
+            active.size = pos
+            last = active.next_offset - 1
+            # fsync outside the lock so readers never wait on the disk
+            fd = os.dup(active._file.fileno()) if self.fsync else None
+        if fd is not None:
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        return first, last
+
+    def _discard_tail(self, segment):
+        """Cut a failed write back off the active segment and reopen it at `size`."""
+        try:
+            segment._file.close()  # flushes again; may fail the same way
+        except OSError:
+            pass
+        segment._file = None
+        segment.close_map()
+        with open(segment.path, "r+b") as f:
+            f.truncate(segment.size)
+        segment.open_for_append()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    @property
+    def start_offset(self):
+        """Oldest offset still retained."""
+        return self._segments[0].base_offset
+
+    @property
+    def end_offset(self):
+        """Offset the next appended record will get."""
+        return self._segments[-1].next_offset
+
+    def __len__(self):
+        return self.end_offset - self.start_offset
+
+    def read(self, offset, limit):
+        """Return up to `limit` (offset, record) pairs starting at `offset`.
+
+        Offsets older than the retention window are clamped to start_offset.
+        """
+        with self._lock:
+            offset = max(offset, self.start_offset)
+            results = []
+            idx = bisect.bisect_right(self._bases, offset) - 1
+            while idx < len(self._segments) and len(results) < limit:
+                segment = self._segments[idx]
+                if offset < segment.next_offset:
+                    self._read_segment(segment, offset, limit - len(results), results)
+                    offset = segment.next_offset
+                idx += 1
+            return results
+
+    def _read_segment(self, segment, offset, limit, out):
+        view = segment.view()
+        if view is None:
+            return
+        rel = offset - segment.base_offset
+        pos = segment.positions[rel // self.index_interval]
+        # skip forward from the nearest indexed record
+        for _ in range(rel % self.index_interval):
+            length, _crc = HEADER.unpack_from(view, pos)
+            pos += HEADER.size + length
+        end_rel = min(segment.count, rel + limit)
+        for n in range(rel, end_rel):
+            length, _crc = HEADER.unpack_from(view, pos)
+            start = pos + HEADER.size
+            out.append((segment.base_offset + n, json.loads(view[start:start + length])))
+            pos = start + length
+
+    # ------------------------------------------------------------------
+    # Named consumer positions
+    # ------------------------------------------------------------------
+    def load_cursor(self, name, default=None):
+        """Return a consumer's saved offset, or `default` (start_offset) if none."""
+        try:
+            with open(os.path.join(self.directory, f"{name}.cursor")) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return self.start_offset if default is None else default
+
+    def save_cursor(self, name, offset):
+        path = os.path.join(self.directory, f"{name}.cursor")
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(str(offset))
+        os.replace(tmp, path)
+
+    def close(self):
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
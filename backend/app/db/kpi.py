@@ -0,0 +1,243 @@
+"""
+Incrementally maintained KPI rollups over the ingested event stream.
+
+Every ingested record is folded into per-hour and per-day buckets as it is
+appended to the event log, so serving the KPIs never touches raw events:
+
+    captured_t   tonnes of CO2 sealed into tanks, per source (tank_ready)
+    injected_t   tonnes injected, per well (injection_report, status "injected")
+    alerts       guardian alerts, per severity (guardian_alert)
+
+Each bucket holds (sum, count). Updating costs O(1) per record and
+resolution; query() with `since` costs O(series x buckets in the range),
+independent of how many events went into them. Old buckets are pruned per
+series once it holds more than the resolution's retention.
+
+State is a few dicts of floats. `save()` writes it, together with the log
+offset it covers, to a JSON snapshot next to the log; on start `load()`
+reads the snapshot and the caller replays the log from `offset` onwards,
+so restarts are cheap and no event is counted twice. A snapshot that is
+ahead of the log (the log lost its tail) is discarded by `replay()` and
+the rollups are rebuilt from the start of the log.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+# resolution -> (bucket width in seconds, buckets kept per series)
+RESOLUTIONS = {
+    "hour": (3600, 24 * 14),
+    "day": (86400, 366 * 2),
+}
+
+# metric -> (event type, what the series are keyed by)
+METRICS = {
+    "captured_t": ("tank_ready", "source"),
+    "injected_t": ("injection_report", "well"),
+    "alerts": ("guardian_alert", "severity"),
+}
+_BY_TYPE = {event_type: metric for metric, (event_type, _by) in METRICS.items()}
+
+INJECTED_STATUSES = ("injected", "success")
+
+
+def record_time(record):
+    """Event time of a log record in epoch seconds (the record's, else its payload's, else now)."""
+    for ts in (record.get("timestamp"), (record.get("payload") or {}).get("timestamp")):
+        if not ts:
+            continue
+        try:
+            return float(ts)
+        except (TypeError, ValueError):
+            pass
+        try:
+            parsed = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+        except ValueError:
+            continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return datetime.now(timezone.utc).timestamp()
+
+
+def measure(record):
+    """(metric, series key, value) for a record that feeds a KPI, else None."""
+    metric = _BY_TYPE.get(record.get("type"))
+    if metric is None:
+        return None
+    payload = record.get("payload") or {}
+    try:
+        if metric == "captured_t":
+            return metric, str(payload.get("origin") or "unknown"), float(payload.get("mass_co2_kg") or 0) / 1000.0
+        if metric == "injected_t":
+            if str(payload.get("status", "")).lower() not in INJECTED_STATUSES:
+                return None
+            return metric, str(payload.get("well_id") or "unknown"), float(payload.get("mass_tonnes") or 0)
+    except (TypeError, ValueError):
+        return None
+    severity = payload.get("severity") or payload.get("alert_level") or "unknown"
+    return metric, str(severity).lower(), 1.0
+
+
+class KpiRollup:
+    """Hourly and daily (sum, count) buckets per metric and series key."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # one snapshot write at a time
+        self._reset()
+        self.applied = 0   # records that fed a KPI since start
+
+    def _reset(self):
+        # resolution -> metric -> key -> {bucket start: [sum, count]}
+        self._buckets = {res: {metric: {} for metric in METRICS} for res in RESOLUTIONS}
+        # metric -> key -> [sum, count] over everything ever applied
+        self._totals = {metric: {} for metric in METRICS}
+        self._latest = dict.fromkeys(RESOLUTIONS)  # newest bucket start per resolution
+        self.offset = 0    # log offset of the next record to apply
+
+    def apply(self, record, offset=None):
+        """Fold one event-log record into the rollups (offset: its log offset)."""
+        measured = measure(record)
+        with self._lock:
+            if offset is not None:
+                if offset < self.offset:
+                    return  # already covered by the snapshot
+                self.offset = offset + 1
+            if measured is None:
+                return
+            metric, key, value = measured
+            t = record_time(record)
+            for res, (width, keep) in RESOLUTIONS.items():
+                series = self._buckets[res][metric].setdefault(key, {})
+                start = int(t // width) * width
+                if self._latest[res] is None or start > self._latest[res]:
+                    self._latest[res] = start
+                bucket = series.get(start)
+                if bucket is None:
+                    bucket = series[start] = [0.0, 0]
+                    if len(series) > keep:
+                        del series[min(series)]
+                bucket[0] += value
+                bucket[1] += 1
+            total = self._totals[metric].setdefault(key, [0.0, 0])
+            total[0] += value
+            total[1] += 1
+            self.applied += 1
+
+    def query(self, resolution="hour", since=None, until=None, metrics=None):
+        """Buckets with since <= start < until (epoch seconds), oldest first, plus all-time totals."""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution {resolution!r}; expected one of {tuple(RESOLUTIONS)}")
+        metrics = tuple(metrics or METRICS)
+        for metric in metrics:
+            if metric not in METRICS:
+                raise ValueError(f"Unknown metric {metric!r}; expected one of {tuple(METRICS)}")
+        width, keep = RESOLUTIONS[resolution]
+        out = {}
+        with self._lock:
+            latest = self._latest[resolution]
+            if since is not None and latest is not None:
+                # walk the requested bucket starts rather than every retained bucket
+                first = -(-int(since) // width) * width
+                end = latest + width if until is None else min(until, latest + width)
+                starts = range(first, int(end), width)
+                if len(starts) > keep:
+                    starts = None  # wider than retention: cheaper to scan what is kept
+            else:
+                starts = None
+            lo = -float("inf") if since is None else since
+            hi = float("inf") if until is None else until
+            for metric in metrics:
+                series = {}
+                for key, buckets in self._buckets[resolution][metric].items():
+                    if starts is not None:
+                        found = ((start, buckets.get(start)) for start in starts)
+                        selected = [(start, bucket) for start, bucket in found if bucket is not None]
+                    else:
+                        selected = [(start, bucket) for start, bucket in sorted(buckets.items())
+                                    if lo <= start < hi]
+                    points = [{"start": start, "value": round(total, 6), "count": count}
+                              for start, (total, count) in selected]
+                    if points:
+                        series[key] = points
+                totals = {key: {"value": round(total, 6), "count": count}
+                          for key, (total, count) in self._totals[metric].items()}
+                out[metric] = {"by": METRICS[metric][1], "series": series, "totals": totals}
+        return {"resolution": resolution, "bucket_seconds": width, "offset": self.offset, "metrics": out}
+
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+    def save(self):
+        """Write the rollups and the offset they cover to `path` (atomically)."""
+        if not self.path:
+            return
+        with self._save_lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        with self._lock:
+            state = {
+                "offset": self.offset,
+                "buckets": {res: {metric: {key: [[start, *bucket] for start, bucket in buckets.items()]
+                                           for key, buckets in by_key.items()}
+                                  for metric, by_key in by_metric.items()}
+                            for res, by_metric in self._buckets.items()},
+                "totals": self._totals,
+            }
+            body = json.dumps(state, separators=(",", ":"))
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(body)
+        os.replace(tmp, self.path)
+
+    def load(self):
+        """Restore from `path` if a snapshot exists; return the offset to replay the log from."""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError, TypeError):
+            return self.offset
+        with self._lock:
+            for res, by_metric in state.get("buckets", {}).items():
+                if res not in RESOLUTIONS:
+                    continue
+                for metric, by_key in by_metric.items():
+                    if metric in METRICS:
+                        self._buckets[res][metric] = {
+                            key: {int(start): [float(total), int(count)] for start, total, count in rows}
+                            for key, rows in by_key.items()}
+            for metric, by_key in state.get("totals", {}).items():
+                if metric in METRICS:
+                    self._totals[metric] = {key: [float(t), int(c)] for key, (t, c) in by_key.items()}
+            for res in RESOLUTIONS:
+                starts = [start for by_key in self._buckets[res].values()
+                          for buckets in by_key.values() for start in buckets]
+                self._latest[res] = max(starts, default=None)
+            self.offset = int(state.get("offset", 0))
+        return self.offset
+
+    def replay(self, log, batch=10000):
+        """Apply every record of `log` from the current offset to its end.
+
+        A snapshot covering offsets the log no longer has (it lost its tail)
+        would make apply() skip new records until the log caught up, so it is
+        discarded and everything is rebuilt from the start of the log.
+        """
+        with self._lock:
+            if self.offset > log.end_offset:
+                self._reset()
+        offset = max(self.offset, log.start_offset)
+        while offset < log.end_offset:
+            records = log.read(offset, batch)
+            if not records:
+                break
+            for off, record in records:
+                self.apply(record, off)
+            offset = records[-1][0] + 1
+        with self._lock:
+            self.offset = max(self.offset, log.end_offset)
@@ -1,22 +1,106 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-from collections import deque
+from fastapi import FastAPI, HTTPException, Request, Header, Query
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import List, Dict, Any, Literal, Optional
+from datetime import datetime, timezone
+import asyncio
+import json
+import os
+import threading
 import time
 
+from .db.event_log import EventLog
+from .db.kpi import KpiRollup, METRICS, RESOLUTIONS
+
 app = FastAPI(title='Pollutant Absorber + Carbon Capture API')
 
-# In-memory event store (acting as a queue)
-EVENT_QUEUE = deque(maxlen=1000)
+# Durable event store: segmented append-only log on disk (see db/event_log.py)
+EVENT_LOG = EventLog(
+    os.environ.get('CCS_EVENT_LOG_DIR', './data/event_log'),
+    segment_bytes=int(os.environ.get('CCS_EVENT_LOG_SEGMENT_BYTES', 64 * 1024 * 1024)),
+    retention_bytes=int(os.environ['CCS_EVENT_LOG_RETENTION_BYTES']) if os.environ.get('CCS_EVENT_LOG_RETENTION_BYTES') else None,
+    fsync=os.environ.get('CCS_EVENT_LOG_FSYNC', '0') == '1',
+)
+
+# KPI rollups, updated on every ingest; restored from their snapshot plus
+# whatever the log gained since it was written
+KPI_ROLLUP = KpiRollup(os.path.join(EVENT_LOG.directory, 'kpi_rollup.json'))
+KPI_ROLLUP.load()
+KPI_ROLLUP.replay(EVENT_LOG)
+KPI_SNAPSHOT_EVERY = int(os.environ.get('CCS_KPI_SNAPSHOT_EVERY', 10000))  # records between snapshots
+_kpi_saved_at = KPI_ROLLUP.offset
+
+def _update_kpis(records, first_offset) -> bool:
+    """Apply records to the rollups; True when a snapshot is due."""
+    global _kpi_saved_at
+    for i, record in enumerate(records):
+        KPI_ROLLUP.apply(record, first_offset + i)
+    if KPI_ROLLUP.offset - _kpi_saved_at >= KPI_SNAPSHOT_EVERY:
+        _kpi_saved_at = KPI_ROLLUP.offset
+        return True
+    return False
+
+# Appends (and their fsync with CCS_EVENT_LOG_FSYNC=1) run in a worker thread
+# so they never stall the event loop; the lock keeps KPI updates in offset order
+_append_lock = threading.Lock()
+
+def _append(records):
+    with _append_lock:
+        first, last = EVENT_LOG.append_many(records)
+        snapshot_due = _update_kpis(records, first)
+    if snapshot_due:
+        # still on the worker thread, but no longer holding up other appends
+        KPI_ROLLUP.save()
+    return first, last
+
+# /debug/drain_events hands out each event once; its position survives restarts
+DRAIN_CURSOR = 'drain'
+_drain_lock = threading.Lock()
+
+def _undrained() -> int:
+    return EVENT_LOG.end_offset - max(EVENT_LOG.load_cursor(DRAIN_CURSOR), EVENT_LOG.start_offset)
+
+class LogNotifier:
+    """Wakes /events/stream clients when the log grows. Event-loop only."""
+
+    def __init__(self):
+        self._changed = asyncio.Event()
+
+    def notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+LOG_NOTIFIER = LogNotifier()
+STREAM_HEARTBEAT_S = 15.0
+STREAM_RETRY_MS = 3000
 
 class Event(BaseModel):
     type: str
     payload: Dict[str, Any]
     timestamp: Optional[str] = None
 
+class LoggedEvent(Event):
+    offset: int
+
 class DrainResponse(BaseModel):
     drained: int
-    events: List[Event]
+    events: List[LoggedEvent]
+    next_after: int      # pass back as ?after= to continue from here
+    end_offset: int      # offset the next ingested event will get
+
+# Validates a whole batch in one call; error locations carry the event index
+EVENT_LIST = TypeAdapter(List[Event])
+MAX_BATCH_SIZE = 10000
+# bodies past this are refused before they are read or parsed
+MAX_BATCH_BYTES = int(os.environ.get('CCS_MAX_BATCH_BYTES', 16 * 1024 * 1024))
 
 @app.get('/')
 def root():
@@ -27,18 +111,150 @@ async def ingest_event(event: Event):
     """Receive an event from the simulation agents."""
     if not event.timestamp:
         event.timestamp = str(time.time())
-    EVENT_QUEUE.append(event)
-    return {"status": "received", "queue_size": len(EVENT_QUEUE)}
+    offset, _last = await asyncio.to_thread(_append, [event.model_dump()])
+    LOG_NOTIFIER.notify()
+    return {"status": "received", "offset": offset, "queue_size": _undrained()}
+
+def _too_large(what: str) -> HTTPException:
+    return HTTPException(status_code=413, detail=f'Batch too large ({what})')
+
+async def _read_batch_body(request: Request) -> bytes:
+    declared = request.headers.get('content-length', '')
+    if declared.isdigit() and int(declared) > MAX_BATCH_BYTES:
+        raise _too_large(f'{declared} > {MAX_BATCH_BYTES} bytes')
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BATCH_BYTES:
+            raise _too_large(f'more than {MAX_BATCH_BYTES} bytes')
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+@app.post('/events/ingest/batch')
+async def ingest_events_batch(request: Request):
+    """Receive many events in one request.
+
+    Body is a JSON array of events, or NDJSON (one event per line) when sent
+    with an application/x-ndjson content type. The batch is validated as a
+    whole and appended only if every event is valid. Bodies over
+    MAX_BATCH_BYTES (CCS_MAX_BATCH_BYTES) and NDJSON with more than
+    MAX_BATCH_SIZE lines get a 413 before any event is validated.
+    """
+    body = await _read_batch_body(request)
+    content_type = request.headers.get('content-type', '')
+    if 'ndjson' in content_type or 'jsonlines' in content_type:
+        lines = [line for line in body.splitlines() if line.strip()]
+        if len(lines) > MAX_BATCH_SIZE:
+            raise _too_large(f'{len(lines)} > {MAX_BATCH_SIZE} events')
+        body = b'[' + b','.join(lines) + b']'
+    try:
+        events = EVENT_LIST.validate_json(body)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors(include_url=False))
+    if len(events) > MAX_BATCH_SIZE:
+        raise _too_large(f'{len(events)} > {MAX_BATCH_SIZE} events')
+
+    now = str(time.time())
+    for event in events:
+        if not event.timestamp:
+            event.timestamp = now
+    records = [event.model_dump() for event in events]
+    first, last = await asyncio.to_thread(_append, records)
+    LOG_NOTIFIER.notify()
+    return {"status": "received", "accepted": len(events), "first_offset": first,
+            "last_offset": last, "queue_size": _undrained()}
+
+@app.get('/events/stream')
+async def stream_events(
+    after: Optional[int] = Query(None, description='resume after this offset'),
+    tail: int = Query(0, ge=0, le=10000, description='on a fresh connect, replay this many recent events'),
+    coalesce_ms: int = Query(100, ge=0, le=5000),
+    max_batch: int = Query(500, ge=1, le=5000),
+    last_event_id: Optional[str] = Header(None),
+):
+    """Server-sent events: push log records to the client as they are ingested.
+
+    Each SSE message (event name `events`) carries a JSON array of records
+    with their `offset`; the message id is the last offset, so a browser
+    EventSource resumes from where it left off via Last-Event-ID. Records that
+    arrive within `coalesce_ms` of each other are sent as one message.
+    """
+    if last_event_id is not None and last_event_id.isdigit():
+        offset = int(last_event_id) + 1
+    elif after is not None:
+        offset = after + 1
+    else:
+        offset = max(EVENT_LOG.end_offset - tail, EVENT_LOG.start_offset)
+    # a cursor from before a log reset must not wait for offsets that may never come
+    offset = min(offset, EVENT_LOG.end_offset)
+
+    async def messages():
+        nonlocal offset
+        yield f'retry: {STREAM_RETRY_MS}\n\n'
+        while True:
+            if EVENT_LOG.end_offset <= offset:
+                if not await LOG_NOTIFIER.wait(STREAM_HEARTBEAT_S):
+                    yield ': keepalive\n\n'
+                    continue
+                if coalesce_ms:
+                    await asyncio.sleep(coalesce_ms / 1000)
+            records = EVENT_LOG.read(offset, max_batch)
+            if not records:
+                # requested offset fell out of retention; skip to what is left
+                offset = max(offset, EVENT_LOG.start_offset)
+                continue
+            offset = records[-1][0] + 1
+            data = json.dumps([dict(record, offset=off) for off, record in records], separators=(',', ':'))
+            yield f'id: {offset - 1}\nevent: events\ndata: {data}\n\n'
+
+    return StreamingResponse(messages(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.get('/debug/drain_events', response_model=DrainResponse)
-async def drain_events(limit: int = 50):
-    """Return and remove events from the queue (simulating a stream)."""
-    events = []
-    count = 0
-    while EVENT_QUEUE and count < limit:
-        events.append(EVENT_QUEUE.popleft())
-        count += 1
-    return {"drained": count, "events": events}
+async def drain_events(limit: int = Query(50, ge=1, le=5000), after: Optional[int] = Query(None, ge=-1)):
+    """Return events from the log.
+
+    With `after=<offset>` this is a plain keyset read of the events with a
+    larger offset: nothing is mutated, each consumer keeps its own position
+    (`next_after`) and many readers can follow the log concurrently.
+    Without it, the legacy shared drain cursor is used and advanced, so each
+    event is handed out once across all such callers.
+    """
+    if after is not None:
+        records = EVENT_LOG.read(after + 1, limit)
+    else:
+        with _drain_lock:
+            after = EVENT_LOG.load_cursor(DRAIN_CURSOR) - 1
+            records = EVENT_LOG.read(after + 1, limit)
+            if records:
+                EVENT_LOG.save_cursor(DRAIN_CURSOR, records[-1][0] + 1)
+    events = [dict(record, offset=offset) for offset, record in records]
+    # offsets older than retention are skipped, so continue from what was actually read
+    next_after = records[-1][0] if records else max(after, EVENT_LOG.start_offset - 1)
+    return {"drained": len(events), "events": events, "next_after": next_after,
+            "end_offset": EVENT_LOG.end_offset}
+
+def _epoch(ts: Optional[datetime]) -> Optional[float]:
+    if ts is None:
+        return None
+    return (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).timestamp()
+
+@app.get('/kpi')
+async def kpi(resolution: Literal[tuple(RESOLUTIONS)] = 'hour',
+              since: Optional[datetime] = Query(None, description='first bucket start (UTC if no offset)'),
+              until: Optional[datetime] = Query(None, description='end of the range, exclusive'),
+              metric: Optional[List[Literal[tuple(METRICS)]]] = Query(None)):
+    """Tonnes captured per source, tonnes injected per well and alerts per severity, per hour or day.
+
+    Served from the rollups maintained at ingest, so the cost depends on the
+    number of buckets returned, not on the number of events behind them.
+    Bucket starts are epoch seconds.
+    """
+    return KPI_ROLLUP.query(resolution, _epoch(since), _epoch(until), metric)
+
+@app.on_event('shutdown')
+async def save_kpis():
+    await asyncio.to_thread(KPI_ROLLUP.save)
 
 # Health check
 @app.get('/health')
@@ -0,0 +1,104 @@
+"""
+Throughput benchmark: shared queue.Queue with requeue loop vs. TopicEventBus.
+
+The legacy bus is the pattern agent_runner.py used before event_bus.py: every
+consumer pulls from one queue.Queue and puts back anything that is not its
+type. The new bus routes each item straight to the subscription for its topic.
+
+Usage:
+    python benchmarks/bench_event_bus.py [--events 20000] [--repeat 3]
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from event_bus import TopicEventBus  # noqa: E402
+
+CONSUMER_TOPICS = ("pollution_event", "tank_ready", "delivered_to_port", "injection_report")
+
+
+def _expected_counts(n_events):
+    counts = dict.fromkeys(CONSUMER_TOPICS, 0)
+    for i in range(n_events):
+        counts[CONSUMER_TOPICS[i % len(CONSUMER_TOPICS)]] += 1
+    return counts
+
+
+def run_legacy(n_events):
+    """One shared queue; consumers requeue items of other types."""
+    bus = queue.Queue()
+    expected = _expected_counts(n_events)
+    requeues = [0]
+
+    def consumer(topic):
+        seen = 0
+        local_requeues = 0
+        while seen < expected[topic]:
+            item = bus.get()
+            if item["type"] != topic:
+                bus.put_nowait(item)
+                local_requeues += 1
+                continue
+            seen += 1
+        requeues[0] += local_requeues
+
+    threads = [threading.Thread(target=consumer, args=(t,), daemon=True) for t in CONSUMER_TOPICS]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for i in range(n_events):
+        topic = CONSUMER_TOPICS[i % len(CONSUMER_TOPICS)]
+        bus.put_nowait({"type": topic, "payload": {"seq": i}})
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, requeues[0]
+
+
+def run_topic_bus(n_events):
+    """TopicEventBus; each consumer blocks on its own subscription."""
+    bus = TopicEventBus()
+    expected = _expected_counts(n_events)
+    subs = {t: bus.subscribe(t) for t in CONSUMER_TOPICS}
+
+    def consumer(topic):
+        sub = subs[topic]
+        for _ in range(expected[topic]):
+            sub.get()
+
+    threads = [threading.Thread(target=consumer, args=(t,), daemon=True) for t in CONSUMER_TOPICS]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for i in range(n_events):
+        bus.publish(CONSUMER_TOPICS[i % len(CONSUMER_TOPICS)], {"seq": i})
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"events per run: {args.events}, consumers: {len(CONSUMER_TOPICS)}")
+    for name, fn in (("legacy queue.Queue + requeue", run_legacy), ("TopicEventBus", run_topic_bus)):
+        best = None
+        for _ in range(args.repeat):
+            elapsed, requeues = fn(args.events)
+            if best is None or elapsed < best[0]:
+                best = (elapsed, requeues)
+        elapsed, requeues = best
+        print(f"{name:32s} {args.events / elapsed:12,.0f} events/s  "
+              f"({elapsed * 1000:8.1f} ms, requeues={requeues})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Fleet throughput and truck queueing for the simpy model at different fleet sizes.
+
+One compressor per sector fills tanks from a shared pool; sealed tanks queue
+for a truck from the pool, travel offshore and are injected by one geologist.
+Sweeping the truck count shows where hauling stops being the bottleneck.
+
+Usage:
+    python benchmarks/bench_fleet.py [--ticks 500] [--sectors 200] [--tanks 400] [--trucks 10 50 100 200]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import simpy
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.simulation import WorldState  # noqa: E402
+from src.tools import CompressorTools, LogisticsTools, GeologistTools  # noqa: E402
+from src.agents import CompressorAgent, LogisticsAgent, GeologistAgent  # noqa: E402
+from src.telemetry import get_shipper  # noqa: E402
+
+
+def run(n_sectors, n_tanks, n_trucks, ticks, seed):
+    env = simpy.Environment()
+    world = WorldState(env, n_sectors=n_sectors, n_tanks=n_tanks, n_trucks=n_trucks,
+                       rng=np.random.default_rng(seed))
+    env.process(world.update_pollution())
+    compressor_tools = CompressorTools(world)
+    for i in range(n_sectors):
+        env.process(CompressorAgent(env, compressor_tools, world, name=f"Compressor-{i + 1}", sector=i).run())
+    env.process(LogisticsAgent(env, LogisticsTools(world), world).run())
+    env.process(GeologistAgent(env, GeologistTools(world), world).run())
+    start = time.perf_counter()
+    env.run(until=ticks)
+    return world.fleet_stats(), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--sectors", type=int, default=200)
+    parser.add_argument("--tanks", type=int, default=400)
+    parser.add_argument("--trucks", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    print(f"{args.sectors} compressors, {args.tanks} tanks, {args.ticks} ticks")
+    print(f"{'trucks':>7} {'trips':>7} {'injected t':>11} {'truck util':>11} {'wait avg':>9} "
+          f"{'queued':>7} {'wall s':>7}")
+    for n_trucks in args.trucks:
+        stats, wall = run(args.sectors, args.tanks, n_trucks, args.ticks, args.seed)
+        print(f"{n_trucks:>7} {stats['trips']:>7} {stats['co2_injected_kg'] / 1000:>11,.1f} "
+              f"{stats['truck_utilization']:>11.0%} {stats['truck_wait_avg']:>9.1f} "
+              f"{stats['tanks']['QUEUED']:>7} {wall:>7.2f}")
+    get_shipper().close(timeout=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Ingest throughput of POST /events/pollution and /capture/tank_ready.
+
+Compares the server's current handlers with the previous ones (rebuilt here
+as "legacy"), which let FastAPI json.loads the body into a dict, validated it
+into a model, then turned the model back into a dict with
+json.loads(event.json()) once for the buses and again for persistence.
+
+Requests go through the ASGI app in-process (httpx.ASGITransport), so the
+numbers are the server's own cost per request without sockets. Persistence
+runs against a throwaway SQLite file unless DATABASE_URL is set; the legacy
+handlers commit each pollution event inline, the current ones hand rows to
+server.DB_WRITER (see bench_ingest_latency.py for the effect on latency).
+Reported per mode:
+    req/s        wall-clock requests per second
+    cpu us/req   process CPU time per request
+    payload us   CPU per event for the body -> bus payload step alone
+
+Usage:
+    python benchmarks/bench_ingest.py [--requests 5000] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+import warnings
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+if not os.environ.get("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_ingest.db")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+import db  # noqa: E402
+import json_codec  # noqa: E402
+import models  # noqa: E402
+import server  # noqa: E402
+from crud import create_pollution_event  # noqa: E402
+from server import PollutionEvent, TankReady  # noqa: E402
+
+
+def legacy_app():
+    """The handlers as they were before validate-once."""
+    app = FastAPI()
+
+    @app.post("/events/pollution", status_code=202)
+    async def post_pollution(event: PollutionEvent):
+        payload = {"type": "pollution_event", "payload": json.loads(event.json())}
+        await server.event_bus.put(payload)
+        server.sync_event_bus.put_nowait(payload)
+        create_pollution_event(json.loads(event.json()))
+        return {"status": "accepted", "event_id": event.event_id}
+
+    @app.post("/capture/tank_ready", status_code=201)
+    async def post_tank_ready(tank: TankReady):
+        payload = {"type": "tank_ready", "payload": json.loads(tank.json())}
+        await server.event_bus.put(payload)
+        server.sync_event_bus.put_nowait(payload)
+        return {"status": "scheduled", "tank_id": tank.tank_id}
+
+    return app
+
+
+def make_bodies(n):
+    run = uuid.uuid4().hex[:8]
+    bodies = []
+    for i in range(n):
+        if i % 2:
+            bodies.append(("/capture/tank_ready", {
+                "tank_id": f"TANK-{run}-{i}", "mass_co2_kg": 5000.0, "pressure_psi": 2950.0,
+                "sealed": True, "origin": "refinery-koyali-01", "timestamp": "2025-01-01T00:00:00Z"}))
+        else:
+            bodies.append(("/events/pollution", {
+                "event_id": f"evt-{run}-{i}", "source_id": "refinery-koyali-01", "source_type": "point_source",
+                "species": {"NOx": 220, "CO2": 5000, "SO2": 35}, "units": {"NOx": "ppm", "CO2": "ppm", "SO2": "ppm"},
+                "timestamp": "2025-01-01T00:00:00Z", "confidence": 0.97, "feasibility_flag": True}))
+    return [(path, json_codec.dumps(body)) for path, body in bodies]
+
+
+async def post_all(app, bodies):
+    transport = httpx.ASGITransport(app=app)
+    headers = {"content-type": "application/json"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path, body in bodies:
+            response = await client.post(path, content=body, headers=headers)
+            if response.status_code >= 300:
+                raise RuntimeError(f"{path}: {response.status_code} {response.text}")
+
+
+def drain():
+    while not server.event_bus.empty():
+        server.event_bus.get_nowait()
+
+
+def run_requests(app, n):
+    bodies = make_bodies(n)
+    wall, cpu = time.perf_counter(), time.process_time()
+    asyncio.run(post_all(app, bodies))
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    drain()
+    return n / wall, cpu / n * 1e6
+
+
+def run_payload(mode, n):
+    """CPU per event for turning a request body into the bus payload(s)."""
+    bodies = [body for path, body in make_bodies(2 * n) if path == "/events/pollution"]
+    cpu = time.process_time()
+    for body in bodies:
+        if mode == "legacy":
+            event = PollutionEvent.model_validate(json.loads(body))
+            bus = json.loads(event.json())
+            row = json.loads(event.json())
+        else:
+            bus = row = json_codec.freeze(PollutionEvent.model_validate_json(body).model_dump())
+    return (time.process_time() - cpu) / len(bodies) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=DeprecationWarning)  # legacy .json()
+
+    models.Base.metadata.create_all(bind=db.get_engine())
+    server.DB_WRITER.start()  # normally started by the app's startup hook
+    apps = {"legacy": legacy_app(), "current": server.app}
+    run_requests(apps["current"], 200)  # warm up imports, pools and schema caches
+    run_requests(apps["legacy"], 200)
+
+    print(f"{args.requests} requests per run, best of {args.repeat}; JSON backend: {json_codec.BACKEND}")
+    print(f"{'mode':>8} {'req/s':>9} {'cpu us/req':>11} {'payload us':>11}")
+    for mode, app in apps.items():
+        rps, cpu = max(run_requests(app, args.requests) for _ in range(args.repeat))
+        payload = min(run_payload(mode, args.requests) for _ in range(args.repeat))
+        print(f"{mode:>8} {rps:>9,.0f} {cpu:>11.0f} {payload:>11.1f}")
+    server.DB_WRITER.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Ingest latency while the database is slow: inline commits vs server.DB_WRITER.
+
+`--clients` concurrent senders post pollution events and tank-ready
+notifications through the ASGI app in-process. Every SQL statement is
+delayed by `--db-ms` milliseconds (a sleep in a before_cursor_execute hook),
+standing in for a loaded or distant database:
+    inline   the previous handlers: create_pollution_event() commits on the
+             event loop, so every request queues behind each commit
+    writer   the current handlers: rows are buffered and committed in
+             batches by the BulkWriter's flusher thread
+
+Usage:
+    python benchmarks/bench_ingest_latency.py [--requests 2000] [--clients 16] [--db-ms 0 5 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+if not os.environ.get("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_latency.db")
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import db  # noqa: E402
+import models  # noqa: E402
+import server  # noqa: E402
+from bench_ingest import drain, legacy_app, make_bodies  # noqa: E402
+
+DB_DELAY = [0.0]
+
+
+def _slow_execute(conn, cursor, statement, parameters, context, executemany):
+    if DB_DELAY[0]:
+        time.sleep(DB_DELAY[0])
+
+
+async def send(app, bodies, clients):
+    transport = httpx.ASGITransport(app=app)
+    headers = {"content-type": "application/json"}
+    latencies = []
+
+    async def sender(mine):
+        for path, body in mine:
+            start = time.perf_counter()
+            response = await client.post(path, content=body, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 300:
+                raise RuntimeError(f"{path}: {response.status_code} {response.text}")
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(sender(bodies[i::clients]) for i in range(clients)))
+        elapsed = time.perf_counter() - start
+    return np.array(latencies) * 1e3, len(bodies) / elapsed
+
+
+def send_and_drain(app, bodies, clients):
+    result = asyncio.run(send(app, bodies, clients))
+    drain()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--db-ms", type=float, nargs="+", default=[0, 5, 20])
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=DeprecationWarning)  # legacy .json()
+
+    engine = db.get_engine()
+    models.Base.metadata.create_all(bind=engine)
+    event.listen(engine, "before_cursor_execute", _slow_execute)
+    server.DB_WRITER.start()
+    apps = {"inline": legacy_app(), "writer": server.app}
+
+    print(f"{args.requests} requests from {args.clients} concurrent clients")
+    print(f"{'db ms':>6} {'mode':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for delay in args.db_ms:
+        DB_DELAY[0] = delay / 1000
+        for mode, app in apps.items():
+            # inline commits are one per pollution event; keep slow runs short
+            n = args.requests if mode == "writer" or not delay else min(args.requests, int(20000 / delay))
+            latencies, rps = send_and_drain(app, make_bodies(n), args.clients)
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(f"{delay:>6g} {mode:>7} {rps:>8,.0f} {p50:>8.2f} {p99:>8.2f} {latencies.max():>8.2f}")
+    DB_DELAY[0] = 0.0
+    server.DB_WRITER.close()
+    print(f"writer: {server.DB_WRITER.stats}")
+
+
+if __name__ == "__main__":
+    main()
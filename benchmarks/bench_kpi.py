@@ -0,0 +1,88 @@
+"""
+KPI cost: incremental rollups vs recomputing from raw events.
+
+Feeds `--events` synthetic tank_ready / injection_report / guardian_alert
+records (one per simulated minute, `--sources` sources, `--wells` wells)
+and compares, at several event counts:
+    apply     KpiRollup.apply() per record (the ingest-time cost)
+    rollup    KpiRollup.query() for the last 24 hourly buckets
+    rescan    the same answer computed from the raw records, as a client
+              pulling events would have to
+
+Usage:
+    python benchmarks/bench_kpi.py [--events 10000 100000 1000000] [--sources 50] [--wells 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.app.db.kpi import KpiRollup, measure, record_time  # noqa: E402
+
+START = 1_750_000_000
+
+
+def make_records(n, n_sources, n_wells, seed):
+    rng = random.Random(seed)
+    for i in range(n):
+        t = START + 60 * i
+        kind = i % 3
+        if kind == 0:
+            yield {"type": "tank_ready", "timestamp": t,
+                   "payload": {"origin": f"source-{rng.randrange(n_sources)}", "mass_co2_kg": 5000.0}}
+        elif kind == 1:
+            yield {"type": "injection_report", "timestamp": t,
+                   "payload": {"well_id": f"W-{rng.randrange(n_wells)}", "status": "injected", "mass_tonnes": 5.0}}
+        else:
+            yield {"type": "guardian_alert", "timestamp": t, "payload": {"severity": "low"}}
+
+
+def rescan(records, since):
+    out = {}
+    for record in records:
+        t = record_time(record)
+        if t < since:
+            continue
+        measured = measure(record)
+        if measured is None:
+            continue
+        metric, key, value = measured
+        bucket = int(t // 3600) * 3600
+        series = out.setdefault(metric, {}).setdefault(key, {})
+        series[bucket] = series.get(bucket, 0.0) + value
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--sources", type=int, default=50)
+    parser.add_argument("--wells", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'events':>9} {'apply us':>9} {'rollup ms':>10} {'rescan ms':>10}")
+    for n in args.events:
+        records = list(make_records(n, args.sources, args.wells, args.seed))
+        rollup = KpiRollup()
+        start = time.perf_counter()
+        for offset, record in enumerate(records):
+            rollup.apply(record, offset)
+        apply_us = (time.perf_counter() - start) / n * 1e6
+        since = START + 60 * n - 24 * 3600
+
+        start = time.perf_counter()
+        rollup.query("hour", since=since)
+        rollup_ms = (time.perf_counter() - start) * 1e3
+        start = time.perf_counter()
+        rescan(records, since)
+        rescan_ms = (time.perf_counter() - start) * 1e3
+        print(f"{n:>9,} {apply_us:>9.2f} {rollup_ms:>10.2f} {rescan_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Cost of routing dispatches on the road/sea network as it grows.
+
+Builds a random connected network of refineries, depots, ports and rigs and
+routes `--trucks` dispatches per tick (origin -> nearest rig, rig -> nearest
+depot), three ways:
+    cold       fresh shortest-path searches for every dispatch
+    cached     RoadNetwork's caches, never invalidated
+    congested  cached, with one congestion update (cache drop) per tick
+
+Usage:
+    python benchmarks/bench_network.py [--ticks 50] [--trucks 500] [--sources 100 1000 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.network import RoadNetwork  # noqa: E402
+
+
+def build(n_sources, seed):
+    rng = random.Random(seed)
+    net = RoadNetwork()
+    n_ports = max(2, n_sources // 50)
+    ports = [f"Port-{i}" for i in range(n_ports)]
+    depots = [f"Depot-{i}" for i in range(max(1, n_sources // 20))]
+    rigs = [f"Rig-{i}" for i in range(max(1, n_ports // 2))]
+    sources = [f"Refinery-{i}" for i in range(n_sources)]
+    for names, kind in ((ports, "port"), (depots, "depot"), (rigs, "rig"), (sources, "source")):
+        for name in names:
+            net.add_node(name, kind)
+    for a, b in zip(ports, ports[1:]):
+        net.add_edge(a, b, rng.uniform(2, 6))  # coastal road
+    for rig in rigs:
+        for port in rng.sample(ports, 2):
+            net.add_edge(port, rig, rng.uniform(1, 4), "sea")
+    for name in depots + sources:
+        for port in rng.sample(ports, 2):
+            net.add_edge(name, port, rng.uniform(1, 8))
+    return net, sources, ports
+
+
+def dispatch(net, origin):
+    rig, trip = net.nearest(origin, "rig")
+    _, back = net.nearest(rig, "depot")
+    return trip + back
+
+
+def run(mode, net, sources, ports, ticks, trucks, seed):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    searches = net.searches
+    for _ in range(ticks):
+        if mode == "congested":
+            i = rng.randrange(len(ports) - 1)
+            net.set_congestion(ports[i], ports[i + 1], rng.uniform(1, 3))
+        for _ in range(trucks):
+            if mode == "cold":
+                net._paths.clear()
+                net._nearest.clear()
+            dispatch(net, rng.choice(sources))
+    elapsed = time.perf_counter() - start
+    return elapsed / (ticks * trucks) * 1e6, net.searches - searches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--trucks", type=int, default=500)
+    parser.add_argument("--sources", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.trucks} dispatches/tick, {args.ticks} ticks")
+    print(f"{'sources':>8} {'mode':>10} {'us/dispatch':>12} {'searches':>9}")
+    for n_sources in args.sources:
+        for mode in ("cold", "cached", "congested"):
+            net, sources, ports = build(n_sources, args.seed)
+            # cold mode is slow on big networks; fewer ticks give the same per-dispatch cost
+            ticks = max(1, args.ticks // 10) if mode == "cold" else args.ticks
+            per_dispatch, searches = run(mode, net, sources, ports, ticks, args.trucks, args.seed)
+            print(f"{n_sources:>8} {mode:>10} {per_dispatch:>12.1f} {searches:>9,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Page latency of the /records read API: keyset pagination vs OFFSET.
+
+Fills pollution_events with `--rows` rows (spread over `--sources` sources
+and a year of timestamps) in a throwaway SQLite file, or DATABASE_URL when
+set, then times one page of `--limit` rows:
+    first       newest page, no filter
+    filtered    one source, inside a one-week window
+    deep        keyset: the page after a cursor half way down the table
+    offset      the same page with OFFSET (what a naive pager would do)
+
+and prints the query plans, which should be index range scans (no
+"SCAN pollution_events", no "USE TEMP B-TREE FOR ORDER BY").
+
+Usage:
+    python benchmarks/bench_queries.py [--rows 1000000] [--sources 200] [--limit 100]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+if not os.environ.get("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_queries.db")
+
+from sqlalchemy import insert, select, text  # noqa: E402
+
+import db  # noqa: E402
+import models  # noqa: E402
+import queries  # noqa: E402
+
+START = datetime(2025, 1, 1)
+
+
+def fill(n_rows, n_sources, seed):
+    rng = random.Random(seed)
+    table = models.PollutionEvent.__table__
+    step = 365 * 86400 / n_rows
+    batch = []
+    with db.get_engine().begin() as conn:
+        for i in range(n_rows):
+            ts = START + timedelta(seconds=int(i * step))
+            batch.append({"event_id": f"evt-{i}", "source_id": f"source-{rng.randrange(n_sources)}",
+                          "source_type": "point_source", "species": {"CO2": 5000}, "confidence": 0.9,
+                          "feasibility_flag": True, "timestamp": ts, "raw": None})
+            if len(batch) == 50000:
+                conn.execute(insert(table), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(table), batch)
+        if conn.dialect.name == "sqlite":
+            # stored as text in the server default's form (whole seconds)
+            conn.execute(text("UPDATE pollution_events SET timestamp = substr(timestamp, 1, 19)"))
+            conn.execute(text("ANALYZE"))
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def offset_page(offset, limit):
+    table = models.PollutionEvent.__table__
+    stmt = (select(table).order_by(table.c.timestamp.desc(), table.c.id.desc())
+            .offset(offset).limit(limit))
+    with db.get_session() as session:
+        return session.execute(stmt).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sources", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=db.get_engine())
+    start = time.perf_counter()
+    fill(args.rows, args.sources, args.seed)
+    print(f"{args.rows:,} rows loaded in {time.perf_counter() - start:.1f} s; {args.limit} rows per page")
+
+    with db.get_session() as session:
+        mid = session.execute(select(models.PollutionEvent.timestamp, models.PollutionEvent.id)
+                              .where(models.PollutionEvent.id == args.rows // 2)).one()
+    cursor = queries.encode_cursor(mid.timestamp, mid.id)
+    week = (START + timedelta(days=180), START + timedelta(days=187))
+    cases = {
+        "first": lambda: queries.list_records("pollution_event", limit=args.limit),
+        "filtered": lambda: queries.list_records("pollution_event", source_id="source-7", since=week[0],
+                                                 until=week[1], limit=args.limit),
+        "deep": lambda: queries.list_records("pollution_event", cursor=cursor, limit=args.limit),
+        "offset": lambda: offset_page(args.rows - args.rows // 2, args.limit),
+    }
+    for name, fn in cases.items():
+        print(f"  {name:<9} {timed(fn, args.repeat):8.3f} ms/page")
+
+    if db.get_engine().dialect.name == "sqlite":
+        print("query plans:")
+        plans = {
+            "filtered": "SELECT * FROM pollution_events WHERE source_id = 'source-7' AND timestamp >= '2025-06-30' "
+                        "AND timestamp < '2025-07-07' ORDER BY timestamp DESC, id DESC LIMIT 101",
+            "deep": "SELECT * FROM pollution_events WHERE (timestamp, id) < ('2025-07-02 12:00:00', 500000) "
+                    "ORDER BY timestamp DESC, id DESC LIMIT 101",
+        }
+        with db.get_engine().connect() as conn:
+            for name, sql in plans.items():
+                detail = [row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+                print(f"  {name:<9} {'; '.join(detail)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Choosing a safe well: the reservoir's headroom index vs a full scan.
+
+Each tick the reservoir relaxes once and `--arrivals` tanks each pick the
+well with the most headroom and inject into it:
+    scan    recompute every well's headroom and take argmax per arrival
+    index   Reservoir.select(): index head plus the few wells injected since
+
+Usage:
+    python benchmarks/bench_reservoir.py [--ticks 100] [--arrivals 50] [--wells 1000 10000 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.reservoir import Reservoir  # noqa: E402
+
+
+def build(n_wells, seed):
+    rng = np.random.default_rng(seed)
+    return Reservoir(n_wells, base=rng.uniform(300, 600, n_wells), relax_rate=rng.uniform(0.005, 0.02, n_wells))
+
+
+def run(mode, n_wells, ticks, arrivals, seed):
+    reservoir = build(n_wells, seed)
+    injected = 0
+    start = time.perf_counter()
+    for t in range(1, ticks + 1):
+        for _ in range(arrivals):
+            if mode == "scan":
+                reservoir.advance(t)
+                headroom = reservoir.headroom_kg()
+                well = int(np.argmax(headroom))
+                well = well if headroom[well] >= 1000 else None
+            else:
+                well = reservoir.select(1000, t)
+            if well is not None:
+                reservoir.inject(well, 1000, t)
+                injected += 1
+    elapsed = time.perf_counter() - start
+    return elapsed / (ticks * arrivals) * 1e6, injected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--arrivals", type=int, default=50)
+    parser.add_argument("--wells", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.arrivals} arrivals/tick, {args.ticks} ticks")
+    print(f"{'wells':>7} {'mode':>6} {'us/arrival':>11} {'injected':>9}")
+    for n_wells in args.wells:
+        for mode in ("scan", "index"):
+            per_arrival, injected = run(mode, n_wells, args.ticks, args.arrivals, args.seed)
+            print(f"{n_wells:>7} {mode:>6} {per_arrival:>11.1f} {injected:>9,}")
+
+    # batched injection: one vectorized call for a whole tick's arrivals
+    reservoir = build(args.wells[-1], args.seed)
+    rng = np.random.default_rng(args.seed)
+    wells = rng.integers(0, len(reservoir), size=(args.ticks, 1000))
+    start = time.perf_counter()
+    for t in range(args.ticks):
+        reservoir.inject(wells[t], 1000.0, t + 1)
+    per_tick = (time.perf_counter() - start) / args.ticks * 1e6
+    print(f"batch inject: 1000 injections into {len(reservoir):,} wells in {per_tick:.0f} us per tick")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Cost of agent/tool instrumentation: human-readable logging vs the trace recorder.
+
+Runs the same seeded fleet simulation three ways:
+    logging   every kept record is also formatted and logged (to /dev/null)
+    trace     records only go to the recorder's columnar ring buffer
+    off       trace level OFF (the Monte Carlo setting)
+
+Usage:
+    python benchmarks/bench_trace.py [--ticks 2000] [--compressors 50]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import simpy
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.scenarios import build_simulation  # noqa: E402
+from src.tools import set_telemetry_enabled  # noqa: E402
+from src.trace import TraceRecorder, OFF  # noqa: E402
+
+
+def run(mode, ticks, compressors):
+    if mode == "off":
+        trace = TraceRecorder(level=OFF)
+    else:
+        trace = TraceRecorder(log=(mode == "logging"))
+    env = simpy.Environment()
+    build_simulation(env, rng=1, n_sectors=compressors, n_tanks=compressors * 2, n_trucks=compressors,
+                     n_compressors=compressors, trace=trace)
+    start = time.perf_counter()
+    env.run(until=ticks)
+    return time.perf_counter() - start, trace.total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--compressors", type=int, default=50)
+    args = parser.parse_args()
+
+    set_telemetry_enabled(False)
+    # a real handler, so the logging mode pays for formatting and I/O
+    root = logging.getLogger()
+    root.handlers[:] = [logging.StreamHandler(open(os.devnull, "w"))]
+    root.handlers[0].setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    root.setLevel(logging.INFO)
+
+    print(f"{args.compressors} compressors, {args.ticks} ticks")
+    print(f"{'mode':>8} {'records':>9} {'wall s':>8} {'us/record':>10}")
+    for mode in ("logging", "trace", "off"):
+        wall, records = run(mode, args.ticks, args.compressors)
+        per_record = wall / records * 1e6 if records else 0
+        print(f"{mode:>8} {records:>9,} {wall:>8.2f} {per_record:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Pollution tick rate of the vectorized WorldState at different sector counts.
+
+For comparison, the "per-sector process" column runs the pre-NumPy model:
+one simpy process per sector doing two random.randint calls, clamping and a
+threshold check every tick (skipped above 1k sectors, where it gets slow).
+
+Usage:
+    python benchmarks/bench_world_state.py [--ticks 200] [--sectors 10 1000 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import simpy
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.simulation import WorldState  # noqa: E402
+
+LEGACY_MAX_SECTORS = 1000
+
+
+def run_vectorized(n_sectors, ticks):
+    env = simpy.Environment()
+    world = WorldState(env, n_sectors=n_sectors)
+    env.process(world.update_pollution())
+    start = time.perf_counter()
+    env.run(until=ticks + 1)
+    return ticks / (time.perf_counter() - start)
+
+
+def run_legacy(n_sectors, ticks):
+    env = simpy.Environment()
+    threshold = {"NOx": 50, "CO2": 1000}
+
+    def sector():
+        level = {"NOx": 10, "CO2": 400}
+        while True:
+            yield env.timeout(1)
+            level["NOx"] += random.randint(-5, 10)
+            level["CO2"] += random.randint(-10, 20)
+            level["NOx"] = max(0, level["NOx"])
+            level["CO2"] = max(0, level["CO2"])
+            _active = level["NOx"] > threshold["NOx"] or level["CO2"] > threshold["CO2"]
+
+    for _ in range(n_sectors):
+        env.process(sector())
+    start = time.perf_counter()
+    env.run(until=ticks + 1)
+    return ticks / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--sectors", type=int, nargs="+", default=[10, 1000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'sectors':>10} {'vectorized ticks/s':>20} {'per-sector process ticks/s':>28}")
+    for n in args.sectors:
+        vec = run_vectorized(n, args.ticks)
+        legacy = f"{run_legacy(n, args.ticks):28,.0f}" if n <= LEGACY_MAX_SECTORS else f"{'-':>28}"
+        print(f"{n:>10,} {vec:20,.0f} {legacy}")
+
+
+if __name__ == "__main__":
+    main()
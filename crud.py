@@ -1,20 +1,124 @@
+import logging
+import threading
+import time
+
 from db import get_session
-from models import PollutionEvent, Tank, TransportManifest, InjectionReport, GuardianAlert
+from models import (PollutionEvent, Tank, TransportManifest, InjectionReport, GuardianAlert,
+                    CaptureState, InjectionPlan, HumanApproval)
+from sqlalchemy import insert
 from sqlalchemy.exc import IntegrityError
 
+logger = logging.getLogger("Crud")
+
+# ------------------------------------------------------------
+# Row builders (shared by the per-row helpers and BulkWriter)
+# ------------------------------------------------------------
+def _pollution_event_row(data: dict) -> dict:
+    return dict(
+        event_id = data.get('event_id'),
+        source_id = data.get('source_id'),
+        source_type = data.get('source_type'),
+        species = data.get('species'),
+        units = data.get('units'),
+        confidence = data.get('confidence'),
+        feasibility_flag = data.get('feasibility_flag'),
+        raw = data
+    )
+
+def _tank_row(data: dict) -> dict:
+    return dict(
+        tank_id = data.get('tank_id'),
+        mass_co2_kg = data.get('mass_co2_kg'),
+        pressure_psi = data.get('pressure_psi'),
+        sealed = data.get('sealed'),
+        origin = data.get('origin'),
+        raw = data
+    )
+
+def _manifest_row(data: dict) -> dict:
+    return dict(
+        manifest_id = data.get('manifest_id'),
+        tank_id = data.get('tank_id'),
+        assigned_vehicle = data.get('assigned_vehicle'),
+        origin = data.get('from'),
+        destination = data.get('to'),
+        eta = data.get('eta'),
+        raw = data
+    )
+
+def _injection_report_row(data: dict) -> dict:
+    return dict(
+        well_id = data.get('well_id'),
+        tank_id = data.get('tank_id'),
+        status = data.get('status'),
+        mass_tonnes = data.get('mass_tonnes'),
+        raw = data
+    )
+
+def _guardian_alert_row(data: dict) -> dict:
+    return dict(
+        alert_id = data.get('alert_id'),
+        severity = data.get('severity'),
+        reason = data.get('reason'),
+        action = data.get('action'),
+        details = data.get('details'),
+        notify = data.get('notify'),
+        raw = data
+    )
+
+def _capture_state_row(data: dict) -> dict:
+    return dict(
+        unit_id = data.get('unit_id'),
+        absorber_level = data.get('absorber_level'),
+        solvent_temp_c = data.get('solvent_temp_c'),
+        regen_power_kw = data.get('regen_power_kw'),
+        chamber_pressure_psi = data.get('chamber_pressure_psi'),
+        valves = data.get('valves'),
+        raw = data
+    )
+
+def _injection_plan_row(data: dict) -> dict:
+    return dict(
+        plan_id = data.get('plan_id'),
+        well_id = data.get('well_id'),
+        target_formation = data.get('target_formation'),
+        max_injection_pressure_bar = data.get('max_injection_pressure_bar'),
+        rate_t_per_hour = data.get('rate_t_per_hour'),
+        monitoring_frequency_sec = data.get('monitoring_frequency_sec'),
+        start_time = data.get('start_time'),
+        raw = data
+    )
+
+def _human_approval_row(data: dict) -> dict:
+    return dict(
+        request_id = data.get('request_id'),
+        required_by = data.get('required_by'),
+        approved = data.get('approved'),
+        approver = data.get('approver'),
+        notes = data.get('notes'),
+        raw = data
+    )
+
+# kind -> (model, row builder, unique business key or None)
+RECORD_KINDS = {
+    'pollution_event': (PollutionEvent, _pollution_event_row, 'event_id'),
+    'tank': (Tank, _tank_row, 'tank_id'),
+    'manifest': (TransportManifest, _manifest_row, 'manifest_id'),
+    'injection_report': (InjectionReport, _injection_report_row, None),
+    'guardian_alert': (GuardianAlert, _guardian_alert_row, 'alert_id'),
+    'capture_state': (CaptureState, _capture_state_row, None),
+    'injection_plan': (InjectionPlan, _injection_plan_row, 'plan_id'),
+    # a request and the decision on it are separate rows
+    'human_approval': (HumanApproval, _human_approval_row, None),
+}
+
+# ------------------------------------------------------------
+# Per-row helpers: one session and one commit per call
+# ------------------------------------------------------------
 def create_pollution_event(data: dict):
     db = get_session()
     try:
-        ev = PollutionEvent(
-            event_id = data.get('event_id'),
-            source_id = data.get('source_id'),
-            source_type = data.get('source_type'),
-            species = data.get('species'),
-            units = data.get('units'),
-            confidence = data.get('confidence'),
-            feasibility_flag = data.get('feasibility_flag'),
-            raw = data
-        )
+        ev = PollutionEvent(**_pollution_event_row(data))
         db.add(ev)
         db.commit()
         db.refresh(ev)
@@ -28,14 +132,7 @@ def create_pollution_event(data: dict):
 def create_tank(data: dict):
     db = get_session()
     try:
-        t = Tank(
-            tank_id = data.get('tank_id'),
-            mass_co2_kg = data.get('mass_co2_kg'),
-            pressure_psi = data.get('pressure_psi'),
-            sealed = data.get('sealed'),
-            origin = data.get('origin'),
-            raw = data
-        )
+        t = Tank(**_tank_row(data))
         db.add(t)
         db.commit()
         db.refresh(t)
@@ -49,15 +146,7 @@ def create_tank(data: dict):
 def create_manifest(data: dict):
     db = get_session()
     try:
-        m = TransportManifest(
-            manifest_id = data.get('manifest_id'),
-            tank_id = data.get('tank_id'),
-            assigned_vehicle = data.get('assigned_vehicle'),
-            origin = data.get('from'),
-            destination = data.get('to'),
-            eta = data.get('eta'),
-            raw = data
-        )
+        m = TransportManifest(**_manifest_row(data))
         db.add(m)
         db.commit()
         db.refresh(m)
@@ -68,13 +157,7 @@ def create_manifest(data: dict):
 def create_injection_report(data: dict):
     db = get_session()
     try:
-        ir = InjectionReport(
-            well_id = data.get('well_id'),
-            tank_id = data.get('tank_id'),
-            status = data.get('status'),
-            mass_tonnes = data.get('mass_tonnes'),
-            raw = data
-        )
+        ir = InjectionReport(**_injection_report_row(data))
         db.add(ir)
         db.commit()
         db.refresh(ir)
@@ -85,18 +168,365 @@ def create_injection_report(data: dict):
 def create_guardian_alert(data: dict):
     db = get_session()
     try:
-        ga = GuardianAlert(
-            alert_id = data.get('alert_id'),
-            severity = data.get('severity'),
-            reason = data.get('reason'),
-            action = data.get('action'),
-            details = data.get('details'),
-            notify = data.get('notify'),
-            raw = data
-        )
+        ga = GuardianAlert(**_guardian_alert_row(data))
         db.add(ga)
         db.commit()
         db.refresh(ga)
         return ga
     finally:
         db.close()
+
+def create_record(kind: str, data: dict):
+    """One row of any RECORD_KINDS kind (None if its unique key already exists)."""
+    model, build_row, _key = RECORD_KINDS[kind]
+    db = get_session()
+    try:
+        record = model(**build_row(data))
+        db.add(record)
+        db.commit()
+        db.refresh(record)
+        return record
+    except IntegrityError:
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+# ------------------------------------------------------------
+# Group commit
+# ------------------------------------------------------------
+def _conflict_insert(dialect_name: str, table, key: str):
+    """INSERT that skips rows whose unique key already exists, returning inserted keys."""
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return (dialect_insert(table)
+            .on_conflict_do_nothing(index_elements=[key])
+            .returning(table.c[key]))
+
+class WriterOverloaded(RuntimeError):
+    """Raised by BulkWriter.add() when `max_pending` rows are already buffered."""
+
+    def __init__(self, pending: int):
+        super().__init__(f'BulkWriter has {pending} rows pending')
+        self.pending = pending
+
+
+class BulkWriter:
+    """Buffers rows for every RECORD_KINDS model and writes them in one transaction.
+
+    Rows are added with `add(kind, data)` (kinds are the keys of
+    RECORD_KINDS) and flushed as one multi-row INSERT per table inside a
+    single transaction, either when `max_rows` are buffered or when the
+    oldest buffered row is `max_delay` seconds old (the latter needs the
+    background flusher from `start()`).
+
+    Duplicates of the unique business keys (event_id, tank_id, manifest_id,
+    alert_id, plan_id) are handled per row: repeats inside a batch are dropped before
+    the INSERT and rows that already exist are skipped with ON CONFLICT DO
+    NOTHING (PostgreSQL/SQLite; other databases fall back to one savepoint
+    per row). The skipped keys are reported by flush() and counted in
+    `stats`.
+
+    With `recent` (a dedup.RecentKeys), keys seen recently are rejected
+    by add() itself, in O(1) and without a database round trip; they count
+    as `suppressed`. Keys of rows whose flush failed are forgotten again so
+    a retry is not mistaken for a duplicate.
+
+    If the batch transaction fails, every kind is retried in its own
+    transaction, and a kind that still fails is written row by row under
+    savepoints, so one bad row (or a missing table) only holds back itself.
+    Rows that could not be written go back to the front of the buffer. The
+    flusher retries them after `retry_backoff` seconds, doubling with each
+    attempt, and drops them (counted as `failed`, their keys forgotten by
+    `recent`) after `max_retries` retries. With `max_pending`, add() raises WriterOverloaded
+    instead of buffering more than that many rows, so a slow or unreachable
+    database turns into backpressure rather than unbounded memory.
+    """
+
+    def __init__(self, max_rows: int = 500, max_delay: float = 0.5, session_factory=get_session,
+                 recent=None, max_pending: int = None, max_retries: int = 3, retry_backoff: float = 0.5):
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.session_factory = session_factory
+        self.recent = recent
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._attempts = {}     # id(row) -> failed writes, for rows waiting to be retried
+        self._retry_at = 0.0    # monotonic time before which the flusher backs off
+        self._buffer = {kind: [] for kind in RECORD_KINDS}
+        self._size = 0
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._closed = False
+        self.stats = {'buffered': 0, 'inserted': 0, 'duplicates': 0, 'suppressed': 0, 'flushes': 0,
+                      'requeued': 0, 'failed': 0, 'rejected': 0}
+
+    @property
+    def pending(self) -> int:
+        """Rows buffered and not yet committed (including requeued ones)."""
+        return self._size
+
+    def add(self, kind: str, data: dict) -> bool:
+        """Buffer one record; False if `recent` says it is a duplicate.
+
+        Flushes inline when full and no flusher thread is running. Raises
+        WriterOverloaded when `max_pending` rows are already buffered.
+        """
+        model, build_row, key = RECORD_KINDS[kind]
+        row = build_row(data)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('BulkWriter is closed')
+            if self.max_pending is not None and self._size >= self.max_pending:
+                self.stats['rejected'] += 1
+                raise WriterOverloaded(self._size)
+            if self.recent is not None and key is not None and row[key] is not None \
+                    and self.recent.seen(kind, row[key]):
+                self.stats['suppressed'] += 1
+                return False
+            self._buffer[kind].append(row)
+            self._size += 1
+            self.stats['buffered'] += 1
+            first = self._oldest is None
+            if first:
+                self._oldest = time.monotonic()
+            full = self._size >= self.max_rows
+            # an idle flusher sleeps until the first row starts the age clock
+            if (full or first) and self._thread is not None:
+                self._wakeup.notify()
+        if full and self._thread is None:
+            self.flush()
+        return True
+
+    def _take(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, {kind: [] for kind in RECORD_KINDS}
+            self._size = 0
+            self._oldest = None
+        return batch
+
+    def flush(self) -> dict:
+        """Write everything buffered so far; return {'inserted': n, 'duplicates': {kind: [keys]}}.
+
+        Raises the first error if any row could not be written; those rows
+        are requeued (or dropped once out of retries), the rest are committed.
+        """
+        with self._flush_lock:
+            batch = self._take()
+            if not any(batch.values()):
+                return {'inserted': 0, 'duplicates': {}}
+            inserted = 0
+            duplicates = {}
+            failed = {}
+            error = None
+            db = None
+            try:
+                db = self.session_factory()
+                dialect_name = db.get_bind().dialect.name
+                try:
+                    with db.begin():
+                        for kind, rows in batch.items():
+                            if not rows:
+                                continue
+                            n, dups = self._write_kind(db, dialect_name, kind, rows)
+                            inserted += n
+                            if dups:
+                                duplicates[kind] = dups
+                except Exception as exc:
+                    error = exc
+                    inserted, duplicates, failed = self._write_isolated(db, dialect_name, batch)
+            except Exception as exc:
+                # no session at all: nothing was written
+                error = exc
+                inserted, duplicates, failed = 0, {}, {kind: rows for kind, rows in batch.items() if rows}
+            finally:
+                if db is not None:
+                    db.close()
+            self._settle(batch, failed)
+            with self._lock:
+                self.stats['inserted'] += inserted
+                self.stats['duplicates'] += sum(len(d) for d in duplicates.values())
+                self.stats['flushes'] += 1
+            if failed:
+                raise error
+            return {'inserted': inserted, 'duplicates': duplicates}
+
+    def _write_isolated(self, db, dialect_name, batch):
+        """Retry a failed batch one kind per transaction, then one row per savepoint."""
+        inserted, duplicates, failed = 0, {}, {}
+        for kind, rows in batch.items():
+            if not rows:
+                continue
+            try:
+                with db.begin():
+                    n, dups = self._write_kind(db, dialect_name, kind, rows)
+            except Exception:
+                n, dups, bad = self._write_rows(db, dialect_name, kind, rows)
+                if bad:
+                    failed[kind] = bad
+            inserted += n
+            if dups:
+                duplicates[kind] = dups
+        return inserted, duplicates, failed
+
+    def _write_rows(self, db, dialect_name, kind, rows):
+        inserted, dups, bad = 0, [], []
+        try:
+            with db.begin():
+                for row in rows:
+                    try:
+                        with db.begin_nested():
+                            n, row_dups = self._write_kind(db, dialect_name, kind, [row])
+                    except Exception:
+                        bad.append(row)
+                        continue
+                    inserted += n
+                    dups.extend(row_dups)
+        except Exception:
+            # the transaction itself failed (e.g. the connection dropped)
+            return 0, [], rows
+        return inserted, dups, bad
+
+    def _settle(self, batch, failed):
+        """Requeue failed rows with backoff, drop those out of retries, clear the rest."""
+        now = time.monotonic()
+        requeued = dropped = 0
+        lost = {}
+        with self._lock:
+            if self._attempts:
+                failed_ids = {id(row) for rows in failed.values() for row in rows}
+                for rows in batch.values():
+                    for row in rows:
+                        if id(row) not in failed_ids:
+                            self._attempts.pop(id(row), None)
+            worst = 0
+            for kind, rows in failed.items():
+                retry = []
+                for row in rows:
+                    attempts = self._attempts.get(id(row), 0) + 1
+                    if attempts > self.max_retries:
+                        self._attempts.pop(id(row), None)
+                        lost.setdefault(kind, []).append(row)
+                    else:
+                        self._attempts[id(row)] = attempts
+                        worst = max(worst, attempts)
+                        retry.append(row)
+                if retry:
+                    self._buffer[kind][:0] = retry
+                    self._size += len(retry)
+                    requeued += len(retry)
+                dropped += len(rows) - len(retry)
+            if requeued:
+                if self._oldest is None:
+                    self._oldest = now
+                self._retry_at = now + self.retry_backoff * 2 ** (worst - 1)
+            else:
+                self._retry_at = 0.0
+            self.stats['requeued'] += requeued
+            self.stats['failed'] += dropped
+        if lost:
+            logger.error('BulkWriter dropped %d row(s) after %d retries: %s', dropped, self.max_retries,
+                         ', '.join(f'{len(rows)} {kind}' for kind, rows in lost.items()))
+            self._forget(lost)
+
+    def _forget(self, batch):
+        if self.recent is None:
+            return
+        for kind, rows in batch.items():
+            key = RECORD_KINDS[kind][2]
+            if key is not None:
+                for row in rows:
+                    self.recent.forget(kind, row[key])
+
+    def _write_kind(self, db, dialect_name, kind, rows):
+        model, _build_row, key = RECORD_KINDS[kind]
+        table = model.__table__
+        if key is None:
+            db.execute(insert(table), rows)
+            return len(rows), []
+
+        # drop repeats within the batch first (keep the first occurrence)
+        unique_rows, dups, seen = [], [], set()
+        for row in rows:
+            value = row[key]
+            if value is not None and value in seen:
+                dups.append(value)
+                continue
+            seen.add(value)
+            unique_rows.append(row)
+
+        stmt = _conflict_insert(dialect_name, table, key)
+        if stmt is not None:
+            written = {r[0] for r in db.execute(stmt, unique_rows)}
+            conflicted = [row[key] for row in unique_rows
+                          if row[key] is not None and row[key] not in written]
+            dups.extend(conflicted)
+            return len(unique_rows) - len(conflicted), dups
+
+        inserted = 0
+        for row in unique_rows:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(table), [row])
+                inserted += 1
+            except IntegrityError:
+                dups.append(row[key])
+        return inserted, dups
+
+    # ------------------------------------------------------------
+    # Background flusher (time threshold)
+    # ------------------------------------------------------------
+    def start(self):
+        """Start a daemon thread that flushes on the size or age threshold."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name='BulkWriter')
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while True:
+                    now = time.monotonic()
+                    if self._retry_at > now:
+                        # backing off after a failed flush
+                        self._wakeup.wait(self._retry_at - now)
+                        continue
+                    if self._closed or self._size >= self.max_rows:
+                        break
+                    if self._oldest is None:
+                        self._wakeup.wait()
+                        continue
+                    remaining = self._oldest + self.max_delay - now
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                closing = self._closed
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('BulkWriter flush failed')
+            if closing:
+                with self._lock:
+                    # requeued rows get their retries before the flusher stops
+                    if not self._size:
+                        return
+
+    def close(self):
+        """Flush what is left and stop the background flusher."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        else:
+            self.flush()
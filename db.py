@@ -1,16 +1,36 @@
 import os
-from sqlalchemy import create_engine
+import threading
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import OperationalError
 
+import json_codec
+
 # ------------------------------------------------------------
 # Database configuration
 # ------------------------------------------------------------
 # Read the DATABASE_URL environment variable. If it is not set or contains
 # placeholder values (e.g. "USER" or "PASSWORD"), fall back to a local SQLite
 # database so the application can run without a real PostgreSQL server.
+#
+# The engine is created lazily on first use (get_engine(), get_session() or
+# the module attribute `db.engine`), so importing this module - and crud,
+# server, ... which import it - never waits on a database handshake.
 # ------------------------------------------------------------
 raw_url = os.getenv("DATABASE_URL")
+SQLITE_FALLBACK_URL = "sqlite:///./ccs_dev.db"
+
+# Pool tuning (ignored where the dialect does not pool, e.g. in-memory SQLite)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", 20))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))      # seconds; avoids server-side idle kills
+CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", 3))    # PostgreSQL connect timeout, seconds
+
+# SQLite connection settings applied on every new DB-API connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")      # readers don't block the writer
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")     # safe with WAL, far fewer fsyncs
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
 
 def _is_placeholder(url: str) -> bool:
     """Return True if the URL looks like it still contains placeholder credentials.
@@ -22,35 +42,94 @@ def _is_placeholder(url: str) -> bool:
     lowered = url.lower()
     return "user" in lowered and "password" in lowered and ("user" in lowered.split("://")[1].split(":")[0] or "password" in lowered)
 
-# Determine which URL to use
+# Determine which URL to use (cheap; no connection is made here)
 if raw_url is None or _is_placeholder(raw_url):
     # No valid PostgreSQL URL – use SQLite for local development
-    DATABASE_URL = "sqlite:///./ccs_dev.db"
-    print("⚠️ Using fallback SQLite database (no valid DATABASE_URL provided).")
+    DATABASE_URL = SQLITE_FALLBACK_URL
+    _using_fallback = True
 else:
     DATABASE_URL = raw_url
+    _using_fallback = False
 
 # ------------------------------------------------------------
-# Engine creation – try PostgreSQL first, fall back to SQLite on error
+# Engine creation
 # ------------------------------------------------------------
-try:
-    engine = create_engine(DATABASE_URL, echo=False, future=True)
-    # Test the connection (this will raise OperationalError if PostgreSQL is unreachable)
-    with engine.connect() as _:
-        pass
-except OperationalError as exc:
-    # If we tried PostgreSQL and it failed, switch to SQLite
-    print(f"⚠️ Could not connect to PostgreSQL ({DATABASE_URL}): {exc}\n   Falling back to SQLite.")
-    DATABASE_URL = "sqlite:///./ccs_dev.db"
-    engine = create_engine(DATABASE_URL, echo=False, future=True)
-
-# Session factory
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+def _configure_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    finally:
+        cursor.close()
+
+def _build_engine(url: str):
+    if url.startswith("sqlite"):
+        in_memory = url in ("sqlite://", "sqlite:///:memory:")
+        engine = create_engine(
+            url, echo=False, future=True,
+            json_serializer=json_codec.dumps_str, json_deserializer=json_codec.loads,
+            # sessions are shared across agent/API threads
+            connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+            **({} if in_memory else {"pool_size": POOL_SIZE, "max_overflow": POOL_MAX_OVERFLOW,
+                                     "pool_timeout": POOL_TIMEOUT}),
+        )
+        event.listen(engine, "connect", _configure_sqlite)
+        return engine
+    connect_args = {"connect_timeout": CONNECT_TIMEOUT} if url.startswith("postgresql") else {}
+    return create_engine(
+        url, echo=False, future=True,
+        json_serializer=json_codec.dumps_str, json_deserializer=json_codec.loads,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+    )
+
+_engine = None
+_engine_lock = threading.Lock()
+
+# Session factory; bound to the engine when it is first created
+SessionLocal = sessionmaker(autoflush=False, autocommit=False, future=True)
+
+def get_engine():
+    """Create the engine on first call – try PostgreSQL first, fall back to SQLite on error."""
+    global _engine, DATABASE_URL
+    if _engine is not None:
+        return _engine
+    with _engine_lock:
+        if _engine is None:
+            if _using_fallback:
+                print("⚠️ Using fallback SQLite database (no valid DATABASE_URL provided).")
+            engine = _build_engine(DATABASE_URL)
+            if not DATABASE_URL.startswith("sqlite"):
+                try:
+                    # Test the connection (this will raise OperationalError if PostgreSQL is unreachable)
+                    with engine.connect() as _:
+                        pass
+                except OperationalError as exc:
+                    # If we tried PostgreSQL and it failed, switch to SQLite
+                    print(f"⚠️ Could not connect to PostgreSQL ({DATABASE_URL}): {exc}\n   Falling back to SQLite.")
+                    engine.dispose()
+                    DATABASE_URL = SQLITE_FALLBACK_URL
+                    engine = _build_engine(DATABASE_URL)
+            SessionLocal.configure(bind=engine)
+            _engine = engine
+    return _engine
+
+def __getattr__(name):
+    # `from db import engine` / `db.engine` keep working, but resolve lazily
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_session():
     """Convenient helper to obtain a new DB session.
     Use it with a context manager: `with get_session() as db:`
     """
+    get_engine()
     return SessionLocal()
 
 # Export Base for model definitions
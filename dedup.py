@@ -0,0 +1,86 @@
+"""
+Bounded cache of recently seen business keys, for dropping duplicate
+records before they reach the database.
+
+    recent = RecentKeys(capacity=100_000)
+    if recent.seen('pollution_event', event['event_id']):
+        ...  # duplicate: skip it
+    ...
+    recent.forget('pollution_event', event['event_id'])  # its write failed; let a retry through
+
+seen() is an O(1) dict lookup that also records the key. The cache is an
+LRU over (kind, key) pairs: a hit refreshes the key, and past `capacity`
+the least recently seen key is evicted. It is exact, with no false
+positives, so a new record is never rejected. A key that was evicted, or
+that was seen before a restart, is simply not caught here, and the
+database's unique constraint remains the final check.
+
+`stats` counts hits (duplicates caught), misses (new keys) and evictions
+per kind, to size `capacity` against the retry and replay window.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+class RecentKeys:
+    """LRU set of (kind, key) pairs with hit/miss/eviction counters."""
+
+    def __init__(self, capacity=100_000):
+        if capacity < 1:
+            raise ValueError(f'capacity must be at least 1, got {capacity}')
+        self.capacity = capacity
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {}  # kind -> {'hits': n, 'misses': n, 'evictions': n}
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """Cache sized by CCS_DEDUP_CAPACITY; None when it is 0 (disabled)."""
+        kwargs = dict(capacity=int(os.environ.get('CCS_DEDUP_CAPACITY', 100_000)))
+        kwargs.update(overrides)
+        if kwargs['capacity'] <= 0:
+            return None
+        return cls(**kwargs)
+
+    def _counters(self, kind):
+        counters = self.stats.get(kind)
+        if counters is None:
+            counters = self.stats[kind] = {'hits': 0, 'misses': 0, 'evictions': 0}
+        return counters
+
+    def seen(self, kind, key) -> bool:
+        """True if (kind, key) was seen recently; records it either way."""
+        item = (kind, key)
+        with self._lock:
+            if item in self._keys:
+                self._keys.move_to_end(item)
+                self._counters(kind)['hits'] += 1
+                return True
+            self._keys[item] = None
+            self._counters(kind)['misses'] += 1
+            if len(self._keys) > self.capacity:
+                (evicted_kind, _key), _ = self._keys.popitem(last=False)
+                self._counters(evicted_kind)['evictions'] += 1
+            return False
+
+    def forget(self, kind, key):
+        with self._lock:
+            self._keys.pop((kind, key), None)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, item):
+        return item in self._keys
+
+    def snapshot(self):
+        """Counters per kind plus totals and the current size."""
+        with self._lock:
+            per_kind = {kind: dict(c) for kind, c in self.stats.items()}
+            size = len(self._keys)
+        totals = {name: sum(c[name] for c in per_kind.values()) for name in ('hits', 'misses', 'evictions')}
+        lookups = totals['hits'] + totals['misses']
+        return dict(totals, size=size, capacity=self.capacity,
+                    hit_rate=totals['hits'] / lookups if lookups else 0.0, kinds=per_kind)
@@ -0,0 +1,243 @@
+"""
+Topic-routed publish/subscribe bus for the CCS demo runners.
+
+Replaces the single shared queue.Queue where every consumer had to pull each
+item and put back anything that was not its type. Here producers publish to a
+topic (the event type, e.g. "tank_ready") and only the subscriptions interested
+in that topic receive the item, so consumers block on exactly the traffic they
+handle and messages keep their publish order per subscription.
+
+Usage:
+    bus = TopicEventBus()
+    sub = bus.subscribe("tank_ready")
+    bus.publish("tank_ready", {"tank_id": "TANK-R-0001"})
+    item = sub.get(timeout=1)   # {"type": "tank_ready", "payload": {...}}
+
+Several threads may call get() on the same Subscription; each item is then
+handed to exactly one of them (work-queue semantics). Separate subscriptions
+to the same topic each receive their own copy (fan-out).
+
+AsyncTopicEventBus has the same routing for code running on one asyncio event
+loop; its subscriptions are awaited with `item = await sub.get()`.
+"""
+
+import asyncio
+import threading
+import queue
+import time
+from collections import deque
+
+TOPICS = (
+    "pollution_event",
+    "capture_state",
+    "tank_ready",
+    "transport_manifest",
+    "delivered_to_port",
+    "injection_plan",
+    "injection_report",
+    "guardian_alert",
+    "human_approval",
+)
+
+WILDCARD = "*"
+
+
+class _SubscriptionBase:
+    def __init__(self, bus, topics):
+        self.bus = bus
+        self.topics = tuple(topics)
+        self.dropped = 0
+        # queue-wait accounting (publish -> get), in seconds
+        self.received = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _record_wait(self, enqueued_at):
+        wait = self.bus.clock() - enqueued_at
+        self.received += 1
+        self.wait_total += wait
+        if wait > self.wait_max:
+            self.wait_max = wait
+
+    @property
+    def wait_avg(self):
+        return self.wait_total / self.received if self.received else 0.0
+
+    def unsubscribe(self):
+        self.bus.unsubscribe(self)
+
+
+class Subscription(_SubscriptionBase):
+    """A FIFO of bus items for one or more topics with blocking waits."""
+
+    def __init__(self, bus, topics, maxlen=None):
+        super().__init__(bus, topics)
+        self._items = deque(maxlen=maxlen)
+        self._cond = threading.Condition(threading.Lock())
+
+    def _deliver(self, item):
+        with self._cond:
+            if self._items.maxlen is not None and len(self._items) == self._items.maxlen:
+                # bounded taps drop the oldest item rather than block the publisher
+                self.dropped += 1
+            self._items.append((self.bus.clock(), item))
+            self._cond.notify()
+
+    def _pop(self):
+        enqueued_at, item = self._items.popleft()
+        self._record_wait(enqueued_at)
+        return item
+
+    def get(self, block=True, timeout=None):
+        """Remove and return the next item; raise queue.Empty on timeout."""
+        with self._cond:
+            if not block:
+                if not self._items:
+                    raise queue.Empty
+                return self._pop()
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            return self._pop()
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def qsize(self):
+        return len(self._items)
+
+    def empty(self):
+        return not self._items
+
+
+class AsyncSubscription(_SubscriptionBase):
+    """Subscription for a single asyncio event loop; await get() for the next item."""
+
+    def __init__(self, bus, topics, maxlen=None):
+        super().__init__(bus, topics)
+        self._queue = asyncio.Queue(maxlen or 0)
+
+    def _deliver(self, item):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait((self.bus.clock(), item))
+
+    async def get(self):
+        enqueued_at, item = await self._queue.get()
+        self._record_wait(enqueued_at)
+        return item
+
+    def get_nowait(self):
+        try:
+            enqueued_at, item = self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            raise queue.Empty
+        self._record_wait(enqueued_at)
+        return item
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def empty(self):
+        return self._queue.empty()
+
+
+class EventHistory:
+    """Fixed-size ring of recent bus items, addressed by increasing offsets.
+
+    Unlike a Subscription, reading does not consume anything: each reader
+    passes the last offset it has seen (`after`) and gets the next items, so
+    any number of readers can follow the same history independently. A read
+    costs O(limit). Attach it to a bus with `bus.attach(EventHistory(...))`.
+    """
+
+    def __init__(self, capacity=10000, topics=(WILDCARD,)):
+        self.topics = tuple(topics)
+        self.capacity = capacity
+        self._ring = [None] * capacity
+        self._lock = threading.Lock()
+        self.end_offset = 0  # offset the next item will get
+
+    @property
+    def start_offset(self):
+        """Oldest offset still held."""
+        return max(0, self.end_offset - self.capacity)
+
+    def _deliver(self, item):
+        with self._lock:
+            self._ring[self.end_offset % self.capacity] = item
+            self.end_offset += 1
+
+    def read(self, after=-1, limit=50):
+        """Return up to `limit` (offset, item) pairs with offset > after."""
+        with self._lock:
+            first = max(after + 1, self.start_offset)
+            last = min(first + limit, self.end_offset)
+            return [(off, self._ring[off % self.capacity]) for off in range(first, last)]
+
+
+class TopicEventBus:
+    """Thread-safe pub/sub bus keyed by event type."""
+
+    subscription_class = Subscription
+
+    def __init__(self, clock=time.monotonic):
+        # time source for queue-wait stats (e.g. a simulated clock's now())
+        self.clock = clock
+        self._lock = threading.Lock()
+        # topic -> tuple of subscriptions; replaced wholesale on (un)subscribe so
+        # publish() can read it without taking the lock
+        self._routes = {}
+        self.published = 0
+        self.unrouted = 0
+
+    def subscribe(self, *topics, maxlen=None):
+        """Create a subscription for the given topics ("*" receives everything)."""
+        if not topics:
+            raise ValueError("subscribe() needs at least one topic")
+        return self.attach(self.subscription_class(self, topics, maxlen=maxlen))
+
+    def attach(self, receiver):
+        """Route receiver.topics to any object with a _deliver(item) method."""
+        with self._lock:
+            for topic in receiver.topics:
+                self._routes[topic] = self._routes.get(topic, ()) + (receiver,)
+        return receiver
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for topic in sub.topics:
+                remaining = tuple(s for s in self._routes.get(topic, ()) if s is not sub)
+                if remaining:
+                    self._routes[topic] = remaining
+                else:
+                    self._routes.pop(topic, None)
+
+    def publish(self, topic, payload):
+        """Deliver payload to every subscription of topic; return the fan-out count."""
+        item = {"type": topic, "payload": payload}
+        targets = self._routes.get(topic, ()) + self._routes.get(WILDCARD, ())
+        for sub in targets:
+            sub._deliver(item)
+        self.published += 1
+        if not targets:
+            self.unrouted += 1
+        return len(targets)
+
+    def put_nowait(self, item):
+        """queue.Queue-style publish of a {'type': ..., 'payload': ...} item."""
+        self.publish(item["type"], item["payload"])
+
+    put = put_nowait
+
+    def subscriber_count(self, topic):
+        return len(self._routes.get(topic, ()))
+
+
+class AsyncTopicEventBus(TopicEventBus):
+    """TopicEventBus whose subscriptions are awaited on one asyncio event loop.
+
+    publish() must be called from the loop's thread.
+    """
+
+    subscription_class = AsyncSubscription
@@ -1,9 +1,13 @@
 // src/App.tsx
 import { useDashboardData } from './hooks/useDashboardData';
+import { useKpi } from './hooks/useKpi';
 import { EventStream } from './components/EventStream';
 import { TankTable } from './components/TankTable';
 import { InjectionStatus } from './components/InjectionStatus';
 import { AgentLogs } from './components/AgentLogs';
+import { KpiSummary } from './components/KpiSummary';
+
+const KPI_WINDOW_HOURS = 24;
 
 function App() {
   const {
@@ -13,6 +17,7 @@ function App() {
     injectionReports,
     guardianAlerts,
   } = useDashboardData();
+  const kpi = useKpi('hour', KPI_WINDOW_HOURS);
 
   return (
     <div className="app-root">
@@ -34,6 +39,7 @@ function App() {
       <main className="grid">
         <EventStream events={latestEvents} />
         <TankTable tanks={tanks} />
+        <KpiSummary kpi={kpi} windowHours={KPI_WINDOW_HOURS} />
         <InjectionStatus reports={injectionReports} />
         <AgentLogs events={latestEvents} alerts={guardianAlerts} />
       </main>
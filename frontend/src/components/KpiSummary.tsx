@@ -0,0 +1,69 @@
+// src/components/KpiSummary.tsx
+import { KpiMetric, KpiResponse } from '../types';
+
+interface Props {
+    kpi: KpiResponse | null;
+    windowHours: number;
+}
+
+interface Row {
+    key: string;
+    recent: number;
+    total: number;
+}
+
+function rows(metric: KpiMetric | undefined): Row[] {
+    if (!metric) return [];
+    return Object.entries(metric.totals)
+        .map(([key, total]) => ({
+            key,
+            recent: (metric.series[key] ?? []).reduce((sum, p) => sum + p.value, 0),
+            total: total.value,
+        }))
+        .sort((a, b) => b.recent - a.recent || b.total - a.total)
+        .slice(0, 6);
+}
+
+function KpiTable({ title, by, data }: { title: string; by: string; data: Row[] }) {
+    return (
+        <table className="table">
+            <thead>
+                <tr>
+                    <th>{by}</th>
+                    <th>{title}</th>
+                    <th>All time</th>
+                </tr>
+            </thead>
+            <tbody>
+                {data.length === 0 && (
+                    <tr>
+                        <td colSpan={3}>No data yet.</td>
+                    </tr>
+                )}
+                {data.map((r) => (
+                    <tr key={r.key}>
+                        <td>{r.key}</td>
+                        <td>{r.recent.toFixed(1)}</td>
+                        <td>{r.total.toFixed(1)}</td>
+                    </tr>
+                ))}
+            </tbody>
+        </table>
+    );
+}
+
+export function KpiSummary({ kpi, windowHours }: Props) {
+    const captured = rows(kpi?.metrics.captured_t);
+    const injected = rows(kpi?.metrics.injected_t);
+
+    return (
+        <div className="card">
+            <div className="card-header">
+                <div className="card-title">CO₂ Captured &amp; Injected (t)</div>
+                <span className="card-tag">KPI</span>
+            </div>
+            <KpiTable title={`Last ${windowHours}h`} by="Source" data={captured} />
+            <KpiTable title={`Last ${windowHours}h`} by="Well" data={injected} />
+        </div>
+    );
+}
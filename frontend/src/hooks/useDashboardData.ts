@@ -2,49 +2,38 @@
 import { useEffect, useState, useMemo } from 'react';
 import type { RawEvent, Tank, InjectionReport } from '../types';
 
-interface DrainResponse {
-    drained: number;
-    events: RawEvent[];
-}
+// Server-sent event stream; the backend coalesces bursts into one message per
+// batch and the browser resumes via Last-Event-ID after a reconnect.
+const STREAM_URL = '/api/events/stream';
 
-export function useDashboardData(pollIntervalMs = 3000) {
+export function useDashboardData(maxEvents = 200) {
     const [events, setEvents] = useState<RawEvent[]>([]);
     const [isOnline, setIsOnline] = useState<boolean>(false);
 
     useEffect(() => {
-        let isMounted = true;
-
-        const fetchEvents = async () => {
-            try {
-                const res = await fetch('/api/debug/drain_events?limit=50');
-                if (!res.ok) throw new Error(`HTTP ${res.status}`);
-                const data: DrainResponse = await res.json();
-                if (!isMounted) return;
+        // replay recent history on first connect, then follow live
+        const source = new EventSource(`${STREAM_URL}?tail=${maxEvents}`);
 
-                const newEvents = data.events || [];
-                if (newEvents.length > 0) {
-                    setEvents((prev) => {
-                        const merged = [...newEvents.reverse(), ...prev];
-                        // keep only latest 200 events
-                        return merged.slice(0, 200);
-                    });
-                }
-                setIsOnline(true);
-            } catch (err) {
-                console.error('Failed to fetch events:', err);
-                if (isMounted) setIsOnline(false);
-            }
+        source.onopen = () => setIsOnline(true);
+        source.onerror = () => {
+            // EventSource reconnects on its own; just reflect the outage
+            setIsOnline(false);
         };
-
-        // initial fetch
-        fetchEvents();
-        const id = setInterval(fetchEvents, pollIntervalMs);
+        source.addEventListener('events', (msg) => {
+            const batch: RawEvent[] = JSON.parse((msg as MessageEvent).data);
+            if (batch.length === 0) return;
+            setEvents((prev) => {
+                const merged = [...batch.reverse(), ...prev];
+                // keep only the latest maxEvents events
+                return merged.slice(0, maxEvents);
+            });
+            setIsOnline(true);
+        });
 
         return () => {
-            isMounted = false;
-            clearInterval(id);
+            source.close();
         };
-    }, [pollIntervalMs]);
+    }, [maxEvents]);
 
     const tanks: Tank[] = useMemo(
         () =>
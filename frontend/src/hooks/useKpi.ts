@@ -0,0 +1,36 @@
+// src/hooks/useKpi.ts
+import { useEffect, useState } from 'react';
+import type { KpiResponse } from '../types';
+
+const KPI_URL = '/api/kpi';
+
+// Polls the backend's KPI rollups. Each response is O(buckets), so this
+// costs the same however many events the backend has ingested.
+export function useKpi(resolution: 'hour' | 'day' = 'hour', windowHours = 24, intervalMs = 10000) {
+    const [kpi, setKpi] = useState<KpiResponse | null>(null);
+
+    useEffect(() => {
+        let cancelled = false;
+
+        const load = async () => {
+            const since = new Date(Date.now() - windowHours * 3600 * 1000).toISOString();
+            try {
+                const res = await fetch(`${KPI_URL}?resolution=${resolution}&since=${encodeURIComponent(since)}`);
+                if (!res.ok) return;
+                const data: KpiResponse = await res.json();
+                if (!cancelled) setKpi(data);
+            } catch {
+                // backend offline; keep the last values
+            }
+        };
+
+        load();
+        const timer = setInterval(load, intervalMs);
+        return () => {
+            cancelled = true;
+            clearInterval(timer);
+        };
+    }, [resolution, windowHours, intervalMs]);
+
+    return kpi;
+}
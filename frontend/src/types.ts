@@ -12,6 +12,7 @@ export interface RawEvent {
     type: EventType;
     payload: any;
     timestamp?: string;
+    offset?: number; // position in the backend event log (streamed events)
 }
 
 export interface Tank {
@@ -30,3 +31,23 @@ export interface InjectionReport {
     mass_tonnes?: number;
     timestamp?: string;
 }
+
+// GET /kpi: rollups maintained by the backend at ingest time
+export interface KpiPoint {
+    start: number; // bucket start, epoch seconds
+    value: number;
+    count: number;
+}
+
+export interface KpiMetric {
+    by: string; // what the series are keyed by (source, well, severity)
+    series: Record<string, KpiPoint[]>;
+    totals: Record<string, { value: number; count: number }>;
+}
+
+export interface KpiResponse {
+    resolution: 'hour' | 'day';
+    bucket_seconds: number;
+    offset: number;
+    metrics: Record<'captured_t' | 'injected_t' | 'alerts', KpiMetric>;
+}
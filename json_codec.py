@@ -0,0 +1,86 @@
+"""
+JSON encoding for the API and persistence paths.
+
+Uses orjson when it is installed (several times faster than the standard
+library on both ends) and falls back to `json` otherwise; both produce
+compact UTF-8 output.
+
+    json_codec.dumps({"a": 1})       # b'{"a":1}'
+    json_codec.dumps_str({"a": 1})   # '{"a":1}'  (e.g. SQLAlchemy json_serializer)
+    json_codec.loads(b'{"a":1}')
+
+Ingested events are validated once and then handed around as one read-only
+payload, `freeze(event.model_dump())`: a FrozenDict (a dict subclass, so
+every JSON encoder and SQLAlchemy JSON column accepts it as is) whose
+nested dicts are frozen too and lists become tuples. Subscribers on the
+buses and the persistence layer then share it without copying and without
+being able to change what the others see.
+"""
+
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+if orjson is not None:
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def dumps_str(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    loads = orjson.loads
+else:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def dumps_str(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+    loads = json.loads
+
+
+class FrozenDict(dict):
+    """dict that refuses mutation after construction."""
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("payload is read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(obj):
+    """Read-only copy of a JSON-like value (dicts -> FrozenDict, lists -> tuples)."""
+    if isinstance(obj, FrozenDict):
+        return obj
+    if isinstance(obj, dict):
+        return FrozenDict((k, freeze(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the fastest available encoder."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -1,46 +1,96 @@
+import argparse
+import os
+import time
 import simpy
 import logging
-from src.simulation import WorldState
-from src.tools import SentinelTools, CompressorTools, LogisticsTools, GeologistTools, SafetyTools
-from src.agents import SentinelAgent, CompressorAgent, LogisticsAgent, GeologistAgent, GuardianAgent
+from src.scenarios import build_simulation, run_scenarios
+from src.checkpoint import save_checkpoint, load_checkpoint
+from src.timeseries import SeriesRecorder
+from src.telemetry import get_shipper
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("Main")
 
-def main():
-    logger.info("Initializing CCS Multi-Agent System Simulation...")
-    
-    # 1. Setup Environment
-    env = simpy.Environment()
-    world = WorldState(env)
-    
-    # 2. Setup Tools
-    sentinel_tools = SentinelTools(world)
-    compressor_tools = CompressorTools(world)
-    logistics_tools = LogisticsTools(world)
-    geologist_tools = GeologistTools(world)
-    safety_tools = SafetyTools(world)
-    
-    # 3. Setup Agents
-    sentinel = SentinelAgent(env, sentinel_tools)
-    compressor = CompressorAgent(env, compressor_tools, world)
-    logistics = LogisticsAgent(env, logistics_tools, world)
-    geologist = GeologistAgent(env, geologist_tools, world)
-    guardian = GuardianAgent(env, safety_tools)
-    
-    # 4. Start Processes
-    world.run() # Start world physics
-    env.process(sentinel.run())
-    env.process(compressor.run())
-    env.process(logistics.run())
-    env.process(geologist.run())
-    env.process(guardian.run())
-    
-    # 5. Run Simulation
-    logger.info("Starting Simulation (Duration: 100 ticks)...")
-    env.run(until=100)
+# Fleet size; compressors are spread round-robin over the sectors
+FLEET = {
+    "n_sectors": int(os.environ.get("CCS_SIM_SECTORS", 1)),
+    "n_tanks": int(os.environ.get("CCS_SIM_TANKS", 1)),
+    "n_trucks": int(os.environ.get("CCS_SIM_TRUCKS", 3)),
+    "n_compressors": int(os.environ.get("CCS_SIM_COMPRESSORS", 1)),
+    "n_wells": int(os.environ.get("CCS_SIM_WELLS", 1)),
+}
+
+def run_once(ticks, seed=None, resume=None, checkpoint_at=None, checkpoint_out=None, series_dir=None):
+    # Per-tick WorldState samples, written as memory-mappable chunks
+    series = SeriesRecorder.from_env(**({"directory": series_dir} if series_dir else {}))
+    if resume:
+        # Continue a saved run (a new branch if a seed is given) for `ticks` more ticks
+        world = load_checkpoint(resume, seed=seed, series=series)
+        env = world.env
+        logger.info(f"Resumed {resume} at t={env.now}")
+    else:
+        logger.info("Initializing CCS Multi-Agent System Simulation...")
+        # Setup environment, world, tools and agents, and start every process
+        env = simpy.Environment()
+        world = build_simulation(env, seed, series=series, **FLEET)
+    until = env.now + ticks
+
+    # Run Simulation
+    logger.info(f"Starting Simulation (Duration: {ticks} ticks)...")
+    if checkpoint_at is not None and env.now < checkpoint_at < until:
+        env.run(until=checkpoint_at)
+        path = save_checkpoint(world, checkpoint_out)
+        logger.info(f"Checkpoint at t={env.now} written to {path}")
+    env.run(until=until)
     logger.info("Simulation Complete.")
+    logger.info(f"Fleet: {world.fleet_stats()}")
+    trace = world.trace
+    if trace.directory:
+        trace.close()
+        logger.info(f"Trace: {trace.total} records in {trace.chunks} chunk(s) under {trace.directory}")
+    if series is not None:
+        series.close()
+        logger.info(f"Series: {series.total} samples in {series.chunks} chunk(s) under {series.directory}")
+
+    shipper = get_shipper()
+    shipper.close()
+    logger.info(f"Telemetry: {shipper.stats()}")
+
+def run_monte_carlo(runs, ticks, seed, workers, checkpoint=None):
+    origin = f" from {checkpoint}" if checkpoint else ""
+    logger.info(f"Running {runs} scenarios of {ticks} ticks{origin} "
+                f"(seed {seed}, {workers or os.cpu_count()} workers)...")
+    start = time.perf_counter()
+    report_every = max(1, runs // 10)
+
+    def progress(summary):
+        if summary.runs % report_every == 0:
+            print(f"{summary.runs}/{runs} runs done")
+
+    summary = run_scenarios(runs, seed=seed, ticks=ticks, workers=workers, fleet=FLEET, progress=progress,
+                            checkpoint=checkpoint)
+    elapsed = time.perf_counter() - start
+    print(summary.format())
+    print(f"{runs / elapsed:,.1f} runs/s over {elapsed:.1f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="CCS multi-agent simulation")
+    parser.add_argument("--ticks", type=int, default=100, help="ticks to run (after the checkpoint with --resume)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for a reproducible run (base seed with --runs)")
+    parser.add_argument("--runs", type=int, default=0, help="run N seeded Monte Carlo scenarios instead of one")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size for --runs (default: all cores)")
+    parser.add_argument("--resume", default=None, help="start from a checkpoint file (--runs: branch every run from it)")
+    parser.add_argument("--checkpoint-at", type=float, default=None, help="save a checkpoint at this simulation time")
+    parser.add_argument("--checkpoint-out", default="checkpoint.npz", help="checkpoint file for --checkpoint-at")
+    parser.add_argument("--series", default=None, help="record per-tick WorldState samples under this directory")
+    args = parser.parse_args()
+
+    if args.runs:
+        run_monte_carlo(args.runs, args.ticks, args.seed or 0, args.workers, checkpoint=args.resume)
+    else:
+        run_once(args.ticks, args.seed, resume=args.resume, checkpoint_at=args.checkpoint_at,
+                 checkpoint_out=args.checkpoint_out, series_dir=args.series)
 
 if __name__ == "__main__":
     main()
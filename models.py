@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Float, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Float, Boolean, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 metadata = Base.metadata
 
+# Every table is read newest-first (or oldest-first) by (timestamp, id), the
+# keyset that queries.list_records() pages on; each filterable column gets a
+# composite (column, timestamp, id) index so a filtered page is one index
+# range scan however many rows the table holds.
+def keyset_indexes(table: str, *columns: str):
+    return (Index(f'ix_{table}_timestamp_id', 'timestamp', 'id'),
+            *(Index(f'ix_{table}_{col}_timestamp_id', col, 'timestamp', 'id') for col in columns))
+
 class PollutionEvent(Base):
     __tablename__ = 'pollution_events'
     id = Column(Integer, primary_key=True, index=True)
@@ -18,6 +26,8 @@ class PollutionEvent(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     raw = Column(JSON)
 
+    __table_args__ = keyset_indexes('pollution_events', 'source_id')
+
 class Tank(Base):
     __tablename__ = 'tanks'
     id = Column(Integer, primary_key=True, index=True)
@@ -29,6 +39,8 @@ class Tank(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     raw = Column(JSON)
 
+    __table_args__ = keyset_indexes('tanks', 'origin')
+
 class TransportManifest(Base):
     __tablename__ = 'transport_manifests'
     id = Column(Integer, primary_key=True, index=True)
@@ -41,6 +53,8 @@ class TransportManifest(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     raw = Column(JSON)
 
+    __table_args__ = keyset_indexes('transport_manifests', 'tank_id', 'origin')
+
 class InjectionReport(Base):
     __tablename__ = 'injection_reports'
     id = Column(Integer, primary_key=True, index=True)
@@ -51,6 +65,8 @@ class InjectionReport(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     raw = Column(JSON)
 
+    __table_args__ = keyset_indexes('injection_reports', 'well_id', 'tank_id')
+
 class GuardianAlert(Base):
     __tablename__ = 'guardian_alerts'
     id = Column(Integer, primary_key=True, index=True)
@@ -62,3 +78,60 @@ class GuardianAlert(Base):
     notify = Column(JSON)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     raw = Column(JSON)
+
+    __table_args__ = keyset_indexes('guardian_alerts')
+
+class CaptureState(Base):
+    __tablename__ = 'capture_states'
+    id = Column(Integer, primary_key=True, index=True)
+    unit_id = Column(String(128))
+    absorber_level = Column(Float)
+    solvent_temp_c = Column(Float)
+    regen_power_kw = Column(Float)
+    chamber_pressure_psi = Column(Float)
+    valves = Column(JSON)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    raw = Column(JSON)
+
+    __table_args__ = keyset_indexes('capture_states', 'unit_id')
+
+class InjectionPlan(Base):
+    __tablename__ = 'injection_plans'
+    id = Column(Integer, primary_key=True, index=True)
+    plan_id = Column(String(128), unique=True, index=True, nullable=False)
+    well_id = Column(String(128))
+    target_formation = Column(String(128))
+    max_injection_pressure_bar = Column(Float)
+    rate_t_per_hour = Column(Float)
+    monitoring_frequency_sec = Column(Integer)
+    start_time = Column(String(64))
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    raw = Column(JSON)
+
+    __table_args__ = keyset_indexes('injection_plans', 'well_id')
+
+class HumanApproval(Base):
+    __tablename__ = 'human_approvals'
+    id = Column(Integer, primary_key=True, index=True)
+    request_id = Column(String(128))
+    required_by = Column(String(128))
+    approved = Column(Boolean)      # NULL while the request is pending
+    approver = Column(String(128))
+    notes = Column(Text)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    raw = Column(JSON)
+
+    __table_args__ = keyset_indexes('human_approvals', 'request_id')
+
+
+def create_schema(bind):
+    """Create missing tables, plus indexes missing from tables that already exist.
+
+    metadata.create_all() skips an existing table together with its
+    indexes, so indexes declared later (keyset_indexes) would never reach
+    an older database without the second pass.
+    """
+    metadata.create_all(bind=bind)
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
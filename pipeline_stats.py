@@ -0,0 +1,72 @@
+"""
+Per-stage worker pool statistics shared by agent_runner.py and
+agent_runner_async.py.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+STAGES = ("compressor", "hauler", "geologist")
+
+
+def stage_workers_from_env():
+    """Pool size per stage from CCS_<STAGE>_WORKERS (default 1 each).
+
+    Each worker handles one item at a time, so the pool size is also the
+    stage's concurrency limit.
+    """
+    return {stage: int(os.environ.get(f"CCS_{stage.upper()}_WORKERS", 1)) for stage in STAGES}
+
+
+def format_snapshot(snap):
+    return (f"{snap['stage']:<10} workers={snap['workers']} active={snap['active']} "
+            f"jobs={snap['jobs']} util={snap['utilization']:.0%} backlog={snap['backlog']} "
+            f"wait_avg={snap['queue_wait_avg_s']:.2f}s wait_max={snap['queue_wait_max_s']:.2f}s")
+
+
+class StageStats:
+    """Utilization and queue-wait counters for one stage's worker pool."""
+
+    def __init__(self, name, workers, sub, clock=time.monotonic):
+        self.name = name
+        self.workers = workers
+        self.sub = sub
+        self.clock = clock  # e.g. a simulated clock's now(), so utilization is in simulated time
+        self.started_at = clock()
+        self.jobs = 0
+        self.active = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def busy(self):
+        """Wrap one unit of work so its duration counts towards utilization."""
+        start = self.clock()
+        with self._lock:
+            self.active += 1
+        completed = False
+        try:
+            yield
+            completed = True
+        finally:
+            # work interrupted by shutdown/cancellation still counts as busy time
+            with self._lock:
+                self.active -= 1
+                self.jobs += completed
+                self.busy_seconds += self.clock() - start
+
+    def snapshot(self):
+        elapsed = max(self.clock() - self.started_at, 1e-9)
+        with self._lock:
+            return {
+                "stage": self.name,
+                "workers": self.workers,
+                "active": self.active,
+                "jobs": self.jobs,
+                "utilization": self.busy_seconds / (elapsed * self.workers),
+                "backlog": self.sub.qsize(),
+                "queue_wait_avg_s": self.sub.wait_avg,
+                "queue_wait_max_s": self.sub.wait_max,
+            }
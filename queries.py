@@ -0,0 +1,145 @@
+"""
+Read side of the persisted records: time-range listing with keyset
+pagination, and lookups by business key.
+
+Pages are ordered by (timestamp, id) and continue from an opaque cursor,
+the (timestamp, id) of the last row returned, rather than an OFFSET:
+
+    page = list_records('pollution_event', source_id='refinery-koyali-01', limit=100)
+    more = list_records('pollution_event', source_id='refinery-koyali-01', limit=100,
+                        cursor=page['next_cursor'])
+
+With the composite indexes declared in models.py, (timestamp, id) and
+(filter column, timestamp, id), every page is a single index range scan
+that reads `limit` rows, so its cost does not grow with the table or with
+how deep the reader has paged. Only one filter column can lead the index;
+any further filters are applied to the rows that range scan visits.
+"""
+
+import base64
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import String, literal, select, tuple_
+
+from crud import RECORD_KINDS
+from db import get_session
+
+# kind -> query parameters that may filter it (each backed by an index)
+FILTERS = {
+    'pollution_event': ('source_id',),
+    'tank': ('origin',),
+    'manifest': ('tank_id', 'origin'),
+    'injection_report': ('well_id', 'tank_id'),
+    'guardian_alert': (),
+    'capture_state': ('unit_id',),
+    'injection_plan': ('well_id',),
+    'human_approval': ('request_id',),
+}
+
+MAX_PAGE = 1000
+
+
+def _as_utc(ts: datetime) -> datetime:
+    """Naive UTC datetime (timestamps are stored as UTC)."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _ts_param(dialect_name: str, ts: datetime):
+    """Bind value comparable with the stored timestamps.
+
+    SQLite keeps timestamps as text, and the server default
+    (CURRENT_TIMESTAMP) writes whole seconds with no fraction, so a datetime
+    bound with its usual '.000000' suffix would sort after equal stored
+    values. Bind the same text form instead.
+    """
+    ts = _as_utc(ts)
+    if dialect_name != 'sqlite':
+        return ts.replace(tzinfo=timezone.utc)
+    text = ts.strftime('%Y-%m-%d %H:%M:%S')
+    if ts.microsecond:
+        text += f'.{ts.microsecond:06d}'
+    return literal(text, String)
+
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f'{_as_utc(ts).isoformat()}|{row_id}'.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        ts, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(ts), int(row_id)
+    except ValueError:
+        raise ValueError(f'Invalid cursor {cursor!r}') from None
+
+
+def _row_dict(row, include_raw: bool) -> Dict[str, Any]:
+    out = dict(row._mapping)
+    if not include_raw:
+        out.pop('raw', None)
+    return out
+
+
+def list_records(kind: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 cursor: Optional[str] = None, limit: int = 100, order: str = 'desc',
+                 include_raw: bool = False, **filters) -> Dict[str, Any]:
+    """One page of `kind` records with since <= timestamp < until, newest first by default.
+
+    `filters` are equality filters on the columns in FILTERS[kind] (None is
+    ignored). Returns {'items': [...], 'next_cursor': str or None}.
+    """
+    model = RECORD_KINDS[kind][0]
+    unknown = set(filters) - set(FILTERS[kind])
+    if unknown:
+        raise ValueError(f'{kind} records cannot be filtered by {sorted(unknown)}')
+    if order not in ('asc', 'desc'):
+        raise ValueError(f"order must be 'asc' or 'desc', got {order!r}")
+    limit = max(1, min(limit, MAX_PAGE))
+    table = model.__table__
+    key = tuple_(table.c.timestamp, table.c.id)
+
+    db = get_session()
+    try:
+        dialect_name = db.get_bind().dialect.name
+        stmt = select(table)
+        for name, value in filters.items():
+            if value is not None:
+                stmt = stmt.where(table.c[name] == value)
+        if since is not None:
+            stmt = stmt.where(table.c.timestamp >= _ts_param(dialect_name, since))
+        if until is not None:
+            stmt = stmt.where(table.c.timestamp < _ts_param(dialect_name, until))
+        if cursor:
+            ts, row_id = decode_cursor(cursor)
+            after = tuple_(_ts_param(dialect_name, ts), literal(row_id))
+            stmt = stmt.where(key < after if order == 'desc' else key > after)
+        if order == 'desc':
+            stmt = stmt.order_by(table.c.timestamp.desc(), table.c.id.desc())
+        else:
+            stmt = stmt.order_by(table.c.timestamp, table.c.id)
+        # one extra row says whether there is a next page
+        rows = db.execute(stmt.limit(limit + 1)).all()
+    finally:
+        db.close()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id) if more else None
+    return {'items': [_row_dict(row, include_raw) for row in rows], 'next_cursor': next_cursor}
+
+
+def get_record(kind: str, key: str, include_raw: bool = True) -> Optional[Dict[str, Any]]:
+    """The record of `kind` whose unique business key equals `key`, or None."""
+    model, _build_row, key_name = RECORD_KINDS[kind]
+    if key_name is None:
+        raise ValueError(f'{kind} records have no unique key; list them with a filter instead')
+    table = model.__table__
+    db = get_session()
+    try:
+        row = db.execute(select(table).where(table.c[key_name] == key)).first()
+    finally:
+        db.close()
+    return _row_dict(row, include_raw) if row is not None else None
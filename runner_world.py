@@ -0,0 +1,37 @@
+"""
+Road network and reservoir shared by agent_runner.py and
+agent_runner_async.py, so both runners haul and inject the same way for
+the same scenario.
+"""
+
+import os
+
+from src.network import default_network, load_network
+from src.reservoir import Reservoir
+
+DEFAULT_RIG = "OFFSHORE_RIG_ALPHA"
+
+
+def build_network(sources):
+    """Road/sea network for the haulers: CCS_NETWORK if set, else every source 2s from the rig.
+
+    Raises ValueError if a source is not a node of the network, since its
+    tanks could never be routed.
+    """
+    path = os.environ.get("CCS_NETWORK")
+    network = load_network(path) if path else default_network(sources, rig=DEFAULT_RIG, road=1, sea=1)
+    check_sources(network, sources)
+    return network
+
+
+def check_sources(network, sources):
+    missing = [s for s in sources if s not in network.nodes]
+    if missing:
+        raise ValueError(f"sources not on the road network: {', '.join(missing)} "
+                         "(add them to CCS_NETWORK or fix CCS_SOURCES)")
+
+
+def build_reservoir():
+    """Injection wells INJ-W-01, ... (CCS_WELLS of them, default 4); time is in seconds."""
+    n_wells = int(os.environ.get("CCS_WELLS", 4))
+    return Reservoir(well_ids=[f"INJ-W-{i + 1:02d}" for i in range(n_wells)])
@@ -1,41 +1,79 @@
 
-from fastapi import FastAPI, BackgroundTasks, Response
-from crud import create_pollution_event, create_tank
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from crud import BulkWriter, RECORD_KINDS, WriterOverloaded
+from db import get_engine
+from models import create_schema
+from dedup import RecentKeys
+from queries import get_record, list_records
 
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 import asyncio
-import json
+import os
 import time
+import uuid
 import queue
 
 from fastapi import APIRouter, Query
-from typing import Any, Dict, List
-import queue
-from server import sync_event_bus   # or import your event bus depending on path
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Literal, Optional
+from event_bus import TopicEventBus, EventHistory, WILDCARD
+from json_codec import FastJSONResponse, freeze
+
+# Shared in-memory event buses
+event_bus = asyncio.Queue()   # async queue for real async use
+sync_event_bus = TopicEventBus()  # topic-routed pub/sub bus for demo/simulation
+
+# Bounded tap of every topic on the sync bus for the debug drain endpoint
+_debug_tap = sync_event_bus.subscribe(WILDCARD, maxlen=1000)
+
+# Offset-addressed ring of recent sync bus traffic for non-destructive readers
+EVENT_HISTORY = sync_event_bus.attach(EventHistory(capacity=10000))
+
+def read_history(after: int, limit: int) -> Dict[str, Any]:
+    """Cursor read over EVENT_HISTORY; pass back `next_after` to continue."""
+    records = EVENT_HISTORY.read(after, limit)
+    events = [dict(item, offset=offset) for offset, item in records]
+    return {
+        "drained": len(events),
+        "events": events,
+        "next_after": records[-1][0] if records else max(after, EVENT_HISTORY.start_offset - 1),
+        "end_offset": EVENT_HISTORY.end_offset,
+    }
 
 router = APIRouter()
 
 @router.get("/debug/drain_events")
-def drain_events(limit: int = Query(50, ge=1, le=500)) -> Dict[str, Any]:
+def drain_events(limit: int = Query(50, ge=1, le=500),
+                 after: Optional[int] = Query(None, ge=-1)) -> Dict[str, Any]:
     """
-    Drain up to N events from sync_event_bus and return them.
+    Drain up to N events seen on sync_event_bus and return them.
     Dashboard-friendly format.
+
+    With `after=<offset>` nothing is consumed: events with a larger offset
+    are returned from EVENT_HISTORY and each reader keeps its own position.
     """
+    if after is not None:
+        return read_history(after, limit)
     drained_events: List[Dict[str, Any]] = []
     for _ in range(limit):
         try:
-            item = sync_event_bus.get_nowait()
+            item = _debug_tap.get_nowait()
             drained_events.append(item)
         except queue.Empty:
             break
     return {"drained": len(drained_events), "events": drained_events}
 
-# Shared in-memory event buses
-event_bus = asyncio.Queue()   # async queue for real async use
-sync_event_bus = queue.Queue()  # synchronous queue for demo/simulation
-
-app = FastAPI(title="CCS Multi-Agent API (Sim Prototype)")
+app = FastAPI(
+    title="CCS Multi-Agent API (Sim Prototype)",
+    description="POST endpoints publish the record on the event buses and queue it for the database. "
+                "The response is sent before the row is committed: a commit happens within "
+                "CCS_DB_BATCH_DELAY seconds and is retried on failure. Read records back with "
+                "GET /records/{kind}. A 503 means the write queue is full and nothing was recorded.",
+    default_response_class=FastJSONResponse,
+)
 
 class PollutionEvent(BaseModel):
     event_id: str
@@ -55,10 +93,134 @@ class TankReady(BaseModel):
     origin: str
     timestamp: str
 
+class CaptureState(BaseModel):
+    unit_id: str
+    absorber_level: float | None = None
+    solvent_temp_c: float | None = None
+    regen_power_kw: float | None = None
+    chamber_pressure_psi: float | None = None
+    valves: Dict[str, str] | None = None
+    timestamp: str
+
+class TransportManifest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    manifest_id: str
+    tank_id: str
+    assigned_vehicle: str
+    from_: str = Field(alias='from')
+    to: str
+    route: List[str] | None = None
+    eta: str
+    constraints: Dict[str, Any] | None = None
+
+class InjectionPlan(BaseModel):
+    well_id: str
+    target_formation: str
+    max_injection_pressure_bar: float
+    rate_t_per_hour: float
+    monitoring_frequency_sec: int | None = None
+    start_time: str | None = None
+
+class GuardianAlert(BaseModel):
+    alert_id: str
+    severity: Literal['low', 'medium', 'high', 'critical']
+    reason: str
+    action: Literal['INFO', 'PAUSE_INJECTION', 'EMERGENCY_STOP', 'ISOLATE', 'NOTIFY']
+    details: Dict[str, Any] | None = None
+    notify: List[str] | None = None
+    timestamp: str
+
+class HumanApprovalRequest(BaseModel):
+    request_id: str
+    context: Dict[str, Any]
+    required_by: str
+    timeout_seconds: int = 3600
+    # set when an operator posts the decision back; absent while pending
+    approved: bool | None = None
+    approver: str | None = None
+    notes: str | None = None
+
+async def parse_payload(request: Request, model, **extra) -> Dict[str, Any]:
+    """Validate the raw request body against `model` once and return it as a read-only payload.
+
+    pydantic parses the bytes directly (no json.loads into an intermediate
+    dict), and the frozen dict is shared by the buses and persistence.
+    `extra` adds server-assigned fields (ids) before freezing.
+    """
+    try:
+        event = model.model_validate_json(await request.body())
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors(include_url=False))
+    data = event.model_dump(by_alias=True)
+    data.update(extra)
+    return freeze(data)
+
+def json_body(model) -> Dict[str, Any]:
+    """openapi_extra documenting a body that is parsed by hand with parse_payload()."""
+    return {'requestBody': {'required': True,
+                            'content': {'application/json': {'schema': model.model_json_schema(by_alias=True)}}}}
+
+# Persistence runs on the BulkWriter's flusher thread: handlers only buffer
+# the row, so a slow database never blocks the event loop. Rows are committed
+# within CCS_DB_BATCH_DELAY seconds, or as soon as CCS_DB_BATCH_ROWS are queued.
+# A failed commit is retried CCS_DB_MAX_RETRIES times with backoff starting at
+# CCS_DB_RETRY_BACKOFF seconds; once CCS_DB_MAX_PENDING rows are waiting,
+# writes are refused with a 503 so clients back off and retry.
+# Resent records (client retries, replays) are caught by the writer's cache of
+# the last CCS_DEDUP_CAPACITY event/tank/manifest/alert/plan ids before they
+# reach the buses or the database.
+DB_WRITER = BulkWriter(
+    max_rows=int(os.environ.get('CCS_DB_BATCH_ROWS', 500)),
+    max_delay=float(os.environ.get('CCS_DB_BATCH_DELAY', 0.2)),
+    recent=RecentKeys.from_env(),
+    max_pending=int(os.environ.get('CCS_DB_MAX_PENDING', 50000)),
+    max_retries=int(os.environ.get('CCS_DB_MAX_RETRIES', 3)),
+    retry_backoff=float(os.environ.get('CCS_DB_RETRY_BACKOFF', 0.5)),
+)
+OVERLOAD_RETRY_AFTER_S = 1
+
+# OpenAPI responses shared by every endpoint that writes through DB_WRITER
+QUEUED_WRITE = {503: {'description': 'Too many rows waiting to be committed '
+                                     '(CCS_DB_MAX_PENDING); nothing was recorded, retry after Retry-After seconds'}}
+
+async def publish(topic: str, payload, kind: Optional[str] = None) -> bool:
+    """Queue one payload for persistence as `kind` and put it on both buses.
+
+    Returns False, and publishes nothing, if the payload's key was seen recently.
+    Raises a 503 HTTPException, and publishes nothing, if the writer is backed up.
+    """
+    if kind is not None:
+        try:
+            if not DB_WRITER.add(kind, payload):
+                return False
+        except WriterOverloaded as exc:
+            raise HTTPException(status_code=503, detail=f'Persistence backlog full ({exc.pending} rows pending)',
+                                headers={'Retry-After': str(OVERLOAD_RETRY_AFTER_S)})
+    item = {'type': topic, 'payload': payload}
+    # push to both async and sync buses for demo interoperability
+    await event_bus.put(item)
+    try:
+        sync_event_bus.put_nowait(item)
+    except Exception:
+        pass
+    return True
+
 @app.on_event('startup')
 async def startup_event():
+    # tables and keyset indexes added since the database was created
+    try:
+        await asyncio.to_thread(create_schema, get_engine())
+    except SQLAlchemyError as exc:
+        print(f'API startup: could not create the database schema ({exc}); writes will be retried.')
+    DB_WRITER.start()
     print('API startup: event bus ready.')
 
+@app.on_event('shutdown')
+async def shutdown_event():
+    # flush what is still buffered without holding up other shutdown hooks
+    await asyncio.to_thread(DB_WRITER.close)
+
 @app.get('/health')
 def health():
     return {'status':'OK','timestamp':time.time()}
@@ -68,36 +230,116 @@ def root():
 @app.get('/favicon.ico')
 def favicon():
     return Response(status_code=204)
+@app.get('/debug/db_writer')
+def db_writer_stats():
+    """Rows buffered, pending, inserted, skipped as duplicates, requeued and failed by the background writer."""
+    return dict(DB_WRITER.stats, pending=DB_WRITER.pending, max_pending=DB_WRITER.max_pending,
+                max_rows=DB_WRITER.max_rows, max_delay=DB_WRITER.max_delay)
+@app.get('/debug/dedup')
+def dedup_stats():
+    """Hits (duplicates rejected), misses and evictions of the recent-id cache."""
+    if DB_WRITER.recent is None:
+        return {'enabled': False}
+    return dict(DB_WRITER.recent.snapshot(), enabled=True)
 
 
 
-@app.post('/events/pollution', status_code=202)
-async def post_pollution(event: PollutionEvent):
-    payload = {'type':'pollution_event', 'payload': json.loads(event.json())}
-    # push to both async and sync buses for demo interoperability
-    await event_bus.put(payload)
-    try:
-        sync_event_bus.put_nowait(payload)
-    except Exception:
-        pass
-    create_pollution_event(json.loads(event.json()))
-    return {'status':'accepted','event_id': event.event_id}
+@app.post('/events/pollution', status_code=202, openapi_extra=json_body(PollutionEvent), responses=QUEUED_WRITE)
+async def post_pollution(request: Request):
+    event = await parse_payload(request, PollutionEvent)
+    if not await publish('pollution_event', event, 'pollution_event'):
+        return {'status':'duplicate','event_id': event['event_id']}
+    return {'status':'accepted','event_id': event['event_id']}
 
-@app.post('/capture/tank_ready', status_code=201)
-async def post_tank_ready(tank: TankReady):
-    payload = {'type':'tank_ready', 'payload': json.loads(tank.json())}
-    await event_bus.put(payload)
-    try:
-        sync_event_bus.put_nowait(payload)
-    except Exception:
-        pass
-    return {'status':'scheduled','tank_id': tank.tank_id}
+@app.post('/capture/state', openapi_extra=json_body(CaptureState), responses=QUEUED_WRITE)
+async def post_capture_state(request: Request):
+    state = await parse_payload(request, CaptureState)
+    await publish('capture_state', state, 'capture_state')
+    return {'status':'success','message': f"state of {state['unit_id']} recorded"}
+
+@app.post('/capture/tank_ready', status_code=201, openapi_extra=json_body(TankReady), responses=QUEUED_WRITE)
+async def post_tank_ready(request: Request):
+    tank = await parse_payload(request, TankReady)
+    if not await publish('tank_ready', tank, 'tank'):
+        return {'status':'duplicate','tank_id': tank['tank_id']}
+    return {'status':'scheduled','tank_id': tank['tank_id']}
+
+@app.post('/transport/manifest', openapi_extra=json_body(TransportManifest), responses=QUEUED_WRITE)
+async def post_manifest(request: Request):
+    manifest = await parse_payload(request, TransportManifest)
+    if not await publish('transport_manifest', manifest, 'manifest'):
+        return {'status':'duplicate','message': f"manifest {manifest['manifest_id']} already received"}
+    return {'status':'success','message': f"manifest {manifest['manifest_id']} created"}
+
+@app.post('/sequestration/injection_plan', openapi_extra=json_body(InjectionPlan), responses=QUEUED_WRITE)
+async def post_injection_plan(request: Request):
+    plan_id = f"INJ-PL-{time.strftime('%Y%m%d')}-{uuid.uuid4().hex[:8]}"
+    plan = await parse_payload(request, InjectionPlan, plan_id=plan_id)
+    await publish('injection_plan', plan, 'injection_plan')
+    return {'plan_id': plan_id, 'accepted': True}
+
+@app.post('/safety/alerts', status_code=202, openapi_extra=json_body(GuardianAlert), responses=QUEUED_WRITE)
+async def post_alert(request: Request):
+    alert = await parse_payload(request, GuardianAlert)
+    if not await publish('guardian_alert', alert, 'guardian_alert'):
+        return {'status':'duplicate','message': f"alert {alert['alert_id']} already received"}
+    return {'status':'accepted','message': f"alert {alert['alert_id']} ({alert['severity']}) received"}
+
+@app.post('/human/approval', openapi_extra=json_body(HumanApprovalRequest), responses=QUEUED_WRITE)
+async def post_human_approval(request: Request):
+    """Record an approval request, or an operator's decision on one (`approved` set)."""
+    approval = await parse_payload(request, HumanApprovalRequest, received_at=time.time())
+    await publish('human_approval', approval, 'human_approval')
+    return {'request_id': approval['request_id'], 'approved': approval['approved'],
+            'approver': approval['approver'], 'notes': approval['notes'],
+            'timestamp': datetime.fromtimestamp(approval['received_at'], timezone.utc).isoformat()}
 
 @app.get('/debug/drain_events')
-async def drain_events(limit: int = 20):
+async def drain_events(limit: int = Query(20, ge=1, le=500), after: Optional[int] = Query(None, ge=-1)):
+    """Pop up to `limit` events, or with `after=<offset>` read them without consuming."""
+    if after is not None:
+        return read_history(after, limit)
     events = []
     for _ in range(limit):
         if event_bus.empty():
             break
         events.append(await event_bus.get())
     return {'drained': len(events), 'events': events}
+
+# ------------------------------------------------------------
+# Reading persisted records (sync handlers: they run in the threadpool)
+# ------------------------------------------------------------
+RecordKind = Literal[tuple(RECORD_KINDS)]
+
+@app.get('/records/{kind}')
+def get_records(kind: RecordKind,
+                since: Optional[datetime] = Query(None, description='timestamp >= since (UTC if no offset)'),
+                until: Optional[datetime] = Query(None, description='timestamp < until'),
+                source_id: Optional[str] = None, origin: Optional[str] = None,
+                tank_id: Optional[str] = None, well_id: Optional[str] = None,
+                unit_id: Optional[str] = None, request_id: Optional[str] = None,
+                cursor: Optional[str] = Query(None, description='next_cursor of the previous page'),
+                limit: int = Query(100, ge=1, le=1000),
+                order: Literal['asc', 'desc'] = 'desc',
+                include_raw: bool = False):
+    """Page through `kind` records by (timestamp, id); pass `next_cursor` back as `cursor` to continue."""
+    filters = {name: value for name, value in (('source_id', source_id), ('origin', origin),
+                                               ('tank_id', tank_id), ('well_id', well_id),
+                                               ('unit_id', unit_id), ('request_id', request_id))
+               if value is not None}
+    try:
+        return list_records(kind, since=since, until=until, cursor=cursor, limit=limit,
+                            order=order, include_raw=include_raw, **filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+@app.get('/records/{kind}/{key}')
+def get_record_by_key(kind: RecordKind, key: str):
+    """Look a record up by its business key (event_id, tank_id, manifest_id, alert_id, plan_id)."""
+    try:
+        record = get_record(kind, key)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if record is None:
+        raise HTTPException(status_code=404, detail=f'No {kind} {key!r}')
+    return record
@@ -1,22 +1,30 @@
 
-import time, sys, os
-from datetime import datetime
+import argparse, time, sys, os
 sys.path.append(os.path.dirname(__file__))
+import queue
 import server
-# use server.sync_event_bus
+from sim_clock import make_clock
+# use server.sync_event_bus (topic-routed, see event_bus.py)
 
 def push_sync(evt_type, payload):
-    try:
-        server.sync_event_bus.put_nowait({'type': evt_type, 'payload': payload})
-    except Exception:
-        pass
+    server.sync_event_bus.publish(evt_type, payload)
 
-def run_sim(duration=30, sentinel_interval=6):
+TICK_SECONDS = 0.05  # clock time per step; 0.05 s keeps real-time demos readable
+
+def run_sim(duration=30, sentinel_interval=6, clock=None):
+    """Run `duration` steps; `clock` (default CCS_CLOCK) paces them, see sim_clock.py."""
+    clock = clock or make_clock()
+    clock.add_participants()  # this loop is the clock's only participant
     now = 0
     capture_in_progress = None
     capture_timer = 0
     capture_time = 5  # hours
     hauler_tasks = []
+    bus = server.sync_event_bus
+    comp_sub = bus.subscribe('pollution_event')
+    haul_sub = bus.subscribe('tank_ready')
+    geo_sub = bus.subscribe('delivered_to_port')
+    guard_sub = bus.subscribe('injection_report', 'guardian_alert')
     print('Starting synchronous time-stepped simulation for', duration, 'time units')
     while now < duration:
         # Sentinel emits every sentinel_interval
@@ -27,24 +35,21 @@ def run_sim(duration=30, sentinel_interval=6):
                 'source_type': 'point_source',
                 'species': {'CO2': 5000 + now*10},
                 'units': {'CO2': 'ppm'},
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
+                'timestamp': clock.utcnow().isoformat() + 'Z',
                 'confidence': 0.98,
                 'feasibility_flag': True
             }
             print(f'[{now:3}] Sentinel emits pollution_event -> CO2={evt["species"]["CO2"]} ppm')
             push_sync('pollution_event', evt)
-        # Compressor: if not working and there's a pollution_event in queue, start capture
-        try:
-            item = server.sync_event_bus.get_nowait()
-            if item['type'] == 'pollution_event' and capture_in_progress is None:
+        # Compressor: if not working and there's a pollution_event waiting, start capture
+        if capture_in_progress is None:
+            try:
+                item = comp_sub.get_nowait()
                 capture_in_progress = item['payload']
                 capture_timer = capture_time
                 print(f'[{now:3}] Compressor: started capture for {capture_in_progress["event_id"]}')
-            else:
-                # requeue unknown items
-                push_sync(item['type'], item['payload'])
-        except Exception:
-            pass
+            except queue.Empty:
+                pass
         # Continue capture if in progress
         if capture_in_progress is not None:
             capture_timer -= 1
@@ -56,22 +61,19 @@ def run_sim(duration=30, sentinel_interval=6):
                     'pressure_psi': 2950.0,
                     'sealed': True,
                     'origin': capture_in_progress['source_id'],
-                    'timestamp': datetime.utcnow().isoformat() + 'Z'
+                    'timestamp': clock.utcnow().isoformat() + 'Z'
                 }
                 print(f'[{now:3}] Compressor: tank sealed -> {tank["tank_id"]}')
                 push_sync('tank_ready', tank)
                 capture_in_progress = None
         # Hauler: check for tank_ready events and start transport tasks
         try:
-            item = server.sync_event_bus.get_nowait()
-            if item['type'] == 'tank_ready':
-                tank = item['payload']
-                task = {'tank': tank, 'time_left': 2, 'vehicle': f'HV-TRUCK-{now}'}
-                hauler_tasks.append(task)
-                print(f'[{now:3}] Hauler: assigned {task["vehicle"]} for {tank["tank_id"]}')
-            else:
-                push_sync(item['type'], item['payload'])
-        except Exception:
+            item = haul_sub.get_nowait()
+            tank = item['payload']
+            task = {'tank': tank, 'time_left': 2, 'vehicle': f'HV-TRUCK-{now}'}
+            hauler_tasks.append(task)
+            print(f'[{now:3}] Hauler: assigned {task["vehicle"]} for {tank["tank_id"]}')
+        except queue.Empty:
             pass
         # Progress hauler tasks
         for task in hauler_tasks[:]:
@@ -83,30 +85,34 @@ def run_sim(duration=30, sentinel_interval=6):
                 hauler_tasks.remove(task)
         # Geologist: check for delivered_to_port and inject
         try:
-            item = server.sync_event_bus.get_nowait()
-            if item['type'] == 'delivered_to_port':
-                manifest = item['payload']
-                print(f'[{now:3}] Geologist: analyzing {manifest["tank_id"]} for injection')
-                # simplified safety check - pass
-                push_sync('injection_report', {'well_id':'INJ-W-04','tank_id':manifest['tank_id'],'status':'injected','mass_tonnes':5.0,'timestamp': datetime.utcnow().isoformat() + 'Z'})
-            else:
-                push_sync(item['type'], item['payload'])
-        except Exception:
+            item = geo_sub.get_nowait()
+            manifest = item['payload']
+            print(f'[{now:3}] Geologist: analyzing {manifest["tank_id"]} for injection')
+            # simplified safety check - pass
+            push_sync('injection_report', {'well_id':'INJ-W-04','tank_id':manifest['tank_id'],'status':'injected','mass_tonnes':5.0,'timestamp': clock.utcnow().isoformat() + 'Z'})
+        except queue.Empty:
             pass
         # Guardian: consume injection_report or guardian_alert
         try:
-            item = server.sync_event_bus.get_nowait()
+            item = guard_sub.get_nowait()
             if item['type'] == 'injection_report':
                 print(f'[{now:3}] Guardian: injection report OK for {item["payload"]["tank_id"]}')
             elif item['type'] == 'guardian_alert':
                 print(f'[{now:3}] Guardian: ALERT ->', item['payload'])
-            else:
-                push_sync(item['type'], item['payload'])
-        except Exception:
+        except queue.Empty:
             pass
         now += 1
-        time.sleep(0.05)  # slow down for readability in demo
+        clock.sleep(TICK_SECONDS)
+    clock.leave()
+    for sub in (comp_sub, haul_sub, geo_sub, guard_sub):
+        sub.unsubscribe()
     print('Simulation complete.')
 
 if __name__ == '__main__':
-    run_sim(30)
+    parser = argparse.ArgumentParser(description='Synchronous time-stepped CCS simulation')
+    parser.add_argument('duration', nargs='?', type=int, default=30, help='time units to simulate')
+    parser.add_argument('--clock', default=None, help='realtime, a speed-up such as 100x, or virtual (default: CCS_CLOCK)')
+    args = parser.parse_args()
+    started = time.monotonic()
+    run_sim(args.duration, clock=make_clock(args.clock))
+    print(f'Ran {args.duration} time units in {time.monotonic() - started:.2f}s')
@@ -0,0 +1,221 @@
+"""
+Shared clock for the demo runners (sim.py, agent_runner.py).
+
+All simulated delays go through a clock instead of time.sleep, so the same
+scenario can run
+
+    RealClock()            real time (demos)
+    RealClock(scale=100)   100x faster than real time
+    VirtualClock()         as fast as possible: virtual time jumps straight
+                           to the next wake-up once every agent is idle
+
+Select one with make_clock("realtime" | "100x" | "virtual") or the CCS_CLOCK
+environment variable.
+
+VirtualClock is a discrete-event clock for threads. Every agent thread is a
+registered participant (create them with clock.thread()) and only waits
+through the clock: clock.sleep() for simulated work and clock.get(sub) for
+bus input. Time advances only when every participant is blocked in one of
+those calls and no waiting subscription has unread items, so ordering
+between agents matches real time. Publishers call clock.notify() so idle
+consumers see new items.
+"""
+
+import heapq
+import itertools
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+class RealClock:
+    """Wall-clock time, optionally sped up by `scale`."""
+
+    virtual = False
+
+    def __init__(self, scale=1.0, start=None):
+        if scale <= 0:
+            raise ValueError(f"clock scale must be positive, got {scale}")
+        self.scale = scale
+        self.start = start or datetime.utcnow()
+        self._t0 = time.monotonic()
+
+    def now(self):
+        """Simulated seconds since the clock started."""
+        return (time.monotonic() - self._t0) * self.scale
+
+    def utcnow(self):
+        return self.start + timedelta(seconds=self.now())
+
+    def time(self):
+        """Simulated UNIX timestamp (like time.time())."""
+        return self.utcnow().timestamp()
+
+    def sleep(self, seconds):
+        time.sleep(seconds / self.scale)
+
+    def wait(self, event, timeout):
+        """event.wait() for `timeout` simulated seconds; True if the event is set."""
+        return event.wait(timeout / self.scale)
+
+    def get(self, sub, timeout=None):
+        """Next item from a bus subscription; raises queue.Empty on timeout (a poll interval)."""
+        return sub.get(timeout=timeout)
+
+    def wait_until(self, t):
+        remaining = t - self.now()
+        if remaining > 0:
+            time.sleep(remaining / self.scale)
+
+    def add_participants(self, n=1):
+        pass
+
+    def leave(self):
+        pass
+
+    def thread(self, target, args=(), name=None):
+        return threading.Thread(target=target, args=args, daemon=True, name=name)
+
+    def notify(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class VirtualClock:
+    """As-fast-as-possible virtual time for a fixed set of participant threads."""
+
+    virtual = True
+
+    def __init__(self, start=None):
+        self.start = start or datetime.utcnow()
+        self._now = 0.0
+        self._cond = threading.Condition()
+        self._sleepers = []  # heap of (wake_at, seq)
+        self._seq = itertools.count()
+        self._participants = 0
+        self._idle = 0
+        self._waiting_subs = []
+        self._stopped = False
+        self.advances = 0
+
+    def now(self):
+        return self._now
+
+    def utcnow(self):
+        return self.start + timedelta(seconds=self._now)
+
+    def time(self):
+        return self.utcnow().timestamp()
+
+    # ------------------------------------------------------------------
+    # Participants
+    # ------------------------------------------------------------------
+    def add_participants(self, n=1):
+        with self._cond:
+            self._participants += n
+
+    def leave(self):
+        with self._cond:
+            self._participants -= 1
+            self._maybe_advance()
+
+    def thread(self, target, args=(), name=None):
+        """Unstarted daemon thread, registered as a participant right away.
+
+        Registering before start() means an early thread can't advance the
+        clock while later ones are still starting up.
+        """
+        self.add_participants()
+
+        def run():
+            try:
+                target(*args)
+            finally:
+                self.leave()
+        return threading.Thread(target=run, daemon=True, name=name)
+
+    # ------------------------------------------------------------------
+    # Waiting
+    # ------------------------------------------------------------------
+    def _maybe_advance(self):
+        # caller holds self._cond
+        if self._stopped or self._idle < self._participants or not self._sleepers:
+            return
+        if any(sub.qsize() for sub in self._waiting_subs):
+            return  # a woken consumer has yet to pick up its item
+        self._now = max(self._now, self._sleepers[0][0])
+        while self._sleepers and self._sleepers[0][0] <= self._now:
+            heapq.heappop(self._sleepers)
+            self._idle -= 1  # runnable again; the sleeper doesn't decrement itself
+        self.advances += 1
+        self._cond.notify_all()
+
+    def sleep(self, seconds):
+        with self._cond:
+            if self._stopped or seconds <= 0:
+                return
+            wake_at = self._now + seconds
+            heapq.heappush(self._sleepers, (wake_at, next(self._seq)))
+            self._idle += 1
+            self._maybe_advance()
+            while self._now < wake_at and not self._stopped:
+                self._cond.wait()
+
+    def wait(self, event, timeout):
+        self.sleep(timeout)
+        return event.is_set()
+
+    def get(self, sub, timeout=None):
+        """Next item from `sub`, idle until one is published; queue.Empty once stopped.
+
+        `timeout` is ignored: in virtual time waiting for input costs nothing,
+        and stop() releases every waiter.
+        """
+        with self._cond:
+            while True:
+                if self._stopped:
+                    raise queue.Empty
+                try:
+                    return sub.get_nowait()
+                except queue.Empty:
+                    pass
+                self._idle += 1
+                self._waiting_subs.append(sub)
+                self._maybe_advance()
+                self._cond.wait()
+                self._waiting_subs.remove(sub)
+                self._idle -= 1
+
+    def wait_until(self, t):
+        """Block a non-participant (e.g. the main thread) until virtual time reaches `t`."""
+        with self._cond:
+            while self._now < t and not self._stopped:
+                self._cond.wait()
+
+    def notify(self):
+        """Wake idle consumers after publishing to the bus."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def stop(self):
+        """Release every sleeper and waiter; later sleeps return immediately."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+
+def make_clock(spec=None):
+    """Build a clock from "realtime", "virtual" (or "fast") or a speed-up like "100" / "100x"."""
+    spec = (spec or os.environ.get("CCS_CLOCK", "realtime")).strip().lower()
+    if spec in ("realtime", "real"):
+        return RealClock()
+    if spec in ("virtual", "fast", "afap"):
+        return VirtualClock()
+    try:
+        return RealClock(scale=float(spec.rstrip("x")))
+    except ValueError:
+        raise ValueError(f"Unknown clock {spec!r}; expected realtime, virtual or a scale such as 100x") from None
@@ -1,92 +1,229 @@
+import math
 import simpy
 import logging
+from .simulation import SEALED, DELIVERED, Resumable
 from .tools import SentinelTools, CompressorTools, LogisticsTools, GeologistTools, SafetyTools
+from .trace import define
 
 logger = logging.getLogger("Agents")
 
-class SentinelAgent:
+INFO = logging.INFO
+SPIKE = define("spike", "sensor", INFO,
+               "[Sentinel] POLLUTION SPIKE DETECTED! Signaling Compressor. NOx={a:g}, CO2={b:g}", "Agents")
+NO_TANK = define("no_tank", "compressor", INFO, "[{subject}] No empty tank available. Waiting.", "Agents")
+INTAKE = define("intake", "compressor", INFO, "[{subject}] Received capture signal. Starting intake.", "Agents")
+HANDOFF = define("handoff", "compressor", INFO, "[{subject}] {detail} sealed. Signaling Logistics.", "Agents")
+TRANSPORT_READY = define("transport_ready", "logistics", INFO, "[Logistics] {subject} ready for transport.", "Agents")
+TRUCK_ARRIVED = define("truck_arrived", "logistics", INFO,
+                       "[Logistics] {detail} arrived at Offshore Platform with {subject}.", "Agents")
+TANK_ARRIVED = define("tank_arrived", "geology", INFO, "[Geologist] {subject} arrived. Analyzing seabed...", "Agents")
+UNSAFE = define("unsafe", "geology", logging.ERROR, "[Geologist] UNSAFE CONDITIONS. Halting injection.", "Agents")
+LEAK = define("leak", "safety", logging.CRITICAL, "[Guardian] LEAK DETECTED! INITIATING EMERGENCY STOP.", "Agents")
+
+class SentinelAgent(Resumable):
     def __init__(self, env, tools: SentinelTools):
         self.env = env
         self.tools = tools
+        self.world = tools.world
 
     def run(self):
+        # Monitor every 2 seconds
+        if not (yield from self.resume()):
+            yield self.timeout(2)
         while True:
-            # Monitor every 2 seconds
-            yield self.env.timeout(2)
             levels = self.tools.read_sensors("Sector-7")
             if levels["NOx"] > 40 or levels["CO2"] > 800:
-                logger.info("[Sentinel] POLLUTION SPIKE DETECTED! Signaling Compressor.")
+                self.world.trace.emit(SPIKE, "Sector-7", a=levels["NOx"], b=levels["CO2"])
                 # In a real event bus, we'd publish an event. 
                 # Here, we rely on the shared world state that the Compressor observes.
+            yield self.timeout(2)
 
-class CompressorAgent:
-    def __init__(self, env, tools: CompressorTools, world):
+class CompressorAgent(Resumable):
+    def __init__(self, env, tools: CompressorTools, world, name="Compressor-1", sector=0):
         self.env = env
         self.tools = tools
         self.world = world
+        self.name = name
+        self.sector = sector
+        self.tank = None
 
     def run(self):
+        world = self.world
+        spike = "pollution_spike" if self.sector == 0 else ("sector_spike", self.sector)
+        origin = f"Refinery-{world.sector_ids[self.sector]}"
+        yield from self.resume()
         while True:
-            yield self.env.timeout(1)
-            if self.world.pollution_event_active:
-                logger.info("[Compressor] Received capture signal. Starting intake.")
-                # Simulate capture process
-                gas = self.world.pollution_level
-                captured = self.tools.activate_scrubber(gas)
-                
-                if captured:
-                    status = self.tools.check_tank_pressure("Tank-001")
-                    if status == "SEALED":
-                        logger.info("[Compressor] Tank sealed. Signaling Logistics.")
-
-class LogisticsAgent:
-    def __init__(self, env, tools: LogisticsTools, world):
+            if not world.sector_event_active[self.sector]:
+                # Idle until our sector crosses a threshold
+                yield self.wait_for(spike)
+            if self.tank is None:
+                self.tank = self.tools.claim_tank(origin)
+                if self.tank is None:
+                    world.trace.emit(NO_TANK, self.name)
+                    yield self.wait_for("tank_emptied")
+                    continue
+            world.trace.emit(INTAKE, self.name)
+            # Simulate capture process
+            gas = {"NOx": int(world.nox[self.sector]), "CO2": int(world.co2[self.sector])}
+            captured = self.tools.activate_scrubber(gas, self.tank.tank_id)
+
+            if captured:
+                status = self.tools.check_tank_pressure(self.tank.tank_id)
+                if status == "SEALED":
+                    world.trace.emit(HANDOFF, self.name, self.tank.tank_id)
+                    self.tank = None
+            # Keep capturing once per tick while the event lasts
+            yield self.timeout(1)
+
+    def state(self):
+        return dict(super().state(), name=self.name, sector=self.sector,
+                    tank_id=self.tank.tank_id if self.tank else None)
+
+    def load_state(self, state):
+        super().load_state(state)
+        self.name = state["name"]
+        self.sector = state["sector"]
+        self.tank = self.world.tanks[state["tank_id"]] if state["tank_id"] else None
+
+class LogisticsAgent(Resumable):
+    def __init__(self, env, tools: LogisticsTools, world, destination="OFFSHORE"):
         self.env = env
         self.tools = tools
         self.world = world
+        self.destination = destination
+        self.hauls = [] # in progress, oldest first
 
     def run(self):
+        """Queues every sealed tank and starts a haul for it; hauls contend for trucks."""
+        yield from self.resume()
         while True:
-            yield self.env.timeout(1)
-            if self.world.is_tank_sealed and self.world.truck_location != "OFFSHORE":
-                logger.info("[Logistics] Tank ready for transport.")
-                success = self.tools.dispatch_truck("Tank-001", "OFFSHORE")
-                if success:
-                    yield self.env.timeout(5) # Travel time
-                    logger.info("[Logistics] Arrived at Offshore Platform.")
-
-class GeologistAgent:
+            tank = self.world.tanks.first(SEALED)
+            if tank is None:
+                yield self.wait_for("tank_sealed")
+                continue
+            self.world.trace.emit(TRANSPORT_READY, tank.tank_id)
+            if self.tools.request_transport(tank.tank_id):
+                self.start_haul(Haul(self, tank.tank_id))
+
+    def start_haul(self, haul):
+        self.hauls.append(haul)
+        self.env.process(haul.run())
+
+class Haul(Resumable):
+    """One tank's trip: queue for a truck, drive to the destination, unload,
+    drive back to the nearest depot.
+
+    Leg times are shortest paths on world.network, taken when the leg
+    starts; a loaded truck with no open route waits for "network_changed".
+    """
+
+    def __init__(self, agent, tank_id, requested=None):
+        self.agent = agent
+        self.world = agent.world
+        self.tank_id = tank_id
+        self.requested = agent.env.now if requested is None else requested
+        self.truck = None
+        self.phase = "queued" # queued -> loaded -> outbound -> unloaded -> return
+
+    def run(self):
+        agent, tools, world = self.agent, self.agent.tools, self.world
+        network = world.network
+        if self.waiting == "network_changed":
+            self.waiting = None # restored: the route is re-checked below, the network may have changed since
+        yield from self.resume()
+        if self.phase == "queued":
+            # Our place in the truck queue
+            self.wait_seq = world.next_wait_seq()
+            self.truck = yield from tools.dispatch_truck(self.tank_id, agent.destination, self.requested)
+            self.phase = "loaded"
+        if self.phase == "loaded":
+            trip = network.travel_time(world.tanks[self.tank_id].origin, agent.destination)
+            while trip == math.inf:
+                yield self.wait_for("network_changed")
+                trip = network.travel_time(world.tanks[self.tank_id].origin, agent.destination)
+            self.phase = "outbound"
+            yield self.timeout(trip)
+        if self.phase == "outbound":
+            world.trace.emit(TRUCK_ARRIVED, self.tank_id, self.truck.truck_id)
+            tools.arrive(self.truck, agent.destination)
+            self.phase = "unloaded"
+        if self.phase == "unloaded":
+            _, trip = network.nearest(agent.destination, "depot")
+            while trip == math.inf:
+                yield self.wait_for("network_changed")
+                _, trip = network.nearest(agent.destination, "depot")
+            self.phase = "return"
+            yield self.timeout(trip) # Return trip
+        yield from tools.return_truck(self.truck)
+        agent.hauls.remove(self)
+
+    def state(self):
+        return dict(super().state(), tank_id=self.tank_id, requested=self.requested, phase=self.phase,
+                    truck_id=self.truck.truck_id if self.truck else None)
+
+    def load_state(self, state):
+        super().load_state(state)
+        self.phase = state["phase"]
+        self.truck = next((t for t in self.world.fleet if t.truck_id == state["truck_id"]), None)
+
+class GeologistAgent(Resumable):
     def __init__(self, env, tools: GeologistTools, world):
         self.env = env
         self.tools = tools
         self.world = world
+        self.injecting = None # tank id while an injection is under way
+        self.well = None
 
     def run(self):
+        if (yield from self.resume()) and self.injecting:
+            self.finish_injection()
         while True:
-            yield self.env.timeout(1)
-            # Check if truck arrived with full tank
-            if self.world.truck_location == "OFFSHORE" and self.world.is_tank_sealed:
-                logger.info("[Geologist] Tank arrived. Analyzing seabed...")
-                safety = self.tools.analyze_seabed("Basalt-Formation-A")
-                
-                if safety == "SAFE":
-                    yield self.env.timeout(2) # Injection time
-                    self.tools.inject_gas("Well-4", 1000)
-                    # Reset truck
-                    self.world.truck_location = "DEPOT"
+            # Wait for a truck to deliver a full tank
+            tank = self.world.tanks.first(DELIVERED)
+            if tank is None:
+                yield self.wait_for("truck_arrived")
+                continue
+            self.world.trace.emit(TANK_ARRIVED, tank.tank_id)
+            well = self.tools.select_well(tank.level_kg)
+
+            if well is not None:
+                self.injecting, self.well = tank.tank_id, well
+                yield self.timeout(2) # Injection time
+                self.finish_injection()
+            else:
+                self.world.trace.emit(UNSAFE, tank.tank_id)
+                # Wells relax as pressure bleeds off; closed wells only change when reopened
+                delay = self.world.reservoir.time_until_safe(tank.level_kg, self.env.now)
+                if delay < math.inf:
+                    yield self.timeout(max(1, math.ceil(delay)))
                 else:
-                    logger.error("[Geologist] UNSAFE CONDITIONS. Halting injection.")
+                    yield self.wait_for("seabed_changed")
+
+    def finish_injection(self):
+        self.tools.inject_gas(self.well, self.injecting)
+        self.injecting = self.well = None
+
+    def state(self):
+        return dict(super().state(), injecting=self.injecting, well=self.well)
+
+    def load_state(self, state):
+        super().load_state(state)
+        self.injecting = state["injecting"]
+        self.well = state["well"]
 
-class GuardianAgent:
+class GuardianAgent(Resumable):
     def __init__(self, env, tools: SafetyTools):
         self.env = env
         self.tools = tools
+        self.world = tools.world
 
     def run(self):
+        # Woken by the leak itself rather than checking every tick
+        if not (yield from self.resume()):
+            yield self.wait_for("leak_detected")
         while True:
-            yield self.env.timeout(1)
             status = self.tools.read_system_status()
             if status["leak_detected"]:
-                logger.critical("[Guardian] LEAK DETECTED! INITIATING EMERGENCY STOP.")
+                self.world.trace.emit(LEAK)
                 self.tools.emergency_stop()
-                # Break out of loop or just keep ensuring stop is active
+            yield self.wait_for("leak_detected")
@@ -0,0 +1,177 @@
+"""
+Checkpoint and restore for the simpy CCS model.
+
+A checkpoint is the complete WorldState (sector arrays, tanks and trucks,
+the road network with its closures and congestion, every well's pressure,
+the safety flags, the RNG state) plus what every process is waiting for: each agent,
+the world's own processes and every haul in progress are Resumable, so
+their pending timeout or signal is plain data. The simpy event
+queue itself is never pickled; restore() rebuilds the processes from that
+data in a fresh Environment starting at the checkpoint time.
+
+    save_checkpoint(world, "warm.npz")       # after a long warm-up
+    world = load_checkpoint("warm.npz")      # continues exactly as the original
+    world = load_checkpoint("warm.npz", seed=SeedSequence(7, spawn_key=(i,)))
+                                             # fork: same state, new randomness
+
+Restoring without a seed reproduces the uninterrupted run step for step.
+Files are compressed .npz: the sector arrays as arrays and the rest as one
+JSON document.
+"""
+
+import json
+
+import numpy as np
+import simpy
+
+from .simulation import TankStore, TANK_STATES
+from .network import RoadNetwork
+from .reservoir import Reservoir
+from .agents import Haul
+from .scenarios import build_simulation
+
+VERSION = 1
+ARRAYS = ("nox", "co2", "sector_event_active")
+
+
+def _logistics(world):
+    for agent in world.agents:
+        if hasattr(agent, "hauls"):
+            return agent
+    return None
+
+
+def snapshot(world):
+    """Checkpoint of a world and its processes as a dict (arrays are copies)."""
+    logistics = _logistics(world)
+    return {
+        "version": VERSION,
+        "now": world.env.now,
+        "sector_ids": list(world.sector_ids),
+        "nox": world.nox.copy(),
+        "co2": world.co2.copy(),
+        "sector_event_active": world.sector_event_active.copy(),
+        "pollution_threshold": dict(world.pollution_threshold),
+        "tank_capacity": world.tank_capacity,
+        "max_safe_pressure": world.max_safe_pressure,
+        # grouped by state, oldest first, so "first tank in state X" survives
+        "tanks": [[t.tank_id, t.state, t.level_kg, t.pressure_psi, t.origin]
+                  for state in TANK_STATES for t in world.tanks.in_state(state)],
+        "trucks": [[t.truck_id, t.location, t.tank_id, t.dispatched_at, t.busy_time, t.trips]
+                   for t in world.fleet],
+        "depot": [t.truck_id for t in world.trucks.items],
+        "network": world.network.to_dict(),
+        "truck_wait_total": world.truck_wait_total,
+        "truck_requests": world.truck_requests,
+        "reservoir": world.reservoir.to_dict(),
+        "injection_status": world.injection_status,
+        "co2_injected_kg": world.co2_injected_kg,
+        "emergency_stop_triggered": world.emergency_stop_triggered,
+        "emergency_stop_time": world.emergency_stop_time,
+        "leak_detected": world.leak_detected,
+        "rng": world.rng.bit_generator.state,
+        "wait_seq": world._wait_seq,
+        "pollution": world.pollution.state(),
+        "leak": world.leak.state(),
+        "agents": [dict(agent.state(), type=type(agent).__name__) for agent in world.agents],
+        "hauls": [haul.state() for haul in logistics.hauls] if logistics else [],
+    }
+
+
+def restore(snap, seed=None, trace=None, series=None):
+    """Rebuild a running world from snapshot(); returns it (its env is world.env).
+
+    Without `seed` the RNG continues where the checkpoint left it; with one
+    (an int, SeedSequence or Generator) the restored run is a new branch.
+    """
+    if snap.get("version") != VERSION:
+        raise ValueError(f"Unsupported checkpoint version {snap.get('version')!r}")
+    env = simpy.Environment(initial_time=snap["now"])
+    agent_types = [agent["type"] for agent in snap["agents"]]
+    world = build_simulation(env, rng=seed, n_sectors=len(snap["sector_ids"]), n_tanks=0,
+                             n_trucks=len(snap["trucks"]), n_compressors=agent_types.count("CompressorAgent"),
+                             trace=trace, start=False, series=series)
+    if [type(agent).__name__ for agent in world.agents] != agent_types:
+        raise ValueError(f"Checkpoint agents {agent_types} do not match this simulation")
+
+    world.sector_ids = list(snap["sector_ids"])
+    world.sector_index = {sid: i for i, sid in enumerate(world.sector_ids)}
+    world.nox[:] = snap["nox"]
+    world.co2[:] = snap["co2"]
+    world.sector_event_active = np.array(snap["sector_event_active"], dtype=bool)
+    world.pollution_threshold = dict(snap["pollution_threshold"])
+    world.tank_capacity = snap["tank_capacity"]
+    world.max_safe_pressure = snap["max_safe_pressure"]
+
+    world.tanks = TankStore()
+    for tank_id, state, level_kg, pressure_psi, origin in snap["tanks"]:
+        tank = world.tanks.add(tank_id, state)
+        tank.level_kg = level_kg
+        tank.pressure_psi = pressure_psi
+        tank.origin = origin
+    trucks = {}
+    for truck, (truck_id, location, tank_id, dispatched_at, busy_time, trips) in zip(world.fleet, snap["trucks"]):
+        truck.truck_id = truck_id
+        truck.location = location
+        truck.tank_id = tank_id
+        truck.dispatched_at = dispatched_at
+        truck.busy_time = busy_time
+        truck.trips = trips
+        trucks[truck_id] = truck
+    world.trucks.items[:] = [trucks[truck_id] for truck_id in snap["depot"]]
+    world.set_network(RoadNetwork.from_dict(snap["network"]))
+    world.set_reservoir(Reservoir.from_dict(snap["reservoir"]))
+
+    for name in ("truck_wait_total", "truck_requests", "injection_status", "co2_injected_kg",
+                 "emergency_stop_triggered", "emergency_stop_time", "leak_detected"):
+        setattr(world, name, snap[name])
+    if seed is None:
+        world.rng.bit_generator.state = snap["rng"]
+    world._wait_seq = snap["wait_seq"]
+
+    world.pollution.load_state(snap["pollution"])
+    world.leak.load_state(snap["leak"])
+    for agent, state in zip(world.agents, snap["agents"]):
+        agent.load_state(state)
+    processes = [world.pollution, world.leak, *world.agents]
+    logistics = _logistics(world)
+    for state in snap["hauls"]:
+        haul = Haul(logistics, state["tank_id"], state["requested"])
+        haul.load_state(state)
+        logistics.hauls.append(haul)
+        processes.append(haul)
+
+    # Same order as the original waits, so same-time events fire in the same order
+    for process in sorted(processes, key=lambda p: p.wait_seq):
+        env.process(process.run())
+    return world
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot checkpoint {type(value).__name__}")
+
+
+def save_checkpoint(world, path):
+    """Write snapshot(world) to a compressed .npz file; returns the path written."""
+    snap = snapshot(world)
+    arrays = {name: snap.pop(name) for name in ARRAYS}
+    if not str(path).endswith(".npz"):
+        path = f"{path}.npz"
+    np.savez_compressed(path, state=np.array(json.dumps(snap, default=_json_default)), **arrays)
+    return path
+
+
+def read_checkpoint(path):
+    """Snapshot dict from a checkpoint file."""
+    with np.load(path) as data:
+        snap = json.loads(str(data["state"]))
+        for name in ARRAYS:
+            snap[name] = data[name]
+    return snap
+
+
+def load_checkpoint(path, seed=None, trace=None, series=None):
+    """restore() from a checkpoint file."""
+    return restore(read_checkpoint(path), seed=seed, trace=trace, series=series)
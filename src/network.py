@@ -0,0 +1,236 @@
+"""
+Road and sea network for hauling tanks.
+
+Nodes are sources (refineries), depots, ports and rigs; edges are road or
+sea legs with a base travel time. Travel times between any two nodes are
+shortest paths (Dijkstra), computed on demand and cached, so a dispatch is
+a dict lookup once the search it needs has run:
+
+    travel_time(a, b)    one search per destination (or origin) serves every
+                         dispatch to it; legs are undirected
+    nearest(a, kind)     one search from all rigs (or depots, ...) at once
+                         serves every origin
+
+The caches are dropped only when an edge changes, i.e. a closure, reopening
+or congestion update, and every change bumps `version` and calls the
+registered on_change callbacks (WorldState turns them into the
+"network_changed" signal).
+
+    net = default_network(["Refinery-Sector-7"])
+    net.travel_time("Refinery-Sector-7", "OFFSHORE")   # 5.0
+    net.set_congestion("Refinery-Sector-7", "Port", 2.0)
+    net.travel_time("Refinery-Sector-7", "OFFSHORE")   # 8.0
+
+Networks can be loaded from JSON (CCS_NETWORK for the simulation):
+
+    {"nodes": {"Depot": "depot", "Port": "port", "OFFSHORE": "rig", ...},
+     "edges": [["Depot", "Port", 3, "road"], ["Port", "OFFSHORE", 2, "sea"], ...]}
+"""
+
+import heapq
+import json
+import math
+
+NODE_KINDS = ("source", "depot", "port", "rig")
+
+
+class Edge:
+    __slots__ = ("base", "mode", "congestion", "closed")
+
+    def __init__(self, base, mode="road"):
+        self.base = float(base)
+        self.mode = mode
+        self.congestion = 1.0
+        self.closed = False
+
+    @property
+    def time(self):
+        return math.inf if self.closed else self.base * self.congestion
+
+
+class RoadNetwork:
+    """Undirected graph of travel legs with cached shortest paths."""
+
+    def __init__(self):
+        self.nodes = {}   # name -> kind
+        self._adj = {}    # name -> {neighbour: Edge}, both directions share the Edge
+        self._paths = {}  # source -> (dist, prev) for the current version
+        self._nearest = {}  # node kind -> (dist, nearest node of that kind) for every node
+        self.version = 0
+        self.searches = 0  # Dijkstra runs, for cache statistics
+        self.on_change = []
+
+    # ------------------------------------------------------------------
+    # Building and changing the graph
+    # ------------------------------------------------------------------
+    def add_node(self, name, kind):
+        if kind not in NODE_KINDS:
+            raise ValueError(f"Unknown node kind {kind!r}; expected one of {NODE_KINDS}")
+        self.nodes[name] = kind
+        self._adj.setdefault(name, {})
+
+    def add_edge(self, a, b, time, mode="road"):
+        for name in (a, b):
+            if name not in self.nodes:
+                raise KeyError(f"Unknown node {name!r}")
+        edge = Edge(time, mode)
+        self._adj[a][b] = edge
+        self._adj[b][a] = edge
+        self._changed()
+
+    def edge(self, a, b):
+        try:
+            return self._adj[a][b]
+        except KeyError:
+            raise KeyError(f"No edge {a!r} - {b!r}") from None
+
+    def close(self, a, b):
+        self.edge(a, b).closed = True
+        self._changed()
+
+    def reopen(self, a, b):
+        self.edge(a, b).closed = False
+        self._changed()
+
+    def set_congestion(self, a, b, factor):
+        """Scale a leg's travel time (1.0 = free flow)."""
+        if factor <= 0:
+            raise ValueError(f"congestion factor must be positive, got {factor}")
+        self.edge(a, b).congestion = float(factor)
+        self._changed()
+
+    def _changed(self):
+        self.version += 1
+        self._paths.clear()
+        self._nearest.clear()
+        for callback in self.on_change:
+            callback()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _dijkstra(self, sources):
+        """Distances from the nearest of `sources`, predecessors, and which source is nearest."""
+        self.searches += 1
+        dist = {s: 0.0 for s in sources}
+        prev = {}
+        origin = {s: s for s in sources}
+        heap = [(0.0, s) for s in sources]
+        heapq.heapify(heap)
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            for neighbour, edge in self._adj[node].items():
+                nd = d + edge.time
+                if nd < dist.get(neighbour, math.inf):
+                    dist[neighbour] = nd
+                    prev[neighbour] = node
+                    origin[neighbour] = origin[node]
+                    heapq.heappush(heap, (nd, neighbour))
+        return dist, prev, origin
+
+    def _search(self, source):
+        cached = self._paths.get(source)
+        if cached is None:
+            if source not in self.nodes:
+                raise KeyError(f"Unknown node {source!r}")
+            cached = self._paths[source] = self._dijkstra([source])[:2]
+        return cached
+
+    def travel_time(self, a, b):
+        """Shortest travel time from a to b (math.inf if unreachable).
+
+        Legs are undirected, so a cached search from either end answers; a
+        miss searches from `b`, the destination many dispatches share.
+        """
+        for source, target in ((a, b), (b, a)):
+            cached = self._paths.get(source)
+            if cached is not None:
+                if target not in self.nodes:
+                    raise KeyError(f"Unknown node {target!r}")
+                return cached[0].get(target, math.inf)
+        if a not in self.nodes:
+            raise KeyError(f"Unknown node {a!r}")
+        return self._search(b)[0].get(a, math.inf)
+
+    def path(self, a, b):
+        """Nodes on the shortest route from a to b, or [] if unreachable."""
+        if a not in self._paths and b in self._paths:
+            return self.path(b, a)[::-1]
+        dist, prev = self._search(a)
+        if b not in dist:
+            return []
+        route = [b]
+        while route[-1] != a:
+            route.append(prev[route[-1]])
+        return route[::-1]
+
+    def nearest(self, a, kind):
+        """(node, travel time) of the closest reachable node of `kind`, or (None, inf).
+
+        One search from every node of `kind` at once serves all origins until
+        the next edge change.
+        """
+        field = self._nearest.get(kind)
+        if field is None:
+            if kind not in NODE_KINDS:
+                raise ValueError(f"Unknown node kind {kind!r}; expected one of {NODE_KINDS}")
+            dist, _, origin = self._dijkstra([name for name, k in self.nodes.items() if k == kind])
+            field = self._nearest[kind] = (dist, origin)
+        if a not in self.nodes:
+            raise KeyError(f"Unknown node {a!r}")
+        dist, origin = field
+        return origin.get(a), dist.get(a, math.inf)
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+    def edges(self):
+        seen = set()
+        for a, neighbours in self._adj.items():
+            for b, edge in neighbours.items():
+                if id(edge) not in seen:
+                    seen.add(id(edge))
+                    yield a, b, edge
+
+    def to_dict(self):
+        return {
+            "nodes": dict(self.nodes),
+            "edges": [[a, b, e.base, e.mode, e.congestion, e.closed] for a, b, e in self.edges()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of to_dict(); edges may omit congestion and closed."""
+        net = cls()
+        for name, kind in data["nodes"].items():
+            net.add_node(name, kind)
+        for a, b, base, mode, *rest in data["edges"]:
+            net.add_edge(a, b, base, mode)
+            if rest:
+                edge = net.edge(a, b)
+                edge.congestion = float(rest[0])
+                edge.closed = bool(rest[1]) if len(rest) > 1 else False
+        net.version = 0
+        return net
+
+
+def load_network(path):
+    with open(path) as f:
+        return RoadNetwork.from_dict(json.load(f))
+
+
+def default_network(sources, rig="OFFSHORE", depot="Depot", port="Port", road=3, sea=2):
+    """Every source and the depot drive `road` to one port, which is `sea` from the rig."""
+    net = RoadNetwork()
+    net.add_node(depot, "depot")
+    net.add_node(port, "port")
+    net.add_node(rig, "rig")
+    net.add_edge(depot, port, road)
+    net.add_edge(port, rig, sea, "sea")
+    for source in sources:
+        net.add_node(source, "source")
+        net.add_edge(source, port, road)
+    net.version = 0
+    return net
@@ -0,0 +1,210 @@
+"""
+Multi-well reservoir pressure model for the Geologist.
+
+Every well has a base (hydrostatic) pressure, a fracture pressure and a safe
+limit at 90% of it. Injecting m kg raises a well's pressure by
+bar_per_kg * m; between injections pressure relaxes towards base,
+
+    p(t) = base + (p(t0) - base) * exp(-relax_rate * (t - t0))
+
+All wells live in NumPy arrays. Relaxation is applied lazily, for every
+well at once, the first time the reservoir is used at a new time, and
+inject() takes whole batches of (well, mass) pairs.
+
+Choosing a well is a lookup in a headroom index rather than a scan.
+Headroom is the mass a well can take before reaching its safe limit. The
+index (wells sorted by headroom) is rebuilt only when time advances.
+Injections in between only lower the headroom of the wells they touch, so
+those few are tracked as stale and checked beside the index head:
+
+    reservoir = Reservoir(2000)
+    well = reservoir.select(1000, now)   # well index, or None if none can take 1000 kg
+    reservoir.inject(well, 1000, now)
+
+Closing or reopening a well, or changing fracture pressures, calls the
+on_change callbacks (WorldState turns them into the "seabed_changed"
+signal). The passage of time never does: time_until_safe() says how long
+relaxation will take to make room.
+"""
+
+import math
+
+import numpy as np
+
+
+class Reservoir:
+    """Pressure state of `n_wells` wells, with a headroom index for well selection."""
+
+    INDEX_HEAD = 64  # wells ranked in the index; the rest are never the best choice
+
+    def __init__(self, n_wells=1, well_ids=None, base=500.0, fracture=800.0, bar_per_kg=0.005,
+                 relax_rate=0.01, safe_fraction=0.9, t=0.0):
+        if well_ids is None:
+            well_ids = [f"Well-{i + 1:03d}" for i in range(n_wells)]
+        self.well_ids = list(well_ids)
+        self.well_index = {wid: i for i, wid in enumerate(self.well_ids)}
+        n = len(self.well_ids)
+        # scalars or per-well arrays
+        self.base = np.broadcast_to(np.asarray(base, dtype=np.float64), n).copy()
+        self.fracture = np.broadcast_to(np.asarray(fracture, dtype=np.float64), n).copy()
+        self.bar_per_kg = np.broadcast_to(np.asarray(bar_per_kg, dtype=np.float64), n).copy()
+        self.relax_rate = np.broadcast_to(np.asarray(relax_rate, dtype=np.float64), n).copy()
+        self.safe_fraction = safe_fraction
+        self.pressure = self.base.copy()  # Bar
+        self.injected_kg = np.zeros(n)
+        self.open = np.ones(n, dtype=bool)
+        self.t = t
+        self.on_change = []
+        self._reindex()
+
+    def __len__(self):
+        return len(self.well_ids)
+
+    # ------------------------------------------------------------------
+    # Pressure and the headroom index
+    # ------------------------------------------------------------------
+    @property
+    def limit(self):
+        return self.fracture * self.safe_fraction
+
+    def headroom_kg(self):
+        """Mass each well can take before its safe limit (-inf for closed wells)."""
+        headroom = (self.limit - self.pressure) / self.bar_per_kg
+        headroom[~self.open] = -np.inf
+        return headroom
+
+    def _reindex(self):
+        self._headroom = self.headroom_kg()
+        # Only the head of the ranking is ever read, so rank just the best
+        # INDEX_HEAD wells by (most headroom, lowest index). Taking ties at the
+        # cut-off by index keeps the choice independent of when the index was built.
+        h = self._headroom
+        n = len(h)
+        head = min(self.INDEX_HEAD, n)
+        if head < n:
+            cutoff = np.partition(h, n - head)[n - head]
+            above = np.flatnonzero(h > cutoff)
+            top = np.concatenate((above, np.flatnonzero(h == cutoff)[:head - len(above)]))
+        else:
+            top = np.arange(n)
+        self._order = top[np.lexsort((top, -h[top]))].tolist()
+        self._stale = set()
+
+    def pressure_at(self, now):
+        """Every well's pressure at `now`, without advancing the model."""
+        if now <= self.t:
+            return self.pressure.copy()
+        return self.base + (self.pressure - self.base) * np.exp(-self.relax_rate * (now - self.t))
+
+    def advance(self, now):
+        """Relax every well to time `now` (a no-op if already there)."""
+        if now <= self.t:
+            return
+        decay = np.exp(-self.relax_rate * (now - self.t))
+        self.pressure = self.base + (self.pressure - self.base) * decay
+        self.t = now
+        self._reindex()
+
+    def select(self, mass_kg, now):
+        """Index of the well with the most headroom if it can take `mass_kg`, else None."""
+        self.advance(now)
+        headroom = self._headroom
+        best = next((i for i in self._order if i not in self._stale), None)
+        if best is None and len(self._order) < len(self):
+            # every well in the head was injected into since the last rebuild
+            self._reindex()
+            best = self._order[0]
+        for i in self._stale:  # only lowered since the index was built
+            if best is None or headroom[i] > headroom[best] or (headroom[i] == headroom[best] and i < best):
+                best = i
+        if best is None or headroom[best] < mass_kg:
+            return None
+        return best
+
+    def inject(self, wells, masses_kg, now):
+        """Add injected mass to wells (an index or id, or arrays of them, with masses)."""
+        self.advance(now)
+        wells = self._indices(wells)
+        if isinstance(wells, int):
+            # one tank at a time, as the Geologist injects
+            self.pressure[wells] += self.bar_per_kg[wells] * masses_kg
+            self.injected_kg[wells] += masses_kg
+            touched = [wells]
+        else:
+            masses = np.broadcast_to(np.asarray(masses_kg, dtype=np.float64), wells.shape)
+            np.add.at(self.pressure, wells, self.bar_per_kg[wells] * masses)
+            np.add.at(self.injected_kg, wells, masses)
+            touched = np.unique(wells)
+        if len(self._stale) + len(touched) > self.INDEX_HEAD // 2:
+            self._reindex()  # too many stale entries: cheaper to rank again once
+            return
+        limit = self.fracture[touched] * self.safe_fraction
+        headroom = (limit - self.pressure[touched]) / self.bar_per_kg[touched]
+        self._headroom[touched] = np.where(self.open[touched], headroom, -np.inf)
+        self._stale.update(touched if isinstance(touched, list) else touched.tolist())
+
+    def is_safe(self, well, now):
+        """True if the well is open and below its safe limit."""
+        self.advance(now)
+        i = self._indices(well)
+        return bool(self.open[i] and self.pressure[i] < self.limit[i])
+
+    def time_until_safe(self, mass_kg, now):
+        """Time until relaxation lets some open well take `mass_kg` (0 if one can now, inf if never)."""
+        self.advance(now)
+        target = self.limit - self.bar_per_kg * mass_kg  # highest pressure that still takes the mass
+        excess = self.pressure - self.base
+        room = target - self.base
+        with np.errstate(divide="ignore", invalid="ignore"):
+            wait = np.where(self.pressure <= target, 0.0,
+                            np.where(room > 0, np.log(excess / room) / self.relax_rate, np.inf))
+        wait[~self.open] = np.inf
+        return float(wait.min()) if len(wait) else math.inf
+
+    # ------------------------------------------------------------------
+    # Changes that wake a waiting geologist
+    # ------------------------------------------------------------------
+    def _indices(self, wells):
+        """Well index (or index array) from ids, indices or arrays of either."""
+        if isinstance(wells, str):
+            return self.well_index[wells]
+        if isinstance(wells, (int, np.integer)):
+            return int(wells)
+        if isinstance(wells, np.ndarray) and wells.dtype.kind in "iu":
+            return wells.astype(np.intp, copy=False)
+        return np.array([self.well_index[w] if isinstance(w, str) else w for w in wells], dtype=np.intp)
+
+    def _changed(self):
+        self._reindex()
+        for callback in self.on_change:
+            callback()
+
+    def close_well(self, well):
+        self.open[self._indices(well)] = False
+        self._changed()
+
+    def open_well(self, well):
+        self.open[self._indices(well)] = True
+        self._changed()
+
+    def set_fracture(self, well, pressure):
+        self.fracture[self._indices(well)] = pressure
+        self._changed()
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+    ARRAYS = ("base", "fracture", "bar_per_kg", "relax_rate", "pressure", "injected_kg", "open")
+
+    def to_dict(self):
+        out = {name: getattr(self, name).tolist() for name in self.ARRAYS}
+        out.update(well_ids=self.well_ids, safe_fraction=self.safe_fraction, t=self.t)
+        return out
+
+    @classmethod
+    def from_dict(cls, data):
+        res = cls(well_ids=data["well_ids"], safe_fraction=data["safe_fraction"], t=data["t"])
+        for name in cls.ARRAYS:
+            setattr(res, name, np.array(data[name], dtype=bool if name == "open" else np.float64))
+        res._reindex()
+        return res
@@ -0,0 +1,168 @@
+"""
+Monte Carlo scenario runner for the simpy CCS model.
+
+Every run builds a fresh environment whose WorldState draws all of its
+randomness from SeedSequence(seed, spawn_key=(run_index,)), so run i is
+reproducible and independent of every other run, of the worker count and of
+the order in which results come back. Runs are spread over a process pool in
+chunks and each result is folded into a ScenarioSummary as it arrives.
+"""
+
+import contextlib
+import functools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import simpy
+
+from . import tools
+from .simulation import WorldState
+from .tools import SentinelTools, CompressorTools, LogisticsTools, GeologistTools, SafetyTools, set_telemetry_enabled
+from .agents import SentinelAgent, CompressorAgent, LogisticsAgent, GeologistAgent, GuardianAgent
+from .trace import TraceRecorder
+
+METRICS = ("tonnes_injected", "time_to_emergency_stop", "truck_utilization")
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def build_simulation(env, rng=None, n_sectors=1, n_tanks=1, n_trucks=3, n_compressors=1, trace=None, start=True,
+                     series=None, network=None, n_wells=1):
+    """Create the world, tools and agents and start every process; returns the world.
+
+    With start=False nothing is started (checkpoint.restore() loads state into
+    the processes first); start_simulation(world) starts them later.
+    """
+    world = WorldState(env, n_sectors=n_sectors, rng=rng, n_tanks=n_tanks, n_trucks=n_trucks, trace=trace,
+                       series=series, network=network, n_wells=n_wells)
+
+    compressor_tools = CompressorTools(world)
+    world.agents.append(SentinelAgent(env, SentinelTools(world)))
+    for i in range(n_compressors):
+        # compressors are spread round-robin over the sectors
+        world.agents.append(CompressorAgent(env, compressor_tools, world, name=f"Compressor-{i + 1}",
+                                            sector=i % n_sectors))
+    world.agents.append(LogisticsAgent(env, LogisticsTools(world), world))
+    world.agents.append(GeologistAgent(env, GeologistTools(world), world))
+    world.agents.append(GuardianAgent(env, SafetyTools(world)))
+    if start:
+        start_simulation(world)
+    return world
+
+
+def start_simulation(world):
+    world.run() # Start world physics
+    for agent in world.agents:
+        world.env.process(agent.run())
+
+
+def run_scenario(run_index, seed=0, ticks=100, fleet=None, checkpoint=None):
+    """One seeded run; returns its metrics (time_to_emergency_stop is None if no stop).
+
+    With `checkpoint` (a checkpoint file) the run is a branch: it starts from
+    the saved state, with its own randomness, and runs `ticks` more ticks.
+    """
+    rng = np.random.SeedSequence(seed, spawn_key=(run_index,))
+    if checkpoint:
+        from .checkpoint import load_checkpoint  # checkpoint builds on this module
+        world = load_checkpoint(checkpoint, seed=rng, trace=TraceRecorder.disabled())
+        env = world.env
+    else:
+        env = simpy.Environment()
+        world = build_simulation(env, rng, trace=TraceRecorder.disabled(), **(fleet or {}))
+    env.run(until=env.now + ticks)
+    stats = world.fleet_stats()
+    return {
+        "run": run_index,
+        "tonnes_injected": stats["co2_injected_kg"] / 1000.0,
+        "time_to_emergency_stop": world.emergency_stop_time,
+        "truck_utilization": stats["truck_utilization"],
+    }
+
+
+class ScenarioSummary:
+    """Streaming aggregate of run results; percentiles are computed on demand."""
+
+    def __init__(self):
+        self.runs = 0
+        self.values = {metric: [] for metric in METRICS}
+
+    def add(self, result):
+        self.runs += 1
+        for metric in METRICS:
+            value = result[metric]
+            if value is not None:
+                self.values[metric].append(value)
+
+    def summary(self):
+        out = {"runs": self.runs}
+        for metric, values in self.values.items():
+            if not values:
+                out[metric] = {"n": 0}
+                continue
+            arr = np.asarray(values, dtype=float)
+            stats = {"n": len(arr), "mean": float(arr.mean()), "min": float(arr.min())}
+            stats.update({f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(arr, PERCENTILES))})
+            stats["max"] = float(arr.max())
+            out[metric] = stats
+        return out
+
+    def format(self):
+        summary = self.summary()
+        lines = [f"{summary['runs']} runs"]
+        for metric in METRICS:
+            stats = summary[metric]
+            if not stats["n"]:
+                lines.append(f"  {metric}: no samples")
+                continue
+            cells = " ".join(f"{k}={v:.3g}" for k, v in stats.items() if k != "n")
+            lines.append(f"  {metric} (n={stats['n']}): {cells}")
+        return "\n".join(lines)
+
+
+def _init_worker():
+    # thousands of runs: no per-step logging and no telemetry posts
+    logging.disable(logging.CRITICAL)
+    set_telemetry_enabled(False)
+
+
+@contextlib.contextmanager
+def _quiet():
+    """_init_worker() for the current process, undone on exit."""
+    disabled = logging.root.manager.disable
+    telemetry = tools.TELEMETRY_ENABLED
+    _init_worker()
+    try:
+        yield
+    finally:
+        logging.disable(disabled)
+        set_telemetry_enabled(telemetry)
+
+
+def run_scenarios(runs, seed=0, ticks=100, workers=None, fleet=None, progress=None, checkpoint=None):
+    """Run `runs` seeded scenarios over a process pool and return their ScenarioSummary.
+
+    `workers` defaults to os.cpu_count(); with one worker everything runs in
+    this process. `progress(summary)` is called after every result. With
+    `checkpoint` every run branches from that checkpoint file.
+    """
+    workers = workers or os.cpu_count() or 1
+    job = functools.partial(run_scenario, seed=seed, ticks=ticks, fleet=fleet, checkpoint=checkpoint)
+    summary = ScenarioSummary()
+    if workers == 1:
+        with _quiet():
+            _collect(map(job, range(runs)), summary, progress)
+        return summary
+    # a few chunks per worker: low IPC overhead, still balanced at the tail
+    chunksize = max(1, runs // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        _collect(pool.map(job, range(runs), chunksize=chunksize), summary, progress)
+    return summary
+
+
+def _collect(results, summary, progress):
+    for result in results:
+        summary.add(result)
+        if progress:
+            progress(summary)
@@ -1,67 +1,376 @@
+import os
 import simpy
-import random
 import logging
+import numpy as np
+from .trace import TraceRecorder, define
+from .network import default_network, load_network
+from .reservoir import Reservoir
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("Simulation")
 
+LEAK_STARTED = define("leak_started", "safety", logging.WARNING, "SIMULATION: LEAK STARTED!", "Simulation")
+
+# Tank lifecycle: EMPTY -> FILLING -> SEALED -> QUEUED (waiting for a truck)
+#                 -> IN_TRANSIT -> DELIVERED -> (injected) -> EMPTY
+EMPTY = "EMPTY"
+FILLING = "FILLING"
+SEALED = "SEALED"
+QUEUED = "QUEUED"
+IN_TRANSIT = "IN_TRANSIT"
+DELIVERED = "DELIVERED"
+TANK_STATES = (EMPTY, FILLING, SEALED, QUEUED, IN_TRANSIT, DELIVERED)
+
+class Tank:
+    __slots__ = ("tank_id", "state", "level_kg", "pressure_psi", "origin")
+
+    def __init__(self, tank_id, state=EMPTY):
+        self.tank_id = tank_id
+        self.state = state
+        self.level_kg = 0
+        self.pressure_psi = 0
+        self.origin = None
+
+    def __repr__(self):
+        return f"Tank({self.tank_id!r}, {self.state}, {self.level_kg}kg, {self.pressure_psi} PSI)"
+
+class TankStore:
+    """Tank inventory indexed by id and by lifecycle state.
+
+    Lookups by id, state changes and "oldest tank in state X" are all O(1):
+    each state keeps an insertion-ordered dict of the tanks in it, so tanks
+    leave a state in the order they entered it.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_state = {state: {} for state in TANK_STATES}
+
+    def add(self, tank_id, state=EMPTY):
+        if tank_id in self._by_id:
+            raise ValueError(f"Duplicate tank id {tank_id!r}")
+        tank = self._by_id[tank_id] = Tank(tank_id, state)
+        self._by_state[state][tank_id] = tank
+        return tank
+
+    def __getitem__(self, tank_id):
+        return self._by_id[tank_id]
+
+    def get(self, tank_id, default=None):
+        return self._by_id.get(tank_id, default)
+
+    def __contains__(self, tank_id):
+        return tank_id in self._by_id
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def set_state(self, tank, state):
+        del self._by_state[tank.state][tank.tank_id]
+        self._by_state[state][tank.tank_id] = tank
+        tank.state = state
+
+    def in_state(self, state):
+        """Live view of the tanks in `state`, oldest first."""
+        return self._by_state[state].values()
+
+    def first(self, state):
+        """Tank that has been in `state` longest, or None."""
+        return next(iter(self._by_state[state].values()), None)
+
+    def count(self, state):
+        return len(self._by_state[state])
+
+    def counts(self):
+        return {state: len(tanks) for state, tanks in self._by_state.items()}
+
+class Truck:
+    __slots__ = ("truck_id", "location", "tank_id", "dispatched_at", "busy_time", "trips")
+
+    def __init__(self, truck_id):
+        self.truck_id = truck_id
+        self.location = "DEPOT" # DEPOT, HIGHWAY, OFFSHORE
+        self.tank_id = None
+        self.dispatched_at = None
+        self.busy_time = 0.0
+        self.trips = 0
+
+class Resumable:
+    """Base for simpy processes whose pending wait survives a checkpoint.
+
+    Processes wait through timeout()/wait_for() so the world knows what each
+    one is waiting on (`wake_at` for a timeout, `waiting` for a signal) and in
+    which order they started waiting (`wait_seq`). A restored process starts
+    with resume(), which waits out the same timeout or signal before the loop
+    body runs again; restoring starts processes in `wait_seq` order, which
+    keeps simpy's ordering of same-time events as in the original run. Every
+    wait is therefore placed where the code after it is the top of the loop.
+    """
+
+    wake_at = None
+    waiting = None
+    wait_seq = 0
+
+    def timeout(self, delay):
+        world = self.world
+        self.wake_at = world.env.now + delay
+        self.waiting = None
+        self.wait_seq = world.next_wait_seq()
+        return world.env.timeout(delay)
+
+    def wait_for(self, name):
+        self.wake_at = None
+        self.waiting = name
+        self.wait_seq = self.world.next_wait_seq()
+        return self.world.wait_for(name)
+
+    def resume(self):
+        """Wait out whatever was pending at checkpoint time; returns True if anything was."""
+        if self.waiting is not None:
+            yield self.wait_for(self.waiting)
+        elif self.wake_at is not None:
+            yield self.timeout(max(self.wake_at - self.world.env.now, 0))
+        else:
+            return False
+        return True
+
+    def state(self):
+        return {"wake_at": self.wake_at, "waiting": self.waiting, "wait_seq": self.wait_seq}
+
+    def load_state(self, state):
+        self.wake_at = state["wake_at"]
+        # JSON has no tuples: ["sector_spike", 3] -> ("sector_spike", 3)
+        waiting = state["waiting"]
+        self.waiting = tuple(waiting) if isinstance(waiting, list) else waiting
+        self.wait_seq = state["wait_seq"]
+
+class PollutionProcess(Resumable):
+    """Advances the pollution random walk once per tick."""
+
+    def __init__(self, world):
+        self.world = world
+
+    def run(self):
+        world = self.world
+        if not (yield from self.resume()):
+            yield self.timeout(1)
+        while True:
+            if not world.emergency_stop_triggered:
+                world.step_pollution()
+            if world.series is not None:
+                world.series.sample(world)
+            yield self.timeout(1)
+
+class LeakProcess(Resumable):
+    """Checks for a leak at random intervals."""
+
+    def __init__(self, world):
+        self.world = world
+
+    def run(self):
+        world = self.world
+        if not (yield from self.resume()):
+            yield self.timeout(int(world.rng.integers(20, 101)))
+        while True:
+            if world.rng.random() < 0.1: # 10% chance of leak when check runs
+                world.trace.emit(LEAK_STARTED)
+                world.leak_detected = True
+                world.signal("leak_detected")
+            yield self.timeout(int(world.rng.integers(20, 101)))
+
 class WorldState:
-    def __init__(self, env):
+    """Shared simulation state.
+
+    Pollution is tracked for `n_sectors` sectors at once in NumPy arrays
+    (`nox`, `co2`); each tick advances the random walk, clamping and
+    threshold checks for every sector in one vectorized step. Sector ids
+    default to "Sector-7", "Sector-8", ... so the single-sector default keeps
+    the original refinery sector. The scalar attributes the agents use
+    (`pollution_level`, `pollution_event_active`) refer to the first
+    (primary) sector.
+
+    The fleet is `n_tanks` tanks ("Tank-001", ...) in a TankStore and
+    `n_trucks` trucks in a simpy.Store; hauling a tank means yielding a get()
+    on that store, so tanks queue for trucks when the fleet is busy. Trucks
+    drive over `network` (network.RoadNetwork), by default one port shared by
+    every sector's refinery and the depot, 5 ticks from the rig either way.
+    Delivered tanks go into one of `n_wells` wells of `reservoir`
+    (reservoir.Reservoir).
+
+    State changes agents react to are also published as simpy events, so
+    agents can `yield world.wait_for(name)` instead of polling every tick:
+
+        "pollution_spike"   primary sector crossed a threshold (value: None)
+        "sector_spike"      any sectors crossed a threshold (value: index array)
+        ("sector_spike", i) sector i crossed a threshold
+        "tank_sealed"       a tank was sealed for transport (value: tank id)
+        "truck_arrived"     a truck delivered a tank (value: tank id)
+        "tank_emptied"      a tank was injected and is free again (value: tank id)
+        "leak_detected"     a leak started
+        "seabed_changed"    a well was closed or reopened, or a fracture pressure changed
+        "network_changed"   a road or sea leg was closed, reopened or congested
+    """
+
+    def __init__(self, env, n_sectors=1, sector_ids=None, rng=None, n_tanks=1, n_trucks=3, trace=None,
+                 series=None, network=None, n_wells=1):
         self.env = env
-        
-        # Pollution State
-        self.pollution_level = {"NOx": 10, "CO2": 400} # Baseline ppm
+        # Structured trace of agent/tool activity, stamped with simulation time
+        self.trace = trace if trace is not None else TraceRecorder.from_env()
+        self.trace.clock = lambda: env.now
+        # Optional timeseries.SeriesRecorder, sampled once per tick
+        self.series = series
+        # All randomness in a run comes from this generator (a Generator, seed or
+        # SeedSequence), so seeded runs are reproducible and independent
+        self.rng = np.random.default_rng(rng)
+
+        # Pollution State (one entry per sector, ppm)
+        if sector_ids is None:
+            sector_ids = [f"Sector-{7 + i}" for i in range(n_sectors)]
+        self.sector_ids = list(sector_ids)
+        self.n_sectors = len(self.sector_ids)
+        self.sector_index = {sid: i for i, sid in enumerate(self.sector_ids)}
+        self.nox = np.full(self.n_sectors, 10, dtype=np.int64)   # Baseline ppm
+        self.co2 = np.full(self.n_sectors, 400, dtype=np.int64)
         self.pollution_threshold = {"NOx": 50, "CO2": 1000}
-        self.pollution_event_active = False
-        
+        self.sector_event_active = np.zeros(self.n_sectors, dtype=bool)
+
         # Tank State
         self.tank_capacity = 1000 # kg
-        self.current_tank_level = 0
-        self.tank_pressure = 0 # PSI
         self.max_safe_pressure = 3000
-        self.is_tank_sealed = False
-        
+        self.tanks = TankStore()
+        for i in range(n_tanks):
+            self.tanks.add(f"Tank-{i + 1:03d}")
+
         # Logistics State
-        self.trucks_available = simpy.Resource(env, capacity=3)
-        self.truck_location = "DEPOT" # DEPOT, HIGHWAY, OFFSHORE
+        self.fleet = [Truck(f"Truck-{i + 1:03d}") for i in range(n_trucks)]
+        self.trucks = simpy.Store(env, capacity=n_trucks)
+        self.trucks.items.extend(self.fleet)
+        self.truck_wait_total = 0.0
+        self.truck_requests = 0
+        # Road/sea legs between refineries, depots, ports and rigs (CCS_NETWORK:
+        # a JSON network file); hauls take shortest-path travel times from it
+        if network is None:
+            path = os.environ.get("CCS_NETWORK")
+            network = load_network(path) if path else \
+                default_network([f"Refinery-{sid}" for sid in self.sector_ids])
+        self.set_network(network)
         
-        # Geology State
-        self.seabed_pressure = 500 # Bar
-        self.fracture_pressure = 800 # Bar
+        # Geology State: well pressures respond to injected mass and relax over time
+        self.set_reservoir(Reservoir(n_wells))
         self.injection_status = "IDLE"
+        self.co2_injected_kg = 0
         
         # Safety State
         self.emergency_stop_triggered = False
+        self.emergency_stop_time = None
         self.leak_detected = False
 
+        # name -> pending simpy event, created only when someone waits
+        self._signals = {}
+        self._wait_seq = 0
+
+        # Checkpointable processes: the world's own, plus agents added by the
+        # code that builds the simulation (see scenarios.build_simulation)
+        self.pollution = PollutionProcess(self)
+        self.leak = LeakProcess(self)
+        self.agents = []
+
+    def set_network(self, network):
+        self.network = network
+        network.on_change.append(lambda: self.signal("network_changed"))
+
+    def set_reservoir(self, reservoir):
+        self.reservoir = reservoir
+        reservoir.on_change.append(lambda: self.signal("seabed_changed"))
+
+    def next_wait_seq(self):
+        self._wait_seq += 1
+        return self._wait_seq
+
+    def wait_for(self, name):
+        """Event that succeeds the next time `name` is signalled."""
+        event = self._signals.get(name)
+        if event is None:
+            event = self._signals[name] = self.env.event()
+        return event
+
+    def signal(self, name, value=None):
+        """Wake everything waiting on `name`; a no-op when nobody is waiting."""
+        event = self._signals.pop(name, None)
+        if event is not None:
+            event.succeed(value)
+
+    @property
+    def pollution_level(self):
+        """Levels of the primary sector, as the single-sector dict agents expect."""
+        return {"NOx": int(self.nox[0]), "CO2": int(self.co2[0])}
+
+    @property
+    def pollution_event_active(self):
+        return bool(self.sector_event_active[0])
+
+    def sector_selector(self, sectors):
+        """Turn a sector id, index, slice or list of ids/indices into an array index."""
+        if isinstance(sectors, str):
+            return self.sector_index[sectors]
+        if isinstance(sectors, (int, np.integer, slice)):
+            return sectors
+        return np.array([self.sector_index[s] if isinstance(s, str) else s for s in sectors], dtype=np.intp)
+
+    def active_sectors(self):
+        """Indices of sectors currently above a pollution threshold."""
+        return np.flatnonzero(self.sector_event_active)
+
+    def step_pollution(self):
+        """Advance every sector's random walk by one tick."""
+        n = self.n_sectors
+        # Random walk (same inclusive ranges as the old randint calls)
+        self.nox += self.rng.integers(-5, 11, size=n)
+        self.co2 += self.rng.integers(-10, 21, size=n)
+
+        # Ensure non-negative
+        np.maximum(self.nox, 0, out=self.nox)
+        np.maximum(self.co2, 0, out=self.co2)
+
+        # Check for spikes
+        was_active = self.sector_event_active
+        self.sector_event_active = np.logical_or(self.nox > self.pollution_threshold["NOx"],
+                                                 self.co2 > self.pollution_threshold["CO2"])
+        if self._signals:
+            crossed = np.flatnonzero(self.sector_event_active & ~was_active)
+            if len(crossed):
+                self.signal("sector_spike", crossed)
+                if crossed[0] == 0:
+                    self.signal("pollution_spike")
+                for i in crossed.tolist():
+                    self.signal(("sector_spike", i))
+
     def update_pollution(self):
         """Randomly fluctuate pollution levels."""
-        while True:
-            yield self.env.timeout(1)
-            if not self.emergency_stop_triggered:
-                # Random walk
-                self.pollution_level["NOx"] += random.randint(-5, 10)
-                self.pollution_level["CO2"] += random.randint(-10, 20)
-                
-                # Ensure non-negative
-                self.pollution_level["NOx"] = max(0, self.pollution_level["NOx"])
-                self.pollution_level["CO2"] = max(0, self.pollution_level["CO2"])
-                
-                # Check for spikes
-                if (self.pollution_level["NOx"] > self.pollution_threshold["NOx"] or 
-                    self.pollution_level["CO2"] > self.pollution_threshold["CO2"]):
-                    self.pollution_event_active = True
-                else:
-                    self.pollution_event_active = False
+        return self.pollution.run()
 
     def simulate_leak(self):
         """Randomly simulate a leak event."""
-        while True:
-            yield self.env.timeout(random.randint(20, 100))
-            if random.random() < 0.1: # 10% chance of leak when check runs
-                logger.warning("SIMULATION: LEAK STARTED!")
-                self.leak_detected = True
+        return self.leak.run()
+
+    def fleet_stats(self):
+        """Tank counts per state plus truck utilization and queueing so far."""
+        now = self.env.now
+        busy = sum(t.busy_time + (now - t.dispatched_at if t.dispatched_at is not None else 0)
+                   for t in self.fleet)
+        return {
+            "tanks": self.tanks.counts(),
+            "trucks": len(self.fleet),
+            "trucks_busy": len(self.fleet) - len(self.trucks.items),
+            "trips": sum(t.trips for t in self.fleet),
+            "truck_utilization": busy / (len(self.fleet) * now) if self.fleet and now else 0.0,
+            "truck_wait_avg": self.truck_wait_total / self.truck_requests if self.truck_requests else 0.0,
+            "co2_injected_kg": self.co2_injected_kg,
+        }
 
     def run(self):
         self.env.process(self.update_pollution())
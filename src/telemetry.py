@@ -0,0 +1,214 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger("Telemetry")
+
+DROP_NEWEST = "drop_newest"   # full queue: discard the event being sent
+DROP_OLDEST = "drop_oldest"   # full queue: discard the oldest queued event
+BLOCK = "block"               # full queue: wait up to block_timeout, then drop
+POLICIES = (DROP_NEWEST, DROP_OLDEST, BLOCK)
+
+
+class TelemetryShipper:
+    """Ships events to the backend from a background thread.
+
+    The simulation only ever does a bounded queue put, so a slow or offline
+    API can no longer stall a simpy step. The sender thread drains up to
+    `batch_size` events at a time (or whatever arrived within
+    `flush_interval`), posts each batch as one request to `url + "/batch"`
+    over a keep-alive requests.Session and retries failed posts with backoff
+    before giving up. Backends without the batch endpoint get one post per
+    event instead.
+    """
+
+    def __init__(self, url, max_queue=10000, batch_size=100, flush_interval=0.2,
+                 policy=DROP_NEWEST, block_timeout=0.1, max_retries=2, retry_backoff=0.25,
+                 timeout=0.5, batch_url=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown telemetry policy {policy!r}; expected one of {POLICIES}")
+        self.url = url
+        self.batch_url = batch_url or url.rstrip("/") + "/batch"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = threading.Event()
+        self._abandoned = threading.Event()  # close() stopped waiting for the sender
+        self.counters = {"enqueued": 0, "sent": 0, "dropped": 0, "retried": 0, "failed": 0}
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.counters[key] += n
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self.counters)
+        snapshot["queued"] = self._queue.qsize()
+        return snapshot
+
+    # ------------------------------------------------------------------
+    # Producer side (simulation thread)
+    # ------------------------------------------------------------------
+    def submit(self, event: dict) -> bool:
+        """Queue an event for shipping; returns False if the policy dropped it."""
+        if self._closed.is_set():
+            self._count("dropped")
+            return False
+        self._ensure_started()
+        try:
+            if self.policy == BLOCK:
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+        except queue.Full:
+            if self.policy != DROP_OLDEST:
+                self._count("dropped")
+                return False
+            try:
+                self._queue.get_nowait()
+                self._count("dropped")
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self._count("dropped")
+                return False
+        self._count("enqueued")
+        return True
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="TelemetryShipper")
+                self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Consumer side (background thread)
+    # ------------------------------------------------------------------
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=max(remaining, 0)) if remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._closed.is_set() and self._queue.empty()) and not self._abandoned.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._ship(batch)
+        self._finish()
+
+    def _ship(self, batch):
+        pending = batch
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                if self._abandoned.is_set():
+                    break
+                self._count("retried", len(pending))
+                time.sleep(self.retry_backoff * attempt)
+            pending = self._post(pending)
+            if not pending:
+                return
+        self._count("failed", len(pending))
+        logger.warning(f"Failed to send {len(pending)} event(s) to API after {self.max_retries} retries")
+
+    def _post(self, batch):
+        """Post a batch over the shared session; return the events that failed."""
+        if self.batch_url:
+            try:
+                resp = self._session.post(self.batch_url, json=batch, timeout=self.timeout)
+            except requests.RequestException:
+                return batch
+            if resp.status_code in (404, 405):
+                logger.info(f"No batch endpoint at {self.batch_url}; posting events individually")
+                self.batch_url = None
+            elif resp.ok:
+                self._count("sent", len(batch))
+                return []
+            else:
+                return batch
+        failed = []
+        for i, event in enumerate(batch):
+            try:
+                resp = self._session.post(self.url, json=event, timeout=self.timeout)
+                resp.raise_for_status()
+            except requests.ConnectionError:
+                # backend unreachable: don't burn a timeout on every remaining event
+                failed.extend(batch[i:])
+                break
+            except requests.RequestException:
+                failed.append(event)
+            else:
+                self._count("sent")
+        return failed
+
+    def close(self, timeout=2.0):
+        """Stop accepting events and give the sender up to `timeout` seconds to drain."""
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                # still posting: the sender counts what it leaves behind and
+                # closes the session once its current batch is done
+                self._abandoned.set()
+                return
+        self._finish()
+
+    def _finish(self):
+        """Count whatever is still queued as dropped and close the session."""
+        leftover = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            leftover += 1
+        if leftover:
+            self._count("dropped", leftover)
+        self._session.close()
+
+
+_shipper = None
+_shipper_lock = threading.Lock()
+
+
+def get_shipper(url=None) -> TelemetryShipper:
+    """Process-wide shipper, created on first use from CCS_TELEMETRY_* settings."""
+    global _shipper
+    if _shipper is None:
+        with _shipper_lock:
+            if _shipper is None:
+                _shipper = TelemetryShipper(
+                    url or os.environ.get("CCS_TELEMETRY_URL", "http://localhost:8000/events/ingest"),
+                    max_queue=int(os.environ.get("CCS_TELEMETRY_QUEUE_SIZE", 10000)),
+                    batch_size=int(os.environ.get("CCS_TELEMETRY_BATCH_SIZE", 100)),
+                    policy=os.environ.get("CCS_TELEMETRY_POLICY", DROP_NEWEST),
+                )
+                atexit.register(_shipper.close)
+    return _shipper
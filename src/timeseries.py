@@ -0,0 +1,246 @@
+"""
+Columnar time-series recorder for WorldState.
+
+Attach a recorder to a world and it is sampled once per tick (every `every`
+ticks) by the pollution process:
+
+    world.series = SeriesRecorder(directory="runs/series", chunk=65536)
+
+Each sample is one row across preallocated NumPy columns:
+
+    t                float64             simulation time
+    nox, co2         int32  [n_sectors]  pollution per sector (ppm)
+    event_active     bool   [n_sectors]
+    tank_level       float32 [n_tanks]   kg
+    tank_pressure    float32 [n_tanks]   PSI
+    tank_state       uint8  [n_tanks]    index into TANK_STATES
+    truck_location   int32  [n_trucks]   index into the string table
+    well_pressure    float32 [n_wells]   Bar
+    injection_status int32               index into the string table
+    co2_injected_kg  float64
+    emergency_stop, leak_detected  bool
+
+Memory is fixed at `chunk` rows. Without a directory the buffer is a ring
+(the latest `chunk` samples); with one, every full buffer is written as a
+chunk directory series-000001/ holding one .npy file per column plus
+meta.json (sector, tank, truck and well ids and the string table). Plain .npy
+files can be memory-mapped, so
+
+    series = open_series("runs/series")
+    for nox in series.iter_chunks("nox"):   # one memory-mapped chunk at a time
+        ...
+
+analyses runs of millions of ticks without loading them into RAM, and
+
+    python -m src.timeseries DIR
+
+prints per-column statistics computed chunk by chunk.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+
+from .simulation import TANK_STATES
+
+_TANK_CODES = {state: i for i, state in enumerate(TANK_STATES)}
+
+
+class SeriesRecorder:
+    """Samples WorldState fields into fixed-size column buffers."""
+
+    def __init__(self, chunk=65536, directory=None, every=1):
+        self.chunk = chunk
+        self.directory = directory
+        self.every = max(1, int(every))
+        self._columns = None  # allocated on the first sample, when the fleet is known
+        self._strings = {}
+        self._string_names = []
+        self._ticks = 0
+        self._n = 0          # rows in the current buffer
+        self.total = 0       # rows sampled over the recorder's lifetime
+        self.chunks = 0
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """Recorder configured from CCS_SERIES_DIR/CHUNK/EVERY; None without a directory."""
+        env = os.environ
+        kwargs = dict(
+            chunk=int(env.get("CCS_SERIES_CHUNK", 65536)),
+            directory=env.get("CCS_SERIES_DIR") or None,
+            every=int(env.get("CCS_SERIES_EVERY", 1)),
+        )
+        kwargs.update(overrides)
+        if not kwargs["directory"]:
+            return None
+        return cls(**kwargs)
+
+    def _intern(self, name):
+        sid = self._strings.get(name)
+        if sid is None:
+            sid = self._strings[name] = len(self._string_names)
+            self._string_names.append(name)
+        return sid
+
+    def _bind(self, world):
+        # Fix the column layout to this world's fleet; tanks by id so the
+        # layout doesn't depend on TankStore ordering
+        self.sector_ids = list(world.sector_ids)
+        self.tank_ids = sorted(tank.tank_id for tank in world.tanks)
+        self.truck_ids = [truck.truck_id for truck in world.fleet]
+        self.well_ids = list(world.reservoir.well_ids)
+        n, s, k, m = self.chunk, len(self.sector_ids), len(self.tank_ids), len(self.truck_ids)
+        self._columns = {
+            "t": np.zeros(n, dtype=np.float64),
+            "nox": np.zeros((n, s), dtype=np.int32),
+            "co2": np.zeros((n, s), dtype=np.int32),
+            "event_active": np.zeros((n, s), dtype=bool),
+            "tank_level": np.zeros((n, k), dtype=np.float32),
+            "tank_pressure": np.zeros((n, k), dtype=np.float32),
+            "tank_state": np.zeros((n, k), dtype=np.uint8),
+            "truck_location": np.zeros((n, m), dtype=np.int32),
+            "well_pressure": np.zeros((n, len(self.well_ids)), dtype=np.float32),
+            "injection_status": np.zeros(n, dtype=np.int32),
+            "co2_injected_kg": np.zeros(n, dtype=np.float64),
+            "emergency_stop": np.zeros(n, dtype=bool),
+            "leak_detected": np.zeros(n, dtype=bool),
+        }
+
+    def sample(self, world):
+        """Record one row (called every tick; keeps every `every`-th)."""
+        self._ticks += 1
+        if (self._ticks - 1) % self.every:
+            return
+        if self._columns is None:
+            self._bind(world)
+        if self._n == self.chunk and self.directory:
+            self.flush()
+        cols = self._columns
+        i = self._n % self.chunk
+        cols["t"][i] = world.env.now
+        cols["nox"][i] = world.nox
+        cols["co2"][i] = world.co2
+        cols["event_active"][i] = world.sector_event_active
+        tanks = [world.tanks[tank_id] for tank_id in self.tank_ids]
+        cols["tank_level"][i] = [tank.level_kg for tank in tanks]
+        cols["tank_pressure"][i] = [tank.pressure_psi for tank in tanks]
+        cols["tank_state"][i] = [_TANK_CODES[tank.state] for tank in tanks]
+        cols["truck_location"][i] = [self._intern(truck.location) for truck in world.fleet]
+        # read-only: sampling must not change when the reservoir relaxes
+        cols["well_pressure"][i] = world.reservoir.pressure_at(world.env.now)
+        cols["injection_status"][i] = self._intern(world.injection_status)
+        cols["co2_injected_kg"][i] = world.co2_injected_kg
+        cols["emergency_stop"][i] = world.emergency_stop_triggered
+        cols["leak_detected"][i] = world.leak_detected
+        self._n += 1
+        self.total += 1
+
+    def meta(self):
+        return {
+            "sector_ids": self.sector_ids,
+            "tank_ids": self.tank_ids,
+            "truck_ids": self.truck_ids,
+            "well_ids": self.well_ids,
+            "tank_states": list(TANK_STATES),
+            "strings": list(self._string_names),
+        }
+
+    def columns(self):
+        """Buffered rows, oldest first, as a dict of arrays (copies)."""
+        if self._columns is None or not self._n:
+            return {}
+        if self._n <= self.chunk:
+            return {name: col[:self._n].copy() for name, col in self._columns.items()}
+        start = self._n % self.chunk  # ring wrapped: oldest row is the next to be overwritten
+        return {name: np.concatenate((col[start:], col[:start])) for name, col in self._columns.items()}
+
+    def flush(self):
+        """Write the buffered rows to the next chunk directory (needs `directory`)."""
+        if not self.directory or not self._n:
+            return None
+        self.chunks += 1
+        path = os.path.join(self.directory, f"series-{self.chunks:06d}")
+        os.makedirs(path, exist_ok=True)
+        for name, col in self._columns.items():
+            np.save(os.path.join(path, f"{name}.npy"), col[:self._n])
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(self.meta(), f)
+        self._n = 0
+        return path
+
+    def close(self):
+        return self.flush()
+
+
+class SeriesReader:
+    """Chunked, memory-mapped view of a recorded series directory."""
+
+    def __init__(self, directory):
+        self.paths = sorted(glob.glob(os.path.join(directory, "series-*")))
+        if not self.paths:
+            raise FileNotFoundError(f"No series chunks under {directory!r}")
+        # the last chunk carries the most complete string table (it only grows)
+        with open(os.path.join(self.paths[-1], "meta.json")) as f:
+            self.meta = json.load(f)
+
+    @property
+    def names(self):
+        return sorted(os.path.basename(p)[:-4] for p in glob.glob(os.path.join(self.paths[0], "*.npy")))
+
+    def iter_chunks(self, name):
+        """Memory-mapped arrays of column `name`, one per chunk."""
+        for path in self.paths:
+            yield np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+    def column(self, name):
+        """Whole column in memory (fine for scalar columns of long runs, or short runs)."""
+        return np.concatenate(list(self.iter_chunks(name)))
+
+    def __len__(self):
+        return sum(len(t) for t in self.iter_chunks("t"))
+
+    def decode(self, values):
+        """Strings for truck_location / injection_status codes."""
+        return np.array(self.meta["strings"], dtype=object)[np.asarray(values)]
+
+
+def open_series(directory):
+    return SeriesReader(directory)
+
+
+def summarize(series):
+    """Per-column count/min/mean/max over every chunk, reading one chunk at a time."""
+    out = {}
+    for name in series.names:
+        n, total, lo, hi = 0, 0.0, None, None
+        for chunk in series.iter_chunks(name):
+            if not chunk.size:
+                continue
+            values = chunk.astype(np.float64, copy=False)
+            n += chunk.size
+            total += float(values.sum())
+            lo = float(values.min()) if lo is None else min(lo, float(values.min()))
+            hi = float(values.max()) if hi is None else max(hi, float(values.max()))
+        out[name] = {"n": n, "min": lo, "mean": total / n if n else None, "max": hi}
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a recorded WorldState series")
+    parser.add_argument("directory")
+    args = parser.parse_args(argv)
+
+    series = open_series(args.directory)
+    sys.stdout.write(f"{len(series)} samples in {len(series.paths)} chunk(s)\n")
+    for name, stats in summarize(series).items():
+        if stats["n"]:
+            sys.stdout.write(f"  {name:<18} n={stats['n']:<10} min={stats['min']:<12g} "
+                             f"mean={stats['mean']:<12g} max={stats['max']:g}\n")
+
+
+if __name__ == "__main__":
+    main()
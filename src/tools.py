@@ -1,116 +1,231 @@
 import logging
-import requests
 import json
+import os
 from datetime import datetime
-from .simulation import WorldState
+import numpy as np
+from .simulation import WorldState, EMPTY, FILLING, SEALED, QUEUED, IN_TRANSIT, DELIVERED
+from .telemetry import get_shipper
+from .trace import define
 
 logger = logging.getLogger("Tools")
-API_URL = "http://localhost:8000/events/ingest"
+
+INFO, WARNING, CRITICAL = logging.INFO, logging.WARNING, logging.CRITICAL
+SENSOR_READ = define("sensor_read", "sensor", INFO,
+                     "[Sentinel] Reading sensors at {subject}: NOx={a:g}, CO2={b:g}", "Tools")
+SENSOR_SWEEP = define("sensor_sweep", "sensor", INFO,
+                      "[Sentinel] Reading {subject} sectors: max NOx {a:g}, max CO2 {b:g}", "Tools")
+TANK_CLAIMED = define("tank_claimed", "compressor", INFO, "[Compressor] Connected {subject} at {detail}.", "Tools")
+CAPTURE = define("capture", "compressor", INFO,
+                 "[Compressor] High CO2 detected. Activating amine scrubbers. "
+                 "{subject} Level: {a:g}kg, Pressure: {b:g} PSI", "Tools")
+VENT = define("vent", "compressor", INFO,
+              "[Compressor] Gas composition normal (mostly N2/O2). Venting to atmosphere.", "Tools")
+TANK_SEALED = define("tank_sealed", "compressor", INFO,
+                     "[Compressor] Tank {subject} at capacity ({b:g} PSI). SEALING.", "Tools")
+DISPATCH_REFUSED = define("dispatch_refused", "logistics", WARNING,
+                          "[Logistics] Cannot dispatch {subject}. Tank is not sealed!", "Tools")
+TRUCK_ASSIGNED = define("truck_assigned", "logistics", INFO,
+                        "[Logistics] {detail} assigned to {subject} after {a:g} ticks in queue.", "Tools")
+SEABED_ANALYSIS = define("seabed_analysis", "geology", INFO,
+                         "[Geologist] Analyzing {subject}. Pressure: {a:g} Bar. Fracture Limit: {b:g} Bar.", "Tools")
+INJECTED = define("injected", "geology", INFO, "[Geologist] Injecting {a:g}kg from {subject} into {detail}.", "Tools")
+INJECTION_ABORTED = define("injection_aborted", "geology", WARNING,
+                           "[Geologist] Injection ABORTED at {detail}. Risk of fracture!", "Tools")
+EMERGENCY_STOP = define("emergency_stop", "safety", CRITICAL,
+                        "[Guardian] EMERGENCY STOP TRIGGERED! Halting all agents.", "Tools")
+API_URL = os.environ.get("CCS_TELEMETRY_URL", "http://localhost:8000/events/ingest")
+
+# Off for batch runs (e.g. Monte Carlo scenarios) that should not hit the API
+TELEMETRY_ENABLED = os.environ.get("CCS_TELEMETRY", "1") != "0"
+
+def set_telemetry_enabled(enabled: bool):
+    global TELEMETRY_ENABLED
+    TELEMETRY_ENABLED = enabled
 
 def send_event(event_type: str, payload: dict):
-    """Helper to send events to the backend API."""
-    try:
-        event = {
-            "type": event_type,
-            "payload": payload,
-            "timestamp": datetime.utcnow().isoformat() + "Z"
-        }
-        requests.post(API_URL, json=event, timeout=0.5)
-    except Exception as e:
-        logger.warning(f"Failed to send event to API: {e}")
+    """Queue an event for the backend API; never blocks on the network."""
+    if not TELEMETRY_ENABLED:
+        return
+    event = {
+        "type": event_type,
+        "payload": payload,
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+    if not get_shipper(API_URL).submit(event):
+        logger.debug(f"Telemetry queue full, dropped {event_type} event")
 
 class BaseTool:
     def __init__(self, world: WorldState):
         self.world = world
 
 class SentinelTools(BaseTool):
-    def read_sensors(self, sector_id: str):
-        """Reads current pollution levels from the simulation."""
-        levels = self.world.pollution_level
-        logger.info(f"[Sentinel] Reading sensors at {sector_id}: {levels}")
+    def read_sensors(self, sectors="Sector-7"):
+        """Reads current pollution levels from the simulation.
+
+        `sectors` is a sector id or index (returns {"NOx": int, "CO2": int}),
+        or a slice / list of ids or indices (returns {"NOx": array, "CO2": array}).
+        Arrays are copies: a reading does not change as the world steps on.
+        """
+        idx = self.world.sector_selector(sectors)
+        # a slice would otherwise give live views that step_pollution updates in place
+        nox = self.world.nox[idx].copy()
+        co2 = self.world.co2[idx].copy()
+        trace = self.world.trace
+        if np.ndim(nox) == 0:
+            levels = {"NOx": int(nox), "CO2": int(co2)}
+            trace.emit(SENSOR_READ, sectors if isinstance(sectors, str) else self.world.sector_ids[idx],
+                       a=levels["NOx"], b=levels["CO2"])
+        else:
+            levels = {"NOx": nox, "CO2": co2}
+            if trace.enabled(SENSOR_SWEEP) and len(nox):
+                trace.emit(SENSOR_SWEEP, str(len(nox)), a=nox.max(), b=co2.max())
         # Optional: Send sensor data as a generic event for debugging
-        # send_event("sensor_reading", {"sector": sector_id, "levels": levels})
+        # send_event("sensor_reading", {"sector": sectors, "levels": levels})
         return levels
 
 class CompressorTools(BaseTool):
-    def activate_scrubber(self, gas_composition: dict):
+    def claim_tank(self, origin: str):
+        """Takes the longest-idle empty tank for filling; None if every tank is busy."""
+        tank = self.world.tanks.first(EMPTY)
+        if tank is None:
+            return None
+        self.world.tanks.set_state(tank, FILLING)
+        tank.origin = origin
+        self.world.trace.emit(TANK_CLAIMED, tank.tank_id, origin)
+        return tank
+
+    def activate_scrubber(self, gas_composition: dict, tank_id: str = "Tank-001"):
         """Filters gas. Returns True if CO2 is captured, False if vented."""
         if "CO2" in gas_composition and gas_composition["CO2"] > 500: # Threshold
-            logger.info("[Compressor] High CO2 detected. Activating amine scrubbers.")
             # Simulate filling the tank
-            self.world.current_tank_level += 100
-            self.world.tank_pressure += 300
-            logger.info(f"[Compressor] Tank Level: {self.world.current_tank_level}kg, Pressure: {self.world.tank_pressure} PSI")
+            tank = self.world.tanks[tank_id]
+            tank.level_kg += 100
+            tank.pressure_psi += 300
+            self.world.trace.emit(CAPTURE, tank_id, a=tank.level_kg, b=tank.pressure_psi)
             return True
         else:
-            logger.info("[Compressor] Gas composition normal (mostly N2/O2). Venting to atmosphere.")
+            self.world.trace.emit(VENT, tank_id, a=gas_composition.get("CO2", 0))
             return False
 
     def check_tank_pressure(self, tank_id: str):
         """Checks if tank is ready for transport."""
-        if self.world.tank_pressure >= 2900:
-            self.world.is_tank_sealed = True
-            logger.info(f"[Compressor] Tank {tank_id} at capacity ({self.world.tank_pressure} PSI). SEALING.")
-            
-            # Emit tank_ready event
-            payload = {
-                "tank_id": tank_id,
-                "origin": "Refinery-Sector-7",
-                "mass_co2_kg": self.world.current_tank_level,
-                "pressure_psi": self.world.tank_pressure,
-                "sealed": True
-            }
-            send_event("tank_ready", payload)
+        tank = self.world.tanks[tank_id]
+        if tank.pressure_psi >= 2900:
+            if tank.state == FILLING:
+                self.world.tanks.set_state(tank, SEALED)
+                self.world.trace.emit(TANK_SEALED, tank_id, a=tank.level_kg, b=tank.pressure_psi)
+
+                # Emit tank_ready event
+                payload = {
+                    "tank_id": tank_id,
+                    "origin": tank.origin,
+                    "mass_co2_kg": tank.level_kg,
+                    "pressure_psi": tank.pressure_psi,
+                    "sealed": True
+                }
+                send_event("tank_ready", payload)
+                self.world.signal("tank_sealed", tank_id)
             return "SEALED"
         return "FILLING"
 
 class LogisticsTools(BaseTool):
-    def dispatch_truck(self, tank_id: str, destination: str):
-        """Dispatches a truck to move the tank."""
-        if not self.world.is_tank_sealed:
-            logger.warning(f"[Logistics] Cannot dispatch {tank_id}. Tank is not sealed!")
+    def request_transport(self, tank_id: str):
+        """Queues a sealed tank for the next free truck."""
+        tank = self.world.tanks[tank_id]
+        if tank.state != SEALED:
+            self.world.trace.emit(DISPATCH_REFUSED, tank_id)
             return False
-        
-        logger.info(f"[Logistics] Dispatching truck for {tank_id} to {destination}.")
-        # Simulate transport (instant in this step, but consumes resource in real sim)
-        with self.world.trucks_available.request() as req:
-            # yield req # In a real agent loop we would yield, but for tools we just check availability
-            logger.info(f"[Logistics] Truck assigned. Moving to {destination}...")
-            self.world.truck_location = destination
-            return True
+        self.world.tanks.set_state(tank, QUEUED)
+        return True
+
+    def dispatch_truck(self, tank_id: str, destination: str, requested=None):
+        """Waits for a free truck and loads a queued tank onto it.
+
+        A simpy generator: `truck = yield from tools.dispatch_truck(...)`.
+        `requested` is when the tank started waiting (default: now).
+        """
+        world = self.world
+        if requested is None:
+            requested = world.env.now
+        truck = yield world.trucks.get()
+        waited = world.env.now - requested
+        world.truck_wait_total += waited
+        world.truck_requests += 1
+
+        tank = world.tanks[tank_id]
+        world.tanks.set_state(tank, IN_TRANSIT)
+        truck.location = "HIGHWAY"
+        truck.tank_id = tank_id
+        truck.dispatched_at = world.env.now
+        world.trace.emit(TRUCK_ASSIGNED, tank_id, truck.truck_id, a=waited)
+        return truck
+
+    def arrive(self, truck, destination: str):
+        """Unloads the truck's tank at its destination and wakes whoever waits for it."""
+        truck.location = destination
+        tank = self.world.tanks[truck.tank_id]
+        self.world.tanks.set_state(tank, DELIVERED)
+        self.world.signal("truck_arrived", tank.tank_id)
+
+    def return_truck(self, truck):
+        """Puts an empty truck back in the pool (a simpy generator, like dispatch_truck)."""
+        world = self.world
+        truck.location = "DEPOT"
+        truck.tank_id = None
+        truck.busy_time += world.env.now - truck.dispatched_at
+        truck.dispatched_at = None
+        truck.trips += 1
+        yield world.trucks.put(truck)
 
 class GeologistTools(BaseTool):
     def analyze_seabed(self, location: str):
-        """Checks geological stability."""
-        pressure = self.world.seabed_pressure
-        fracture_limit = self.world.fracture_pressure
-        logger.info(f"[Geologist] Analyzing {location}. Pressure: {pressure} Bar. Fracture Limit: {fracture_limit} Bar.")
-        
-        if pressure < fracture_limit * 0.9:
+        """Checks geological stability of a well."""
+        reservoir = self.world.reservoir
+        i = reservoir.well_index[location]
+        safe = reservoir.is_safe(i, self.world.env.now)
+        self.world.trace.emit(SEABED_ANALYSIS, location, a=reservoir.pressure[i], b=reservoir.limit[i])
+
+        if safe:
             return "SAFE"
         else:
             return "UNSAFE"
 
-    def inject_gas(self, well_id: str, amount_kg: float):
-        """Injects gas if safe."""
-        if self.analyze_seabed("Current Well") == "SAFE":
-            logger.info(f"[Geologist] Injecting {amount_kg}kg into {well_id}.")
-            self.world.current_tank_level = 0 # Empty tank
-            self.world.tank_pressure = 0
-            self.world.is_tank_sealed = False
+    def select_well(self, mass_kg):
+        """Well with the most headroom if it can take `mass_kg` (headroom index lookup), else None."""
+        reservoir = self.world.reservoir
+        i = reservoir.select(mass_kg, self.world.env.now)
+        if i is None:
+            return None
+        well_id = reservoir.well_ids[i]
+        self.world.trace.emit(SEABED_ANALYSIS, well_id, a=reservoir.pressure[i], b=reservoir.limit[i])
+        return well_id
+
+    def inject_gas(self, well_id: str, tank_id: str = "Tank-001"):
+        """Injects a delivered tank's contents if safe."""
+        if self.analyze_seabed(well_id) == "SAFE":
+            tank = self.world.tanks[tank_id]
+            amount_kg = tank.level_kg
+            self.world.trace.emit(INJECTED, tank_id, well_id, a=amount_kg)
+            self.world.reservoir.inject(well_id, amount_kg, self.world.env.now)
+            tank.level_kg = 0 # Empty tank
+            tank.pressure_psi = 0
+            tank.origin = None
+            self.world.tanks.set_state(tank, EMPTY)
             self.world.injection_status = "SUCCESS"
-            
+            self.world.co2_injected_kg += amount_kg
+
             # Emit injection_report event
             payload = {
                 "well_id": well_id,
-                "tank_id": "Tank-001", # Simplified
+                "tank_id": tank_id,
                 "status": "injected",
                 "mass_tonnes": amount_kg / 1000.0,
             }
             send_event("injection_report", payload)
+            self.world.signal("tank_emptied", tank_id)
             return True
         else:
-            logger.warning(f"[Geologist] Injection ABORTED at {well_id}. Risk of fracture!")
+            self.world.trace.emit(INJECTION_ABORTED, tank_id, well_id)
             return False
 
 class SafetyTools(BaseTool):
@@ -118,15 +233,17 @@ class SafetyTools(BaseTool):
         """Checks for leaks or anomalies."""
         status = {
             "leak_detected": self.world.leak_detected,
-            "tank_pressure": self.world.tank_pressure,
+            "tank_pressure": max((t.pressure_psi for t in self.world.tanks.in_state(FILLING)), default=0),
             "pollution_levels": self.world.pollution_level
         }
         return status
 
     def emergency_stop(self):
         """Halts all operations."""
-        logger.critical("[Guardian] EMERGENCY STOP TRIGGERED! Halting all agents.")
+        self.world.trace.emit(EMERGENCY_STOP)
         self.world.emergency_stop_triggered = True
+        if self.world.emergency_stop_time is None:
+            self.world.emergency_stop_time = self.world.env.now
         
         # Emit guardian_alert event
         payload = {
@@ -0,0 +1,321 @@
+"""
+Structured trace recorder for the simpy model.
+
+Agents and tools emit typed records instead of formatted log lines:
+
+    CAPTURE = define("capture", "compressor", logging.INFO,
+                     "[Compressor] {subject} Level: {a:g}kg, Pressure: {b:g} PSI")
+    world.trace.emit(CAPTURE, tank.tank_id, a=tank.level_kg, b=tank.pressure_psi)
+
+A record is (time, event code, subject, detail, a, b): two interned strings
+and two numbers, written into preallocated NumPy columns. The level and
+sampling gate for each event is looked up before anything else happens, so a
+filtered record costs a list index and a comparison, and no string is ever
+formatted unless human-readable logging is switched on.
+
+Records go to a ring of `capacity` rows (oldest overwritten) or, with
+`directory`, to columnar chunk files trace-000001.npz, ... written each time
+the buffer fills. load_trace() reads either back as columns, and
+
+    python -m src.trace DIR [--format csv|jsonl|summary] [--out FILE]
+
+converts chunk files for post-run analysis.
+
+Configured from CCS_TRACE_* by TraceRecorder.from_env():
+    CCS_TRACE_LEVEL     minimum level, a logging level name or OFF (INFO)
+    CCS_TRACE_LEVELS    per-category levels, e.g. "sensor=WARNING,compressor=DEBUG"
+    CCS_TRACE_SAMPLE    per-category sampling rates, e.g. "sensor=0.1"
+    CCS_TRACE_LOG       1 to also log each kept record as text (1)
+    CCS_TRACE_DIR       directory for chunk files (none: in-memory ring)
+    CCS_TRACE_CAPACITY  rows per buffer (65536)
+"""
+
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+
+OFF = logging.CRITICAL + 10
+
+# Event registry shared by every recorder; codes are indexes into it
+_EVENTS = []
+_EVENT_CODES = {}
+
+
+class EventSpec:
+    __slots__ = ("code", "name", "category", "level", "template", "logger")
+
+    def __init__(self, code, name, category, level, template, logger):
+        self.code = code
+        self.name = name
+        self.category = category
+        self.level = level
+        self.template = template
+        self.logger = logger
+
+    def format(self, subject, detail, a, b):
+        return self.template.format(subject=subject, detail=detail, a=a, b=b)
+
+
+def define(name, category, level, template, logger="Trace"):
+    """Register an event type and return its integer code (idempotent per name)."""
+    if name in _EVENT_CODES:
+        return _EVENT_CODES[name]
+    code = len(_EVENTS)
+    _EVENTS.append(EventSpec(code, name, category, level, template, logging.getLogger(logger)))
+    _EVENT_CODES[name] = code
+    return code
+
+
+def _parse_map(spec, convert):
+    out = {}
+    for item in filter(None, (s.strip() for s in (spec or "").split(","))):
+        key, _, value = item.partition("=")
+        out[key.strip()] = convert(value.strip())
+    return out
+
+
+def _level(value):
+    if isinstance(value, int):
+        return value
+    value = value.upper()
+    if value == "OFF":
+        return OFF
+    level = logging.getLevelName(value)
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown trace level {value!r}")
+    return level
+
+
+class TraceRecorder:
+    """Columnar ring buffer (or chunk writer) of typed trace records."""
+
+    COLUMNS = ("t", "code", "subject", "detail", "a", "b")
+
+    def __init__(self, capacity=65536, level=logging.INFO, levels=None, sample=None,
+                 log=False, directory=None, clock=None):
+        self.capacity = capacity
+        self.level = _level(level)
+        self.levels = {k: _level(v) for k, v in (levels or {}).items()}
+        self.sample = dict(sample or {})
+        self.log = log
+        self.directory = directory
+        self.clock = clock or (lambda: 0.0)
+
+        self._strides = []   # event code -> keep every Nth record, 0 = dropped
+        self._seen = []      # event code -> records offered (for sampling)
+        self._subjects = {"": 0}
+        self._subject_names = [""]
+        self._columns = None  # allocated on first record
+        self._n = 0           # rows written into the current buffer
+        self.total = 0        # records kept over the recorder's lifetime
+        self.chunks = 0
+
+    @classmethod
+    def from_env(cls, **overrides):
+        env = os.environ
+        kwargs = dict(
+            capacity=int(env.get("CCS_TRACE_CAPACITY", 65536)),
+            level=env.get("CCS_TRACE_LEVEL", "INFO"),
+            levels=_parse_map(env.get("CCS_TRACE_LEVELS"), str),
+            sample=_parse_map(env.get("CCS_TRACE_SAMPLE"), float),
+            log=env.get("CCS_TRACE_LOG", "1") != "0",
+            directory=env.get("CCS_TRACE_DIR") or None,
+        )
+        kwargs.update(overrides)
+        return cls(**kwargs)
+
+    @classmethod
+    def disabled(cls):
+        """A recorder that drops everything (nothing is allocated)."""
+        return cls(level=OFF)
+
+    # ------------------------------------------------------------------
+    # Gating
+    # ------------------------------------------------------------------
+    def _refresh(self, code):
+        """Compute level/sampling gates for events registered since the last call."""
+        for spec in _EVENTS[len(self._strides):]:
+            threshold = self.levels.get(spec.category, self.level)
+            if spec.level < threshold:
+                stride = 0
+            else:
+                rate = self.sample.get(spec.category, 1.0)
+                stride = 0 if rate <= 0 else max(1, round(1 / rate))
+            self._strides.append(stride)
+            self._seen.append(0)
+        return self._strides[code]
+
+    def enabled(self, code):
+        """True if records of this event can be kept (check before building costly arguments)."""
+        try:
+            return self._strides[code] != 0
+        except IndexError:
+            return self._refresh(code) != 0
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def emit(self, code, subject="", detail="", a=0.0, b=0.0):
+        try:
+            stride = self._strides[code]
+        except IndexError:
+            stride = self._refresh(code)
+        if not stride:
+            return
+        if stride > 1:
+            seen = self._seen[code]
+            self._seen[code] = seen + 1
+            if seen % stride:
+                return
+        self._write(code, subject, detail, a, b)
+        if self.log:
+            spec = _EVENTS[code]
+            if spec.logger.isEnabledFor(spec.level):
+                spec.logger.log(spec.level, spec.format(subject, detail, a, b))
+
+    def _intern(self, name):
+        sid = self._subjects.get(name)
+        if sid is None:
+            sid = self._subjects[name] = len(self._subject_names)
+            self._subject_names.append(name)
+        return sid
+
+    def _allocate(self):
+        n = self.capacity
+        self._columns = {
+            "t": np.zeros(n, dtype=np.float64),
+            "code": np.zeros(n, dtype=np.uint16),
+            "subject": np.zeros(n, dtype=np.int32),
+            "detail": np.zeros(n, dtype=np.int32),
+            "a": np.zeros(n, dtype=np.float64),
+            "b": np.zeros(n, dtype=np.float64),
+        }
+
+    def _write(self, code, subject, detail, a, b):
+        cols = self._columns
+        if cols is None:
+            self._allocate()
+            cols = self._columns
+        if self._n == self.capacity and self.directory:
+            self.flush()
+        i = self._n % self.capacity
+        cols["t"][i] = self.clock()
+        cols["code"][i] = code
+        cols["subject"][i] = self._intern(subject)
+        cols["detail"][i] = self._intern(detail) if detail else 0
+        cols["a"][i] = a
+        cols["b"][i] = b
+        self._n += 1
+        self.total += 1
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def columns(self):
+        """Buffered records, oldest first, as a dict of arrays (copies)."""
+        if self._columns is None or not self._n:
+            return {name: np.zeros(0) for name in self.COLUMNS}
+        if self._n <= self.capacity:
+            return {name: col[:self._n].copy() for name, col in self._columns.items()}
+        start = self._n % self.capacity  # ring wrapped: oldest row is the next to be overwritten
+        return {name: np.concatenate((col[start:], col[:start])) for name, col in self._columns.items()}
+
+    def tables(self):
+        return {"events": [spec.name for spec in _EVENTS], "subjects": list(self._subject_names)}
+
+    def flush(self):
+        """Write the buffered rows to the next chunk file (needs `directory`)."""
+        if not self.directory or not self._n:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        self.chunks += 1
+        path = os.path.join(self.directory, f"trace-{self.chunks:06d}.npz")
+        tables = self.tables()
+        np.savez(path, events=np.array(tables["events"]), subjects=np.array(tables["subjects"]),
+                 **{name: col[:self._n] for name, col in self._columns.items()})
+        self._n = 0
+        return path
+
+    def close(self):
+        return self.flush()
+
+
+# ----------------------------------------------------------------------
+# Post-run analysis
+# ----------------------------------------------------------------------
+def load_trace(source):
+    """Columns plus decoded `event` and `subject_name`/`detail_name` arrays.
+
+    `source` is a TraceRecorder, a chunk directory or a single .npz file.
+    """
+    if isinstance(source, TraceRecorder):
+        parts = [(source.columns(), source.tables())]
+    else:
+        paths = sorted(glob.glob(os.path.join(source, "trace-*.npz"))) if os.path.isdir(source) else [source]
+        parts = []
+        for path in paths:
+            with np.load(path) as data:
+                cols = {name: data[name] for name in TraceRecorder.COLUMNS}
+                parts.append((cols, {"events": list(data["events"]), "subjects": list(data["subjects"])}))
+    if not parts:
+        return {name: np.zeros(0) for name in TraceRecorder.COLUMNS}
+    # the last chunk carries the most complete string tables (they only grow)
+    tables = parts[-1][1]
+    out = {name: np.concatenate([cols[name] for cols, _ in parts]) for name in TraceRecorder.COLUMNS}
+    events = np.array(tables["events"], dtype=object)
+    subjects = np.array(tables["subjects"], dtype=object)
+    out["event"] = events[out["code"].astype(np.intp)]
+    out["subject_name"] = subjects[out["subject"]]
+    out["detail_name"] = subjects[out["detail"]]
+    return out
+
+
+def iter_rows(trace):
+    for i in range(len(trace["t"])):
+        yield {
+            "t": float(trace["t"][i]),
+            "event": str(trace["event"][i]),
+            "subject": str(trace["subject_name"][i]),
+            "detail": str(trace["detail_name"][i]),
+            "a": float(trace["a"][i]),
+            "b": float(trace["b"][i]),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert trace chunk files for analysis")
+    parser.add_argument("source", help="trace directory or chunk file")
+    parser.add_argument("--format", choices=("csv", "jsonl", "summary"), default="summary")
+    parser.add_argument("--out", default=None, help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    trace = load_trace(args.source)
+    out = open(args.out, "w", newline="") if args.out else sys.stdout
+    try:
+        if args.format == "summary":
+            counts = Counter(map(str, trace["event"]))
+            span = (trace["t"].min(), trace["t"].max()) if len(trace["t"]) else (0, 0)
+            out.write(f"{len(trace['t'])} records, t={span[0]:g}..{span[1]:g}\n")
+            for event, n in counts.most_common():
+                out.write(f"  {event:<24} {n}\n")
+        elif args.format == "csv":
+            writer = csv.DictWriter(out, fieldnames=["t", "event", "subject", "detail", "a", "b"])
+            writer.writeheader()
+            writer.writerows(iter_rows(trace))
+        else:
+            for row in iter_rows(trace):
+                out.write(json.dumps(row) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
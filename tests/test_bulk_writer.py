@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import crud  # noqa: E402
+import dedup  # noqa: E402
+import models  # noqa: E402
+
+
+def _session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'writer.db'}", future=True)
+    models.Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, future=True), engine
+
+
+def test_single_row_flushes_after_max_delay(tmp_path):
+    session_factory, engine = _session_factory(tmp_path)
+    writer = crud.BulkWriter(max_rows=500, max_delay=0.2, session_factory=session_factory).start()
+    try:
+        writer.add("pollution_event", {"event_id": "evt-1", "source_id": "src"})
+        deadline = time.monotonic() + 2.0
+        while writer.stats["flushes"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert writer.stats["inserted"] == 1
+        assert writer.stats["flushes"] == 1
+    finally:
+        writer.close()
+    with engine.connect() as conn:
+        assert conn.execute(select(models.PollutionEvent.event_id)).scalars().all() == ["evt-1"]
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_failed_flush_is_requeued_and_retried(tmp_path):
+    session_factory, engine = _session_factory(tmp_path)
+    outages = [2]
+
+    def flaky_session():
+        if outages[0]:
+            outages[0] -= 1
+            raise OSError("database unavailable")
+        return session_factory()
+
+    writer = crud.BulkWriter(max_rows=500, max_delay=0.05, session_factory=flaky_session,
+                             max_retries=3, retry_backoff=0.05).start()
+    try:
+        writer.add("pollution_event", {"event_id": "evt-1", "source_id": "src"})
+        assert _wait_for(lambda: writer.stats["inserted"] == 1)
+        assert writer.stats["requeued"] == 2
+        assert writer.stats["failed"] == 0
+        assert writer.pending == 0
+    finally:
+        writer.close()
+
+
+def test_batch_is_dropped_after_max_retries(tmp_path):
+    recent = dedup.RecentKeys(capacity=10)
+
+    def broken_session():
+        raise OSError("database unavailable")
+
+    writer = crud.BulkWriter(max_rows=500, max_delay=0.05, session_factory=broken_session, recent=recent,
+                             max_retries=2, retry_backoff=0.02).start()
+    writer.add("pollution_event", {"event_id": "evt-1", "source_id": "src"})
+    writer.close()
+    assert writer.stats["requeued"] == 2
+    assert writer.stats["failed"] == 1
+    assert writer.pending == 0
+    assert ("pollution_event", "evt-1") not in recent
+
+
+def test_add_refuses_past_max_pending(tmp_path):
+    session_factory, _engine = _session_factory(tmp_path)
+    writer = crud.BulkWriter(max_rows=500, session_factory=session_factory, max_pending=2)
+    writer.add("pollution_event", {"event_id": "evt-1"})
+    writer.add("pollution_event", {"event_id": "evt-2"})
+    with pytest.raises(crud.WriterOverloaded):
+        writer.add("pollution_event", {"event_id": "evt-3"})
+    assert writer.stats["rejected"] == 1
+    writer.close()
+    assert writer.stats["inserted"] == 2
+
+
+def test_bad_rows_do_not_take_the_batch_down(tmp_path):
+    session_factory, engine = _session_factory(tmp_path)
+    models.CaptureState.__table__.drop(engine)
+    recent = dedup.RecentKeys(capacity=10)
+    writer = crud.BulkWriter(max_rows=500, session_factory=session_factory, recent=recent, max_retries=0)
+    writer.add("capture_state", {"unit_id": "unit-1"})            # its table is missing
+    writer.add("pollution_event", {"event_id": "evt-1", "source_id": "src"})
+    writer.add("pollution_event", {"event_id": None, "source_id": "src"})  # violates NOT NULL
+    writer.add("pollution_event", {"event_id": "evt-2", "source_id": "src"})
+    writer.add("tank", {"tank_id": "TANK-1"})
+    with pytest.raises(Exception):
+        writer.flush()
+    assert writer.stats["inserted"] == 3
+    assert writer.stats["failed"] == 2
+    assert writer.pending == 0
+    with engine.connect() as conn:
+        assert sorted(conn.execute(select(models.PollutionEvent.event_id)).scalars()) == ["evt-1", "evt-2"]
+    assert ("pollution_event", "evt-1") in recent
+    writer.close()
@@ -0,0 +1,95 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.app.db.event_log import EventLog, SEGMENT_SUFFIX  # noqa: E402
+
+
+def _segments(directory):
+    return sorted(n for n in os.listdir(directory) if n.endswith(SEGMENT_SUFFIX))
+
+
+def test_gap_after_truncated_segment_does_not_resurrect_stale_records(tmp_path):
+    directory = str(tmp_path)
+    log = EventLog(directory, segment_bytes=200)
+    for i in range(30):
+        log.append({"n": i})
+    log.close()
+
+    second = os.path.join(directory, _segments(directory)[1])
+    with open(second, "r+b") as f:
+        f.truncate(os.path.getsize(second) - 5)
+
+    log = EventLog(directory, segment_bytes=200)
+    resumed_at = log.end_offset
+    assert resumed_at < 30
+    assert all(n.endswith(".corrupt") for n in os.listdir(directory)
+               if not n.endswith(SEGMENT_SUFFIX))
+    for i in range(30):
+        log.append({"n": 100 + i})
+    log.close()
+
+    log = EventLog(directory, segment_bytes=200)
+    values = [record["n"] for _offset, record in log.read(0, 1000)]
+    log.close()
+    assert values == list(range(resumed_at)) + list(range(100, 130))
+
+
+def test_roll_refuses_non_empty_existing_segment(tmp_path):
+    directory = str(tmp_path)
+    log = EventLog(directory, segment_bytes=200)
+    log.append({"n": 0})
+    with open(os.path.join(directory, f"{1:020d}{SEGMENT_SUFFIX}"), "wb") as f:
+        f.write(b"stale")
+    try:
+        with pytest.raises(RuntimeError):
+            log._roll(1)
+    finally:
+        log.close()
+
+
+class _FullDisk:
+    """File wrapper that writes half of the data, then fails like ENOSPC."""
+
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, data):
+        self._f.write(data[:len(data) // 2])
+        self._f.flush()
+        raise OSError(28, "No space left on device")
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+def test_failed_write_leaves_index_and_file_consistent(tmp_path):
+    directory = str(tmp_path)
+    log = EventLog(directory, index_interval=2)
+    for i in range(5):
+        log.append({"n": i})
+    active = log._segments[-1]
+    size = active.size
+    active._file = _FullDisk(active._file)
+    with pytest.raises(OSError):
+        log.append_many([{"n": 100 + i} for i in range(3)])
+    assert log.end_offset == 5
+    assert os.path.getsize(active.path) == size
+
+    log.append({"n": 5})
+    assert [record["n"] for _offset, record in log.read(0, 100)] == list(range(6))
+    log.close()
+    log = EventLog(directory, index_interval=2)
+    assert [record["n"] for _offset, record in log.read(0, 100)] == list(range(6))
+    log.close()
+
+
+def test_fsync_appends(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=200, fsync=True)
+    for i in range(30):
+        log.append({"n": i})
+    assert [record["n"] for _offset, record in log.read(0, 100)] == list(range(30))
+    log.close()